@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
-from .models import User, PasswordResetToken
+from .models import User, PasswordResetToken, OutgoingEmail
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -30,8 +30,8 @@ class UserAdmin(BaseUserAdmin):
 class PasswordResetTokenAdmin(admin.ModelAdmin):
     list_display = ('user_email', 'token_short', 'created_at', 'expires_at', 'is_used', 'is_expired')
     list_filter = ('is_used', 'created_at', 'expires_at')
-    search_fields = ('user__email', 'token')
-    readonly_fields = ('token', 'created_at')
+    search_fields = ('user__email',)
+    readonly_fields = ('token_hash', 'created_at')
     ordering = ('-created_at',)
     
     def user_email(self, obj):
@@ -39,8 +39,8 @@ class PasswordResetTokenAdmin(admin.ModelAdmin):
     user_email.short_description = 'User Email'
     
     def token_short(self, obj):
-        return f"{obj.token[:8]}..."
-    token_short.short_description = 'Token'
+        return f"{obj.token_hash[:8]}..."
+    token_short.short_description = 'Token Hash'
     
     def is_expired(self, obj):
         from django.utils import timezone
@@ -48,4 +48,12 @@ class PasswordResetTokenAdmin(admin.ModelAdmin):
         color = 'red' if expired else 'green'
         text = 'Expired' if expired else 'Valid'
         return format_html(f'<span style="color: {color};">{text}</span>')
-    is_expired.short_description = 'Status'
\ No newline at end of file
+    is_expired.short_description = 'Status'
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('to', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    ordering = ('-created_at',)
@@ -0,0 +1,133 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from math import ceil
+import json
+
+from travel_api.throttling import AUTH_THROTTLES, throttle_wait
+
+from .hashing import HashingBusy, run_hashing
+from .models import User
+from .serializers import UserRegistrationSerializer, UserProfileSerializer
+from .services import EmailService
+from .views import auth_payload
+
+def _busy_response():
+    response = JsonResponse(
+        {'error': 'The server is busy processing other sign-ins. Please try again shortly.'}, status=503
+    )
+    response['Retry-After'] = '1'
+    return response
+
+def _throttled_response(wait):
+    # Same shape as DRF's Throttled error on the sync endpoints
+    seconds = max(ceil(wait), 1)
+    response = JsonResponse(
+        {'detail': f'Request was throttled. Expected available in {seconds} seconds.'}, status=429
+    )
+    response['Retry-After'] = str(seconds)
+    return response
+
+def _request_data(request):
+    """JSON or form body as a dict; raises ValueError on malformed JSON"""
+    if request.content_type == 'application/json':
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+        return data
+    return request.POST.dict()
+
+def _wants_jwt(request, data):
+    return (data.get('token_type') or request.GET.get('token_type')) == 'jwt'
+
+@csrf_exempt
+@require_POST
+async def login_view(request):
+    """Async login for the ASGI app: the password check runs on the hashing pool"""
+    wait = await sync_to_async(throttle_wait)(request, AUTH_THROTTLES)
+    if wait is not None:
+        return _throttled_response(wait)
+
+    try:
+        data = _request_data(request)
+    except ValueError:
+        return JsonResponse({'error': 'Malformed request body.'}, status=400)
+
+    email = data.get('email')
+    password = data.get('password')
+    if not email or not password:
+        return JsonResponse({'error': 'Must include email and password'}, status=400)
+
+    user = await User.objects.filter(**{User.USERNAME_FIELD: email}).afirst()
+    try:
+        if user is None:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            await run_hashing(make_password, password)
+            valid = False
+        else:
+            valid = await run_hashing(check_password, password, user.password)
+    except HashingBusy:
+        return _busy_response()
+
+    if not valid or not user.is_active:
+        return JsonResponse({
+            'error': 'Invalid email or password. Please check your credentials and try again.'
+        }, status=400)
+
+    if identify_hasher(user.password).must_update(user.password):
+        # Bring the stored hash up to the configured cost; a busy pool just defers it
+        try:
+            user.password = await run_hashing(make_password, password)
+            await user.asave(update_fields=['password'])
+        except HashingBusy:
+            pass
+
+    credentials = await sync_to_async(auth_payload)(user, _wants_jwt(request, data))
+    return JsonResponse({
+        'user': UserProfileSerializer(user).data,
+        **credentials,
+        'message': 'Login successful'
+    })
+
+def _create_user(fields, encoded_password):
+    # create_user would hash again, so create without a password and store the hash
+    with transaction.atomic():
+        user = User.objects.create_user(password=None, **fields)
+        user.password = encoded_password
+        user.save(update_fields=['password'])
+    return user
+
+def _finish_registration(user, use_jwt, request):
+    EmailService.send_registration_email(user, request)
+    return auth_payload(user, use_jwt)
+
+@csrf_exempt
+@require_POST
+async def register_view(request):
+    """Async registration for the ASGI app: the new password is hashed on the hashing pool"""
+    try:
+        data = _request_data(request)
+    except ValueError:
+        return JsonResponse({'error': 'Malformed request body.'}, status=400)
+
+    serializer = UserRegistrationSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    fields = dict(serializer.validated_data)
+    fields.pop('password_confirm')
+    try:
+        encoded = await run_hashing(make_password, fields.pop('password'))
+    except HashingBusy:
+        return _busy_response()
+
+    user = await sync_to_async(_create_user)(fields, encoded)
+    credentials = await sync_to_async(_finish_registration)(user, _wants_jwt(request, data), request)
+    return JsonResponse({
+        'user': UserProfileSerializer(user).data,
+        **credentials,
+        'message': 'Registration successful'
+    }, status=201)
@@ -0,0 +1,145 @@
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User, RevokedToken
+
+# Copied into access tokens so reads can rebuild request.user without a query
+USER_CLAIMS = ['username', 'email', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'is_verified']
+
+DENYLIST_CACHE_KEY = 'jwt_denylist'
+
+def issue_tokens(user):
+    """Refresh and access token pair for ``user``; the access token carries USER_CLAIMS"""
+    refresh = RefreshToken.for_user(user)
+    access = refresh.access_token
+    for claim in USER_CLAIMS:
+        access[claim] = getattr(user, claim)
+    return {'refresh': str(refresh), 'access': str(access)}
+
+def _expiry(token):
+    return datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+
+def denylist():
+    """Unexpired access-token revocations as (jtis, {user_id: revoked_at}), cached briefly.
+
+    Refresh tokens are left out: they are only ever presented to the refresh
+    endpoint, which checks them in the database. What remains are access
+    tokens, which live for minutes, and per-user cutoffs, so the list stays
+    small; revoking clears the cache entry so the next check reloads it.
+    """
+    cached = cache.get(DENYLIST_CACHE_KEY)
+    if cached is None:
+        jtis = set()
+        users = {}
+        for jti, user_id, revoked_at in RevokedToken.objects.filter(
+            expires_at__gt=timezone.now()
+        ).exclude(token_type='refresh').values_list('jti', 'user_id', 'revoked_at'):
+            if jti:
+                jtis.add(jti)
+            else:
+                # Tokens carry the user id as a string
+                users[str(user_id)] = max(revoked_at, users.get(str(user_id), revoked_at))
+        cached = (jtis, users)
+        cache.set(DENYLIST_CACHE_KEY, cached, settings.JWT_DENYLIST_CACHE_SECONDS)
+    return cached
+
+def is_revoked(token):
+    jtis, users = denylist()
+    if token.get(jwt_settings.JTI_CLAIM) in jtis:
+        return True
+    cutoff = users.get(str(token.get(jwt_settings.USER_ID_CLAIM)))
+    return cutoff is not None and token['iat'] <= cutoff.timestamp()
+
+def revoke_token(token):
+    """Deny a single access or refresh token until it expires"""
+    if token.get(jwt_settings.TOKEN_TYPE_CLAIM) == 'refresh':
+        spend_refresh_token(token)
+        return
+    RevokedToken.objects.create(jti=token[jwt_settings.JTI_CLAIM], expires_at=_expiry(token))
+    _denylist_changed()
+
+def spend_refresh_token(token):
+    """Record a refresh token as used; False if it already was.
+
+    The partial unique index on refresh jtis makes this the check and the
+    write in one statement, so two requests racing with the same token
+    cannot both get a new pair.
+    """
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=token[jwt_settings.JTI_CLAIM], token_type='refresh', expires_at=_expiry(token)
+            )
+    except IntegrityError:
+        return False
+    return True
+
+def revoke_user_tokens(user):
+    """Deny every token issued to ``user`` so far, e.g. after a password reset"""
+    RevokedToken.objects.create(
+        user=user, expires_at=timezone.now() + jwt_settings.REFRESH_TOKEN_LIFETIME
+    )
+    _denylist_changed()
+
+def _denylist_changed():
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    cache.delete(DENYLIST_CACHE_KEY)
+
+def refresh_tokens(raw_refresh):
+    """Exchange a refresh token for a new pair, spending the one presented.
+
+    Raises TokenError when the token is malformed, expired, revoked or
+    already spent, and User.DoesNotExist when its user is gone or inactive.
+    """
+    refresh = RefreshToken(raw_refresh)
+    if is_revoked(refresh):
+        raise TokenError('Token is revoked')
+    user = User.objects.get(pk=refresh[jwt_settings.USER_ID_CLAIM], is_active=True)
+    if not spend_refresh_token(refresh):
+        raise TokenError('Token is revoked')
+    return issue_tokens(user)
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Bearer JWT authentication that skips the user query on reads.
+
+    Safe requests get a ``User`` rebuilt from the access token's claims, so
+    they cost no auth query at all; writes load the real row as usual.
+    Revocation is checked against the cached denylist. Claims are as fresh
+    as the access token, which is why it is short-lived.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if is_revoked(validated_token):
+            raise InvalidToken('Token is revoked')
+
+        if request.method in SAFE_METHODS and all(claim in validated_token for claim in USER_CLAIMS):
+            return self.claims_user(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def claims_user(self, validated_token):
+        user = User(
+            pk=User._meta.pk.to_python(validated_token[jwt_settings.USER_ID_CLAIM]),
+            is_active=True,
+            **{claim: validated_token[claim] for claim in USER_CLAIMS}
+        )
+        # Behaves as a saved row for lookups like filter(user=request.user)
+        user._state.adding = False
+        user._state.db = 'default'
+        user.from_token = True
+        return user
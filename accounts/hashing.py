@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+import asyncio
+import threading
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+class HashingBusy(Exception):
+    """Every hashing slot is taken; the caller should shed the request"""
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash'
+            )
+            _slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_QUEUE)
+        return _executor, _slots
+
+@receiver(setting_changed)
+def reset_pool(setting=None, **kwargs):
+    """Rebuild the pool on the next call when its settings change"""
+    global _executor, _slots
+    if setting in (None, 'PASSWORD_HASH_WORKERS', 'PASSWORD_HASH_QUEUE'):
+        with _lock:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = _slots = None
+
+async def run_hashing(func, *args):
+    """Run a password hashing call on the bounded hashing pool.
+
+    PBKDF2 releases the GIL, so a few threads hash in parallel without
+    blocking the event loop. At most PASSWORD_HASH_QUEUE calls may be
+    running or waiting at once; past that HashingBusy is raised straight
+    away instead of letting a login spike queue up unbounded work.
+    """
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    # The slot is freed when the hash finishes, even if the awaiting request was cancelled
+    future = executor.submit(func, *args)
+    future.add_done_callback(lambda _: slots.release())
+    return await asyncio.wrap_future(future)
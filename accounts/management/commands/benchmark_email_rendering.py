@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+import time
+
+from accounts.models import User
+from accounts.rendering import render_batch, SITE_NAME
+
+class Command(BaseCommand):
+    help = 'Benchmark batched email rendering against per-message render_to_string + strip_tags'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--template', default='registration_welcome')
+
+    def handle(self, *args, **options):
+        # Unsaved users, so the benchmark measures rendering rather than the database
+        users = [
+            User(username=f'traveller{i}', first_name=f'Traveller {i}', email=f'traveller{i}@example.com')
+            for i in range(options['messages'])
+        ]
+        contexts = [
+            {'user': user, 'reset_url': f'http://localhost:9888/reset-password?token={i}'}
+            for i, user in enumerate(users)
+        ]
+        shared = {'base_url': 'http://localhost:9888'}
+        template_name = f"emails/{options['template']}.html"
+
+        def per_message():
+            for context in contexts:
+                html = render_to_string(template_name, {**context, **shared, 'site_name': SITE_NAME})
+                strip_tags(html)
+
+        def batched():
+            render_batch(options['template'], contexts, shared=shared)
+
+        for label, run in (('render_to_string + strip_tags', per_message), ('render_batch', batched)):
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            self.stdout.write(f"{label}: {options['messages'] / best:,.0f} messages/s (best of {options['repeat']})")
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from accounts.reset_tokens import sweep_expired_tokens
+
+class Command(BaseCommand):
+    help = 'Delete expired password reset tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement')
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired_tokens(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired reset tokens'))
@@ -0,0 +1,41 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_existing_tokens(apps, schema_editor):
+    PasswordResetToken = apps.get_model('accounts', 'PasswordResetToken')
+    tokens = list(PasswordResetToken.objects.only('id', 'token_hash'))
+    for token in tokens:
+        # Outstanding links keep working: their raw value now matches by hash
+        token.token_hash = hashlib.sha256(token.token_hash.encode()).hexdigest()
+    PasswordResetToken.objects.bulk_update(tokens, ['token_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_revoked_token'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='passwordresettoken',
+            old_name='token',
+            new_name='token_hash',
+        ),
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='passwordresettoken',
+            name='token_hash',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresettoken',
+            index=models.Index(fields=['user', 'is_used', 'expires_at'], name='reset_token_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresettoken',
+            index=models.Index(fields=['expires_at'], name='reset_token_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_hashed_reset_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='revokedtoken',
+            name='token_type',
+            field=models.CharField(choices=[('access', 'Access'), ('refresh', 'Refresh')], default='access', max_length=10),
+        ),
+        migrations.AddConstraint(
+            model_name='revokedtoken',
+            constraint=models.UniqueConstraint(condition=models.Q(('token_type', 'refresh')), fields=('jti',), name='revoked_refresh_jti_uniq'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import RegexValidator
+from django.utils import timezone
 
 class User(AbstractUser):
     email = models.EmailField(unique=True)
@@ -23,10 +24,73 @@ class User(AbstractUser):
 
 class PasswordResetToken(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    token = models.CharField(max_length=100, unique=True)
+    token_hash = models.CharField(max_length=64, unique=True)  # SHA-256 of the emailed token; the raw token is never stored
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Invalidating a user's outstanding tokens
+            models.Index(fields=['user', 'is_used', 'expires_at'], name='reset_token_user_idx'),
+            # The expiry sweeper
+            models.Index(fields=['expires_at'], name='reset_token_expiry_idx'),
+        ]
+
     def __str__(self):
         return f"Reset token for {self.user.email}"
+
+class OutgoingEmail(models.Model):
+    """Email waiting in the outbox for the send_queued_emails worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            # The worker's "due now" scan
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {self.to} ({self.status})"
+
+class RevokedToken(models.Model):
+    """JWT denylist entry: one token by ``jti``, or every token of ``user`` issued before ``revoked_at``"""
+    TOKEN_TYPES = [
+        ('access', 'Access'),
+        # Spent or logged-out refresh tokens, checked on the refresh endpoint only
+        ('refresh', 'Refresh'),
+    ]
+
+    jti = models.CharField(max_length=64, blank=True, db_index=True)
+    token_type = models.CharField(max_length=10, choices=TOKEN_TYPES, default='access')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    revoked_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)  # Entry can be dropped once the token would have expired anyway
+
+    class Meta:
+        constraints = [
+            # A refresh token can be spent once, however many requests race for it
+            models.UniqueConstraint(
+                fields=['jti'], condition=models.Q(token_type='refresh'), name='revoked_refresh_jti_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Revoked {self.jti or f'all tokens of user {self.user_id}'}"
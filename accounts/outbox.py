@@ -0,0 +1,130 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import logging
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed message is hidden from other workers while it is being sent
+CLAIM_SECONDS = 5 * 60
+
+def enqueue_email(to, subject, body, html_body='', from_email=None):
+    """Store an email in the outbox; the send_queued_emails worker delivers it"""
+    return OutgoingEmail.objects.create(
+        to=to,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+def enqueue_emails(messages):
+    """Store many emails with one insert; ``messages`` are dicts of enqueue_email arguments"""
+    return OutgoingEmail.objects.bulk_create(
+        [
+            OutgoingEmail(
+                to=message['to'],
+                subject=message['subject'],
+                body=message['body'],
+                html_body=message.get('html_body', ''),
+                from_email=message.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+            )
+            for message in messages
+        ],
+        batch_size=500
+    )
+
+def retry_delay(attempts):
+    """Exponential backoff: the base delay doubled for every failed attempt"""
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1))
+
+def claim_due(batch_size):
+    """Lease up to ``batch_size`` due messages so a second worker skips them"""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutgoingEmail.objects.filter(id__in=ids).update(next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS))
+    return list(OutgoingEmail.objects.filter(id__in=ids).order_by('id'))
+
+def _as_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=[email.to],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'failed'
+        logger.error("Giving up on email %s to %s: %s", email.id, email.to, error)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+def deliver_batch(batch_size=None, connection=None):
+    """Send one batch of due messages over a single SMTP connection.
+
+    The connection is opened once and every message goes through
+    ``send_messages`` on it; failures are rescheduled with exponential
+    backoff until ``EMAIL_OUTBOX_MAX_ATTEMPTS``, after which the message is
+    marked failed. Returns (sent, failed) counts for the batch.
+    """
+    emails = claim_due(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # The relay is unreachable; every claimed message waits for its next slot
+        for email in emails:
+            _record_failure(email, e)
+        return 0, len(emails)
+
+    sent_ids = []
+    failed = 0
+    try:
+        for position, email in enumerate(emails):
+            try:
+                if not connection.send_messages([_as_message(email, connection)]):
+                    raise RuntimeError('Email backend did not accept the message')
+                sent_ids.append(email.id)
+                continue
+            except Exception as e:
+                failed += 1
+                _record_failure(email, e)
+
+            # A dropped connection would fail the rest of the batch too
+            try:
+                connection.close()
+                connection.open()
+            except Exception as e:
+                for waiting in emails[position + 1:]:
+                    failed += 1
+                    _record_failure(waiting, e)
+                break
+    finally:
+        connection.close()
+
+    OutgoingEmail.objects.filter(id__in=sent_ids).update(
+        status='sent', sent_at=timezone.now(), attempts=F('attempts') + 1, last_error=''
+    )
+    return len(sent_ids), failed
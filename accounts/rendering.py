@@ -0,0 +1,51 @@
+from functools import lru_cache
+from django.dispatch import receiver
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.autoreload import file_changed
+from django.utils.html import strip_tags
+
+SITE_NAME = 'Torrey Travels'
+
+@lru_cache(maxsize=None)
+def email_templates(name):
+    """Compiled (html, text) templates for ``emails/<name>``.
+
+    Both variants are compiled once per process and reused for every message.
+    The text variant comes from ``emails/<name>.txt``; when a template has no
+    text twin it is None and the plain part falls back to stripping the HTML.
+    """
+    html = get_template(f'emails/{name}.html')
+    try:
+        text = get_template(f'emails/{name}.txt')
+    except TemplateDoesNotExist:
+        text = None
+    return html, text
+
+@receiver(file_changed)
+def reset_email_templates(sender, file_path, **kwargs):
+    """Recompile after a template edit under runserver, like Django's own cached loader"""
+    if file_path.suffix in ('.html', '.txt'):
+        email_templates.cache_clear()
+
+def render_batch(name, contexts, shared=None):
+    """Render one email template for many recipients in a single pass.
+
+    ``shared`` holds context common to every message (site name, base URL)
+    and is merged under each recipient's own context. Returns a list of
+    (plain_text, html) pairs in the order of ``contexts``.
+    """
+    html_template, text_template = email_templates(name)
+    base = {'site_name': SITE_NAME, **(shared or {})}
+
+    rendered = []
+    for context in contexts:
+        context = {**base, **context}
+        html = html_template.render(context)
+        text = text_template.render(context).strip() if text_template else strip_tags(html)
+        rendered.append((text, html))
+    return rendered
+
+def render_email(name, context):
+    """(plain_text, html) for a single message"""
+    return render_batch(name, [context])[0]
@@ -0,0 +1,55 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+import hashlib
+import secrets
+
+from .models import PasswordResetToken
+
+RESET_TOKEN_LIFETIME = timedelta(hours=24)
+
+def hash_token(raw_token):
+    """Lookup key for a raw reset token; tokens are random, so a fast hash is enough"""
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+def issue_reset_token(user, lifetime=RESET_TOKEN_LIFETIME):
+    """Create a reset token for ``user`` and return the raw value to email.
+
+    Any token the user still had outstanding is invalidated in the same
+    transaction with a single update, so only the newest link works.
+    """
+    raw_token = secrets.token_urlsafe(32)
+    now = timezone.now()
+    with transaction.atomic():
+        PasswordResetToken.objects.filter(user=user, is_used=False, expires_at__gt=now).update(is_used=True)
+        PasswordResetToken.objects.create(
+            user=user, token_hash=hash_token(raw_token), expires_at=now + lifetime
+        )
+    return raw_token
+
+def find_valid_token(raw_token):
+    """The unused, unexpired token matching ``raw_token``, or None"""
+    return PasswordResetToken.objects.select_related('user').filter(
+        token_hash=hash_token(raw_token), is_used=False, expires_at__gt=timezone.now()
+    ).first()
+
+def consume_token(reset_token):
+    """Mark a token used; False when a concurrent request already used it"""
+    return bool(PasswordResetToken.objects.filter(pk=reset_token.pk, is_used=False).update(is_used=True))
+
+def sweep_expired_tokens(batch_size=1000):
+    """Delete expired tokens in chunks of ``batch_size``; returns the number deleted.
+
+    Each chunk is its own short delete by primary key, so the sweep never
+    holds a long lock on the table while requests are issuing tokens.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            PasswordResetToken.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            deleted += PasswordResetToken.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            return deleted
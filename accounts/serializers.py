@@ -2,9 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from .models import User, PasswordResetToken
-import uuid
-from datetime import datetime, timedelta
+from .models import User
+from .reset_tokens import find_valid_token
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -68,14 +67,9 @@ class PasswordResetSerializer(serializers.Serializer):
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError("Passwords don't match")
         
-        try:
-            reset_token = PasswordResetToken.objects.get(
-                token=attrs['token'],
-                is_used=False,
-                expires_at__gt=datetime.now()
-            )
-            attrs['reset_token'] = reset_token
-        except PasswordResetToken.DoesNotExist:
+        reset_token = find_valid_token(attrs['token'])
+        if reset_token is None:
             raise serializers.ValidationError("Invalid or expired token")
+        attrs['reset_token'] = reset_token
         
         return attrs
\ No newline at end of file
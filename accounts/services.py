@@ -1,10 +1,10 @@
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.conf import settings
 import logging
 import sys
 
+from .outbox import enqueue_email, enqueue_emails
+from .rendering import render_batch, render_email
+
 logger = logging.getLogger(__name__)
 
 class EmailService:
@@ -35,29 +35,24 @@ class EmailService:
     
     @staticmethod
     def send_registration_email(user, request=None):
-        """Send welcome email after registration"""
+        """Queue the welcome email sent after registration"""
         try:
             if not hasattr(settings, 'EMAIL_HOST') or not settings.EMAIL_HOST:
                 return True
             
             base_url = EmailService.get_base_url(request)
             
-            context = {
+            plain_message, html_message = render_email('registration_welcome', {
                 'user': user,
                 'base_url': base_url,
-                'site_name': 'Torrey Travels'
-            }
-            
-            html_message = render_to_string('emails/registration_welcome.html', context)
-            plain_message = strip_tags(html_message)
+            })
             
-            send_mail(
+            # Delivered by the send_queued_emails worker, so the request never waits on SMTP
+            enqueue_email(
+                to=user.email,
                 subject='Welcome to Torrey Travels!',
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                html_message=html_message,
-                fail_silently=False,
+                body=plain_message,
+                html_body=html_message,
             )
             
             return True
@@ -67,7 +62,7 @@ class EmailService:
     
     @staticmethod
     def send_password_reset_email(user, reset_token, request=None):
-        """Send password reset email"""
+        """Queue the password reset email"""
         try:
             if not hasattr(settings, 'EMAIL_HOST') or not settings.EMAIL_HOST:
                 return True
@@ -75,26 +70,43 @@ class EmailService:
             base_url = EmailService.get_base_url(request)
             reset_url = f"{base_url}/reset-password?token={reset_token}"
             
-            context = {
+            plain_message, html_message = render_email('password_reset', {
                 'user': user,
                 'reset_url': reset_url,
                 'base_url': base_url,
-                'site_name': 'Torrey Travels'
-            }
+            })
             
-            html_message = render_to_string('emails/password_reset.html', context)
-            plain_message = strip_tags(html_message)
-            
-            send_mail(
+            # Delivered by the send_queued_emails worker, so the request never waits on SMTP
+            enqueue_email(
+                to=user.email,
                 subject='Reset Your Password - Torrey Travels',
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                html_message=html_message,
-                fail_silently=False,
+                body=plain_message,
+                html_body=html_message,
             )
             
             return True
             
         except Exception as e:
-            return False
\ No newline at end of file
+            return False
+    
+    @staticmethod
+    def send_template_batch(template, subject, recipients, request=None):
+        """Queue one template for many recipients, e.g. a burst of booking notices.
+
+        ``recipients`` is a list of (email, context) pairs. Every message is
+        rendered from the same compiled templates and the outbox rows are
+        written with a single insert. Returns the number of messages queued.
+        """
+        if not hasattr(settings, 'EMAIL_HOST') or not settings.EMAIL_HOST:
+            return 0
+        
+        rendered = render_batch(
+            template,
+            [context for _, context in recipients],
+            shared={'base_url': EmailService.get_base_url(request)}
+        )
+        queued = enqueue_emails([
+            {'to': email, 'subject': subject, 'body': plain_message, 'html_body': html_message}
+            for (email, _), (plain_message, html_message) in zip(recipients, rendered)
+        ])
+        return len(queued)
@@ -1,12 +1,25 @@
 from django.test import TestCase
+import asyncio
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.urls import resolve, reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from django.utils import timezone
 from datetime import timedelta
-from .models import PasswordResetToken
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.test import override_settings
+from .models import PasswordResetToken, OutgoingEmail, RevokedToken
+from .outbox import enqueue_email, deliver_batch
+from .reset_tokens import hash_token, issue_reset_token, sweep_expired_tokens
+from .rendering import email_templates, render_batch
+from .services import EmailService
+from django.core.cache import cache
+from .hashing import run_hashing
+from . import async_views
+from .authentication import DENYLIST_CACHE_KEY, denylist
+from travel_api import settings_asgi
 
 User = get_user_model()
 
@@ -83,6 +96,14 @@ class AuthenticationAPITest(APITestCase):
         response = self.client.post(self.logout_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_session_logout_deletes_token(self):
+        user = User.objects.create_user(**self.user_data)
+        Token.objects.create(user=user)
+        self.client.login(email='test@example.com', password='testpass123')
+        response = self.client.post(self.logout_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Token.objects.filter(user=user).exists())
+
 class PasswordResetTest(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -103,7 +124,7 @@ class PasswordResetTest(APITestCase):
         # Create reset token
         token = PasswordResetToken.objects.create(
             user=self.user,
-            token='test-token-123',
+            token_hash=hash_token('test-token-123'),
             expires_at=timezone.now() + timedelta(hours=24)
         )
         
@@ -119,11 +140,39 @@ class PasswordResetTest(APITestCase):
         self.user.refresh_from_db()
         self.assertTrue(self.user.check_password('newpass123'))
 
+    def test_tokens_are_stored_hashed_and_superseded(self):
+        first = issue_reset_token(self.user)
+        second = issue_reset_token(self.user)
+        self.assertFalse(PasswordResetToken.objects.filter(token_hash=first).exists())
+
+        response = self.client.post(reverse('password_reset_validate'), {'token': first})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('password_reset_validate'), {'token': second})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = {'token': second, 'password': 'newpass123', 'password_confirm': 'newpass123'}
+        self.assertEqual(self.client.post(self.reset_confirm_url, data).status_code, status.HTTP_200_OK)
+        # Single use
+        self.assertEqual(self.client.post(self.reset_confirm_url, data).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sweeper_deletes_expired_tokens_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            PasswordResetToken.objects.create(
+                user=self.user, token_hash=hash_token(f'old-{i}'), expires_at=now - timedelta(hours=1)
+            )
+        issue_reset_token(self.user)
+
+        # Five rows in batches of two: three selects and three deletes
+        with self.assertNumQueries(6):
+            self.assertEqual(sweep_expired_tokens(batch_size=2), 5)
+        self.assertEqual(PasswordResetToken.objects.count(), 1)
+
     def test_expired_token(self):
         # Create expired token
         token = PasswordResetToken.objects.create(
             user=self.user,
-            token='expired-token',
+            token_hash=hash_token('expired-token'),
             expires_at=timezone.now() - timedelta(hours=1)
         )
         
@@ -133,4 +182,251 @@ class PasswordResetTest(APITestCase):
             'password_confirm': 'newpass123'
         }
         response = self.client.post(self.reset_confirm_url, data)
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class CountingBackend(LocmemBackend):
+    """Locmem backend that counts connections and rejects chosen recipients"""
+    opened = 0
+    rejected = set()
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if any(address in self.rejected for message in messages for address in message.to):
+            raise ConnectionError('Recipient refused')
+        return super().send_messages(messages)
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_RETRY_SECONDS=60)
+class EmailOutboxTest(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+        CountingBackend.rejected = set()
+
+    def test_registration_only_enqueues(self):
+        response = self.client.post(reverse('register'), {
+            'username': 'queued',
+            'email': 'queued@example.com',
+            'password': 'newpass123',
+            'password_confirm': 'newpass123',
+            'first_name': 'Queued',
+            'last_name': 'User'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutgoingEmail.objects.get(to='queued@example.com')
+        self.assertEqual(queued.status, 'pending')
+        self.assertIn('Queued', queued.html_body)
+
+    def test_batch_reuses_one_connection(self):
+        for i in range(5):
+            enqueue_email(f'user{i}@example.com', 'Hello', 'Body', '<p>Body</p>')
+
+        self.assertEqual(deliver_batch(connection=CountingBackend()), (5, 0))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(OutgoingEmail.objects.exclude(status='sent').exists())
+        # Nothing left to send
+        self.assertEqual(deliver_batch(connection=CountingBackend()), (0, 0))
+
+    def test_failures_back_off_then_give_up(self):
+        CountingBackend.rejected = {'bounce@example.com'}
+        enqueue_email('bounce@example.com', 'Hello', 'Body')
+        enqueue_email('ok@example.com', 'Hello', 'Body')
+
+        before = timezone.now()
+        self.assertEqual(deliver_batch(connection=CountingBackend()), (1, 1))
+        bounced = OutgoingEmail.objects.get(to='bounce@example.com')
+        self.assertEqual((bounced.status, bounced.attempts), ('pending', 1))
+        self.assertGreaterEqual(bounced.next_attempt_at, before + timedelta(seconds=60))
+        self.assertEqual(OutgoingEmail.objects.get(to='ok@example.com').status, 'sent')
+
+        # Not due yet, so the worker leaves it alone
+        self.assertEqual(deliver_batch(connection=CountingBackend()), (0, 0))
+
+        for attempt in (2, 3):
+            OutgoingEmail.objects.filter(id=bounced.id).update(next_attempt_at=timezone.now())
+            deliver_batch(connection=CountingBackend())
+            bounced.refresh_from_db()
+            self.assertEqual(bounced.attempts, attempt)
+        self.assertEqual(bounced.status, 'failed')
+        self.assertIn('Recipient refused', bounced.last_error)
+
+
+class EmailRenderingTest(TestCase):
+    def test_batch_renders_text_and_html_from_compiled_templates(self):
+        users = [User(username=f'u{i}', first_name=f'Name{i}', email=f'u{i}@example.com') for i in range(3)]
+        email_templates.cache_clear()
+        rendered = render_batch('registration_welcome', [{'user': user} for user in users],
+                                shared={'base_url': 'https://example.com'})
+        rendered += render_batch('registration_welcome', [{'user': users[0]}])
+
+        self.assertEqual(email_templates.cache_info().misses, 1)
+        text, html = rendered[1]
+        self.assertTrue(text.startswith('Welcome, Name1!'))
+        self.assertIn('https://example.com/login', text)
+        self.assertNotIn('<', text)
+        self.assertIn('<a href="https://example.com/login"', html)
+
+    def test_template_batch_is_queued_with_one_insert(self):
+        recipients = [
+            (f'u{i}@example.com', {'user': User(username=f'u{i}', email=f'u{i}@example.com')})
+            for i in range(20)
+        ]
+        with self.assertNumQueries(1):
+            queued = EmailService.send_template_batch('registration_welcome', 'Welcome', recipients)
+        self.assertEqual(queued, 20)
+        self.assertEqual(OutgoingEmail.objects.filter(status='pending', subject='Welcome').count(), 20)
+
+
+class JWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='jwtuser',
+            email='jwt@example.com',
+            password='testpass123',
+            first_name='Jay'
+        )
+
+    def login(self):
+        response = self.client.post(reverse('login'), {
+            'email': 'jwt@example.com', 'password': 'testpass123', 'token_type': 'jwt'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('token', response.data)
+        return response.data['access'], response.data['refresh']
+
+    def test_token_login_is_unchanged_by_default(self):
+        response = self.client.post(reverse('login'), {'email': 'jwt@example.com', 'password': 'testpass123'})
+        self.assertIn('token', response.data)
+        self.assertNotIn('access', response.data)
+
+    def test_reads_need_no_auth_query(self):
+        access, _ = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + access)
+        # Warm the denylist cache
+        self.client.get('/api/flights/bookings/')
+
+        # Only the page count; an empty page skips the list query
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/flights/bookings/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The profile reads its own row, but nothing else
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.data['email'], 'jwt@example.com')
+
+    def test_logout_revokes_access_and_refresh(self):
+        access, refresh = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + access)
+        response = self.client.post(reverse('logout'), {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_the_refresh_token(self):
+        _, refresh = self.login()
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + response.data['access'])
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_200_OK)
+
+        # The old refresh token is spent
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_leaves_the_denylist_alone(self):
+        _, refresh = self.login()
+        denylist()
+        self.client.post(reverse('token_refresh'), {'refresh': refresh})
+
+        # Spent refresh tokens are checked on the refresh endpoint, not cached for every request
+        self.assertIsNotNone(cache.get(DENYLIST_CACHE_KEY))
+        self.assertEqual(denylist(), (set(), {}))
+        self.assertEqual(RevokedToken.objects.filter(token_type='refresh').count(), 1)
+
+    def test_password_reset_revokes_existing_tokens(self):
+        access, _ = self.login()
+        PasswordResetToken.objects.create(
+            user=self.user, token_hash=hash_token('reset-token'), expires_at=timezone.now() + timedelta(hours=1)
+        )
+        self.client.post(reverse('password_reset_confirm'), {
+            'token': 'reset-token', 'password': 'newpass123', 'password_confirm': 'newpass123'
+        })
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + access)
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(ROOT_URLCONF='travel_api.asgi_urls', PASSWORD_HASH_ITERATIONS=1000)
+class AsyncAuthTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='asyncuser',
+            email='async@example.com',
+            password='testpass123'
+        )
+
+    async def test_login_and_register(self):
+        response = await self.async_client.post(
+            '/api/auth/login/', {'email': 'async@example.com', 'password': 'testpass123'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['user']['email'], 'async@example.com')
+        self.assertTrue(await Token.objects.filter(user_id=self.user.id, key=response.json()['token']).aexists())
+
+        response = await self.async_client.post(
+            '/api/auth/login/', {'email': 'async@example.com', 'password': 'wrong'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = await self.async_client.post('/api/auth/register/', {
+            'username': 'newasync',
+            'email': 'newasync@example.com',
+            'password': 'newpass123',
+            'password_confirm': 'newpass123',
+            'token_type': 'jwt',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('access', response.json())
+        created = await User.objects.aget(email='newasync@example.com')
+        self.assertTrue(created.check_password('newpass123'))
+
+    async def test_login_upgrades_hash_to_configured_cost(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = await self.async_client.post(
+                '/api/auth/login/', {'email': 'async@example.com', 'password': 'testpass123'},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    @override_settings(PASSWORD_HASH_QUEUE=1)
+    async def test_full_pool_sheds_load(self):
+        from threading import Event
+        release = Event()
+        # Occupy the only slot with a hash that waits for the test
+        blocked = asyncio.ensure_future(run_hashing(release.wait))
+        await asyncio.sleep(0)
+        response = await self.async_client.post(
+            '/api/auth/login/', {'email': 'async@example.com', 'password': 'testpass123'},
+            content_type='application/json'
+        )
+        release.set()
+        await blocked
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_asgi_settings_serve_async_views(self):
+        self.assertEqual(resolve('/api/auth/login/', settings_asgi.ROOT_URLCONF).func, async_views.login_view)
+        self.assertEqual(resolve('/api/auth/register/', settings_asgi.ROOT_URLCONF).func, async_views.register_view)
@@ -5,6 +5,7 @@ urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
+    path('token/refresh/', views.token_refresh, name='token_refresh'),
     path('profile/', views.ProfileView.as_view(), name='profile'),
     path('password-reset/', views.password_reset_request, name='password_reset_request'),
     path('password-reset/validate/', views.password_reset_validate, name='password_reset_validate'),
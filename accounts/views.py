@@ -1,17 +1,15 @@
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import login
-from django.utils import timezone
+from django.core.exceptions import ObjectDoesNotExist
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from datetime import timedelta
-import uuid
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from .models import User, PasswordResetToken
+from .models import User
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
@@ -20,6 +18,22 @@ from .serializers import (
     PasswordResetSerializer
 )
 from .services import EmailService
+from .reset_tokens import issue_reset_token, find_valid_token, consume_token
+from .authentication import issue_tokens, refresh_tokens, revoke_token, revoke_user_tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, UntypedToken
+from travel_api.throttling import AUTH_THROTTLES
+
+def wants_jwt(request):
+    """Clients opt into JWTs with token_type=jwt in the body or query string"""
+    return (request.data.get('token_type') or request.query_params.get('token_type')) == 'jwt'
+
+def auth_payload(user, use_jwt=False):
+    """Credentials for a freshly authenticated user: a JWT pair or a DRF token"""
+    if use_jwt:
+        return issue_tokens(user)
+    token, created = Token.objects.get_or_create(user=user)
+    return {'token': token.key}
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -34,14 +48,13 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        token, created = Token.objects.get_or_create(user=user)
         
         # Send welcome email
         EmailService.send_registration_email(user, request)
         
         return Response({
             'user': UserProfileSerializer(user).data,
-            'token': token.key,
+            **auth_payload(user, wants_jwt(request)),
             'message': 'Registration successful'
         }, status=status.HTTP_201_CREATED)
 
@@ -52,16 +65,16 @@ class RegisterView(generics.CreateAPIView):
 )
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes(AUTH_THROTTLES)
 @csrf_exempt
 def login_view(request):
     serializer = UserLoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
         
         return Response({
             'user': UserProfileSerializer(user).data,
-            'token': token.key,
+            **auth_payload(user, wants_jwt(request)),
             'message': 'Login successful'
         })
     
@@ -77,16 +90,47 @@ def login_view(request):
 @api_view(['POST'])
 def logout_view(request):
     try:
-        request.user.auth_token.delete()
+        if isinstance(request.auth, (AccessToken, UntypedToken)):
+            # JWT sessions end by denying the access token and, if sent, its refresh token
+            revoke_token(request.auth)
+            if request.data.get('refresh'):
+                refresh = UntypedToken(request.data['refresh'])
+                if refresh.get('user_id') == str(request.user.id):
+                    revoke_token(refresh)
+        else:
+            request.user.auth_token.delete()
         return Response({'message': 'Logout successful'})
-    except:
+    except (TokenError, ObjectDoesNotExist):
         return Response({'error': 'Error logging out'}, status=status.HTTP_400_BAD_REQUEST)
 
+@swagger_auto_schema(
+    method='post',
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['refresh'],
+        properties={'refresh': openapi.Schema(type=openapi.TYPE_STRING, description='Refresh token')}
+    ),
+    responses={200: 'New access and refresh tokens', 401: 'Invalid or revoked refresh token'}
+)
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def token_refresh(request):
+    refresh = request.data.get('refresh')
+    if not refresh:
+        return Response({'error': 'Refresh token is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return Response(refresh_tokens(refresh))
+    except (TokenError, User.DoesNotExist):
+        return Response({'error': 'Invalid or expired refresh token.'}, status=status.HTTP_401_UNAUTHORIZED)
+
 class ProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
+        if getattr(self.request.user, 'from_token', False):
+            # JWT reads carry only the claims; the profile needs the full row
+            return User.objects.get(pk=self.request.user.pk)
         return self.request.user
 
 @swagger_auto_schema(
@@ -96,6 +140,7 @@ class ProfileView(generics.RetrieveUpdateAPIView):
 )
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes(AUTH_THROTTLES)
 @csrf_exempt
 def password_reset_request(request):
     try:
@@ -111,15 +156,8 @@ def password_reset_request(request):
                     'message': 'If an account with this email exists, password reset instructions have been sent.'
                 }, status=status.HTTP_200_OK)
             
-            # Create reset token
-            token = str(uuid.uuid4())
-            expires_at = timezone.now() + timedelta(hours=24)
-            
-            reset_token_obj = PasswordResetToken.objects.create(
-                user=user,
-                token=token,
-                expires_at=expires_at
-            )
+            # Create reset token, invalidating any the user requested earlier
+            token = issue_reset_token(user)
             
             # Send password reset email
             email_sent = EmailService.send_password_reset_email(user, token, request)
@@ -158,23 +196,17 @@ def password_reset_validate(request):
                 'success': False
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            reset_token = PasswordResetToken.objects.get(
-                token=token,
-                is_used=False,
-                expires_at__gt=timezone.now()
-            )
-            return Response({
-                'message': 'Token is valid.',
-                'success': True
-            }, status=status.HTTP_200_OK)
-        
-        except PasswordResetToken.DoesNotExist:
+        if find_valid_token(token) is None:
             return Response({
                 'error': 'Invalid or expired reset token.',
                 'success': False
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        return Response({
+            'message': 'Token is valid.',
+            'success': True
+        }, status=status.HTTP_200_OK)
+        
     except Exception as e:
         print(f"Token validation error: {str(e)}")
         return Response({
@@ -216,13 +248,9 @@ def password_reset_confirm(request):
                 'success': False
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            reset_token = PasswordResetToken.objects.get(
-                token=token,
-                is_used=False,
-                expires_at__gt=timezone.now()
-            )
-        except PasswordResetToken.DoesNotExist:
+        reset_token = find_valid_token(token)
+        # Claiming the token first means two concurrent submissions cannot both reset
+        if reset_token is None or not consume_token(reset_token):
             return Response({
                 'error': 'Invalid or expired reset token.',
                 'success': False
@@ -233,9 +261,8 @@ def password_reset_confirm(request):
         user.set_password(password)
         user.save()
         
-        # Mark token as used
-        reset_token.is_used = True
-        reset_token.save()
+        # Sign out every JWT issued with the old password
+        revoke_user_tokens(user)
         
         return Response({
             'message': 'Password reset successful.',
@@ -0,0 +1,67 @@
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from travel_api.cache_versions import get_versions, bump_versions
+from .models import Flight
+
+# Flights that can still be sold
+BOOKABLE_STATUSES = ['scheduled', 'delayed']
+
+def route_version_key(departure_airport_id, arrival_airport_id):
+    return f'fares_route_version:{departure_airport_id}:{arrival_airport_id}'
+
+def bump_route_versions(routes):
+    """Drop memoized fares for every (departure_airport_id, arrival_airport_id) route given"""
+    bump_versions([route_version_key(departure, arrival) for departure, arrival in set(routes)])
+
+def load_fares(legs):
+    """Economy fares per (departure_airport_id, arrival_airport_id, date) leg.
+
+    Each leg maps to [(price, seats_left, flight_id), ...] sorted cheapest
+    first. Legs are memoized in the cache under their route's version, and
+    every leg missing from the cache is fetched in a single query.
+    """
+    legs = list(set(legs))
+    if not legs:
+        return {}
+
+    versions = get_versions([route_version_key(dep, arr) for dep, arr, _ in legs])
+    keys = {
+        (dep, arr, day): f'fares:{dep}:{arr}:{day.isoformat()}:{versions[route_version_key(dep, arr)]}'
+        for dep, arr, day in legs
+    }
+    cached = cache.get_many(keys.values())
+    fares = {leg: cached[keys[leg]] for leg in legs if keys[leg] in cached}
+
+    missing = [leg for leg in legs if leg not in fares]
+    if missing:
+        query = Q()
+        for dep, arr, day in missing:
+            query |= Q(departure_airport_id=dep, arrival_airport_id=arr, departure_time__date=day)
+
+        found = defaultdict(list)
+        flights = Flight.objects.filter(query, status__in=BOOKABLE_STATUSES).values_list(
+            'id', 'departure_airport_id', 'arrival_airport_id', 'departure_time',
+            'economy_price', 'available_economy_seats'
+        )
+        for flight_id, dep, arr, departure_time, price, seats in flights:
+            day = timezone.localtime(departure_time).date()
+            found[(dep, arr, day)].append((price, seats, flight_id))
+
+        fresh = {}
+        for leg in missing:
+            fares[leg] = sorted(found.get(leg, []))
+            fresh[keys[leg]] = fares[leg]
+        cache.set_many(fresh, getattr(settings, 'BUNDLE_PRICE_CACHE_SECONDS', 15 * 60))
+
+    return fares
+
+def cheapest_fare(fares, passengers):
+    """First fare in a sorted leg with seats for the whole party, or None"""
+    for fare in fares:
+        if fare[1] >= passengers:
+            return fare
+    return None
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:44
+
+import thumbnails.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='airline',
+            name='logo',
+            field=thumbnails.fields.ContentAddressedImageField(blank=True, null=True, upload_to='airlines/'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_departure_times(apps, schema_editor):
+    Flight = apps.get_model('flights', 'Flight')
+    FlightBooking = apps.get_model('flights', 'FlightBooking')
+    FlightBooking.objects.update(departure_time=Subquery(
+        Flight.objects.filter(pk=OuterRef('flight_id')).values('departure_time')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0002_content_addressed_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flightbooking',
+            name='departure_time',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_departure_times, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='flightbooking',
+            name='departure_time',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='flightbooking',
+            index=models.Index(fields=['user', 'departure_time', 'id'], name='flight_booking_trips_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from thumbnails.fields import ContentAddressedImageField
 
 User = get_user_model()
 
@@ -18,7 +19,7 @@ class Airport(models.Model):
 class Airline(models.Model):
     code = models.CharField(max_length=3, unique=True)  # IATA code
     name = models.CharField(max_length=100)
-    logo = models.ImageField(upload_to='airlines/', null=True, blank=True)
+    logo = ContentAddressedImageField(upload_to='airlines/', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -58,6 +59,14 @@ class Flight(models.Model):
     class Meta:
         unique_together = ['flight_number', 'airline', 'departure_time']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets a save tell whether the departure moved, so bookings are only synced then (see signals)
+        if 'departure_time' in field_names:
+            instance._loaded_departure_time = instance.departure_time
+        return instance
+
     def __str__(self):
         return f"{self.airline.code}{self.flight_number} - {self.departure_airport.code} to {self.arrival_airport.code}"
 
@@ -82,9 +91,23 @@ class FlightBooking(models.Model):
     travel_class = models.CharField(max_length=10, choices=CLASS_CHOICES, default='economy')
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=BOOKING_STATUS, default='pending')
+    # Copy of flight.departure_time so "My trips" can order on an index; kept in step by save() and signals
+    departure_time = models.DateTimeField(editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # "My trips" timeline: a user's flights in departure order
+            models.Index(fields=['user', 'departure_time', 'id'], name='flight_booking_trips_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'departure_time' in update_fields:
+            self.departure_time = self.flight.departure_time
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Booking {self.booking_reference} - {self.user.email}"
 
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Airport, Airline, Flight, FlightBooking, Passenger
+from thumbnails.serializers import ThumbnailField
 import uuid
 
 class AirportSerializer(serializers.ModelSerializer):
@@ -8,6 +9,8 @@ class AirportSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class AirlineSerializer(serializers.ModelSerializer):
+    logo_thumbnails = ThumbnailField(source='logo')
+
     class Meta:
         model = Airline
         fields = '__all__'
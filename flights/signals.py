@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from travel_api.catalog_cache import bump_catalog_versions
+
+from .models import Airline, Flight, FlightBooking
+from .fares import bump_route_versions
+
+@receiver([post_save, post_delete], sender=Flight)
+def invalidate_route_fares(sender, instance, **kwargs):
+    bump_route_versions([(instance.departure_airport_id, instance.arrival_airport_id)])
+
+@receiver(post_save, sender=Flight)
+def sync_booking_departure_times(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields is not None and 'departure_time' not in update_fields):
+        return
+    if getattr(instance, '_loaded_departure_time', None) == instance.departure_time:
+        return
+    FlightBooking.objects.filter(flight=instance).exclude(
+        departure_time=instance.departure_time
+    ).update(departure_time=instance.departure_time)
+    instance._loaded_departure_time = instance.departure_time
+
+@receiver([post_save, post_delete], sender=Airline)
+def invalidate_airline_catalog(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_catalog_versions([Airline]))
@@ -6,6 +6,12 @@ from rest_framework import status
 from rest_framework.authtoken.models import Token
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from unittest.mock import patch
+from travel_api.throttling import SlidingWindowThrottle, SearchRateThrottle
 from .models import Airport, Airline, Flight, FlightBooking
 
 User = get_user_model()
@@ -163,4 +169,93 @@ class FlightAPITest(APITestCase):
             'travel_class': 'economy'
         }
         response = self.client.post(url, booking_data)
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+THROTTLED_REST_FRAMEWORK = {
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'ip': '100/min', 'user': '100/min', 'search': '3/min', 'auth': '3/min'},
+}
+
+@override_settings(REST_FRAMEWORK=THROTTLED_REST_FRAMEWORK)
+class SearchThrottleTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('flights:airport_list')
+        self.clock = patch.object(SlidingWindowThrottle, 'timer', return_value=600.0)
+        self.clock.start()
+        self.addCleanup(self.clock.stop)
+
+    def test_search_is_limited_with_headers(self):
+        for remaining in (2, 1, 0):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['X-RateLimit-Limit'], '3')
+            self.assertEqual(response['X-RateLimit-Remaining'], str(remaining))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['X-RateLimit-Remaining'], '0')
+        # The window ends in 60s and three requests must decay below the limit of three
+        self.assertEqual(response['Retry-After'], '60')
+
+        # Signed-in users have their own budget
+        user = User.objects.create_user(username='searcher', email='searcher@example.com', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_calendars_share_the_search_budget(self):
+        for _ in range(3):
+            self.client.get(reverse('hotels:hotel_calendar', kwargs={'pk': 1}))
+        response = self.client.get(reverse('packages:package_departure_calendar', kwargs={'pk': 1}))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_spoofed_forwarded_for_does_not_reset_the_budget(self):
+        for i in range(3):
+            self.client.get(self.url, HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+        response = self.client.get(self.url, HTTP_X_FORWARDED_FOR='198.51.100.7')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK={**THROTTLED_REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_trusted_proxy_forwards_client_address(self):
+        for _ in range(3):
+            self.client.get(self.url, HTTP_X_FORWARDED_FOR='203.0.113.1')
+        response = self.client.get(self.url, HTTP_X_FORWARDED_FOR='spoofed, 198.51.100.7')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_previous_window_decays(self):
+        for _ in range(3):
+            self.client.get(self.url)
+        # Halfway through the next window the previous three weigh 1.5, leaving room for two
+        SlidingWindowThrottle.timer.return_value = 690.0
+        for _ in range(2):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_constant_cache_operations(self):
+        throttle = SearchRateThrottle()
+        request = APIRequestFactory().get(self.url)
+        request.user = None
+        calls = []
+        for name in ('get_many', 'add', 'incr'):
+            original = getattr(throttle.cache, name)
+            setattr(throttle.cache, name, lambda *a, _f=original, _n=name, **k: calls.append(_n) or _f(*a, **k))
+        throttle.allow_request(request, None)
+        throttle.allow_request(request, None)
+        self.assertEqual(calls, ['get_many', 'add', 'get_many', 'add', 'incr'])
+
+class AirlineCatalogCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.airline = Airline.objects.create(code='AA', name='American Airlines')
+
+    def test_airline_list_is_cached_until_a_save(self):
+        url = reverse('flights:airline_list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airline.objects.create(code='BA', name='British Airways')
+        response = self.client.get(url)
+        self.assertEqual([airline['code'] for airline in response.data['results']], ['AA', 'BA'])
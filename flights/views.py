@@ -1,13 +1,18 @@
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, F
 from datetime import datetime
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 import uuid
 
+from management.idempotency import idempotent, retryable_error
+from travel_api.catalog_cache import CachedCatalogMixin
+from travel_api.throttling import SEARCH_THROTTLES
 from .models import Airport, Airline, Flight, FlightBooking
+from .fares import bump_route_versions
 from .serializers import (
     AirportSerializer, 
     AirlineSerializer, 
@@ -17,6 +22,18 @@ from .serializers import (
     FlightBookingListSerializer
 )
 
+# Availability column and label per travel class
+SEAT_FIELDS = {
+    'economy': 'available_economy_seats',
+    'business': 'available_business_seats',
+    'first': 'available_first_class_seats',
+}
+SEAT_LABELS = {
+    'economy': 'economy',
+    'business': 'business',
+    'first': 'first class',
+}
+
 # Sample airports data
 SAMPLE_AIRPORTS = [
     {'code': 'LAX', 'name': 'Los Angeles International Airport', 'city': 'Los Angeles', 'country': 'USA'},
@@ -36,6 +53,7 @@ SAMPLE_AIRPORTS = [
 class AirportListView(generics.ListAPIView):
     serializer_class = AirportSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = SEARCH_THROTTLES
 
     def get(self, request, *args, **kwargs):
         search = request.query_params.get('search', '')
@@ -64,10 +82,11 @@ class AirportListView(generics.ListAPIView):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
-class AirlineListView(generics.ListAPIView):
-    queryset = Airline.objects.all()
+class AirlineListView(CachedCatalogMixin, generics.ListAPIView):
+    queryset = Airline.objects.order_by('code')
     serializer_class = AirlineSerializer
     permission_classes = [permissions.AllowAny]
+    cache_models = [Airline]
 
 @swagger_auto_schema(
     method='get',
@@ -83,6 +102,7 @@ class AirlineListView(generics.ListAPIView):
 )
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes(SEARCH_THROTTLES)
 def search_flights(request):
     serializer = FlightSearchSerializer(data=request.query_params)
     if serializer.is_valid():
@@ -162,37 +182,33 @@ class FlightBookingListCreateView(generics.ListCreateAPIView):
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
     
+    @idempotent('flight_booking')
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Check flight availability
-        flight = Flight.objects.get(id=serializer.validated_data['flight_id'])
+        flight_id = serializer.validated_data['flight_id']
         travel_class = serializer.validated_data['travel_class']
         passenger_count = serializer.validated_data['passenger_count']
+        seats_field = SEAT_FIELDS[travel_class]
         
-        # Check available seats
-        if travel_class == 'economy' and flight.available_economy_seats < passenger_count:
-            return Response({'error': 'Not enough economy seats available'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-        elif travel_class == 'business' and flight.available_business_seats < passenger_count:
-            return Response({'error': 'Not enough business seats available'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-        elif travel_class == 'first' and flight.available_first_class_seats < passenger_count:
-            return Response({'error': 'Not enough first class seats available'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create booking using serializer
-        booking = serializer.save()
-        
-        # Update available seats
-        if travel_class == 'economy':
-            flight.available_economy_seats -= passenger_count
-        elif travel_class == 'business':
-            flight.available_business_seats -= passenger_count
-        else:
-            flight.available_first_class_seats -= passenger_count
-        flight.save()
+        with transaction.atomic():
+            # Take the seats with a conditional decrement so concurrent bookings cannot oversell
+            reserved = Flight.objects.filter(
+                id=flight_id, **{f'{seats_field}__gte': passenger_count}
+            ).update(**{seats_field: F(seats_field) - passenger_count})
+            
+            if not reserved:
+                if not Flight.objects.filter(id=flight_id).exists():
+                    return Response({'error': 'Flight not found'}, status=status.HTTP_404_NOT_FOUND)
+                return retryable_error(f'Not enough {SEAT_LABELS[travel_class]} seats available')
+            
+            # Create booking using serializer
+            booking = serializer.save()
+            
+            # Seats left feed the memoized fares for this route
+            route = (booking.flight.departure_airport_id, booking.flight.arrival_airport_id)
+            transaction.on_commit(lambda: bump_route_versions([route]))
         
         return Response(FlightBookingSerializer(booking).data, status=status.HTTP_201_CREATED)
 
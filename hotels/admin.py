@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Destination, HotelCategory, Hotel
+from .models import Destination, HotelCategory, Hotel, RoomType, RatePlan, LengthOfStayDiscount
 
 @admin.register(Destination)
 class DestinationAdmin(admin.ModelAdmin):
@@ -11,7 +11,7 @@ class DestinationAdmin(admin.ModelAdmin):
     list_editable = ('is_popular',)
     
     fieldsets = (
-        (None, {'fields': ('name', 'country')}),
+        (None, {'fields': ('name', 'country', 'slug')}),
         ('Details', {'fields': ('description', 'image')}),
         ('Status', {'fields': ('is_popular',)}),
         ('Timestamps', {'fields': ('created_at',), 'classes': ('collapse',)}),
@@ -31,6 +31,21 @@ class HotelCategoryAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('created_at',)
 
+class RoomTypeInline(admin.TabularInline):
+    model = RoomType
+    extra = 0
+    fields = ('name', 'max_occupancy', 'bed_configuration', 'price_per_night', 'total_rooms')
+
+class RatePlanInline(admin.TabularInline):
+    model = RatePlan
+    extra = 0
+    fields = ('name', 'start_date', 'end_date', 'price_per_night', 'weekday_multipliers', 'is_active')
+
+class LengthOfStayDiscountInline(admin.TabularInline):
+    model = LengthOfStayDiscount
+    extra = 0
+    fields = ('min_nights', 'discount_percent')
+
 @admin.register(Hotel)
 class HotelAdmin(admin.ModelAdmin):
     list_display = ('name', 'destination', 'star_rating', 'price_per_night', 'is_featured')
@@ -51,6 +66,7 @@ class HotelAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('created_at', 'updated_at')
     filter_horizontal = ('amenities',)
+    inlines = [RoomTypeInline, RatePlanInline, LengthOfStayDiscountInline]
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('destination')
\ No newline at end of file
@@ -0,0 +1,118 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_HALF_UP
+from django.conf import settings
+from django.core.cache import cache
+
+from travel_api.cache_versions import get_version, bump_version
+from .models import HotelBooking, RoomInventory
+from .pricing import CENTS, nightly_rates, scale_rate
+
+def _version_key(hotel_id):
+    return f'hotel_calendar_version:{hotel_id}'
+
+def calendar_version(hotel_id):
+    """Current cache version of a hotel's calendar; month entries are keyed by it"""
+    return get_version(_version_key(hotel_id))
+
+def bump_calendar_version(hotel_id):
+    """Orphan every cached month of a hotel so the next read recomputes it"""
+    bump_version(_version_key(hotel_id))
+
+def _month_start(day):
+    return day.replace(day=1)
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def build_calendar(hotel, start, end):
+    """Price and rooms left for every night in [start, end) as {date: (price, rooms_left)}.
+
+    Nights are priced from the hotel's rate plans. Hotels with room types
+    read one range of ``RoomInventory`` and quote the cheapest type with a
+    room free, scaled by the night's rate like a search would. Other hotels
+    lose the rooms of every active booking overlapping the night, fetched in
+    one range query and applied with a sweep.
+    """
+    nights = (end - start).days
+    days = [start + timedelta(days=i) for i in range(nights)]
+    rates = nightly_rates(hotel, start, end)
+
+    room_types = list(hotel.room_types.only('price_per_night', 'total_rooms'))
+    if room_types:
+        inventory = defaultdict(dict)
+        rows = RoomInventory.objects.filter(
+            room_type__hotel=hotel, date__gte=start, date__lt=end
+        ).values_list('room_type_id', 'date', 'available')
+        for room_type_id, day, available in rows:
+            inventory[room_type_id][day] = available
+
+        calendar = {}
+        for i, day in enumerate(days):
+            rooms_left = 0
+            price = None
+            for room_type in room_types:
+                # Nights without an inventory row still have every room free
+                available = min(inventory[room_type.id].get(day, room_type.total_rooms), room_type.total_rooms)
+                if available > 0:
+                    rooms_left += available
+                    if price is None or room_type.price_per_night < price:
+                        price = room_type.price_per_night
+            if price is not None:
+                price = scale_rate(rates[i], price, hotel.price_per_night).quantize(CENTS, ROUND_HALF_UP)
+            calendar[day] = (price, rooms_left)
+        return calendar
+
+    # +rooms on the first night of each overlapping booking, -rooms after its last
+    delta = [0] * (nights + 1)
+    bookings = HotelBooking.objects.filter(
+        hotel=hotel, check_in_date__lt=end, check_out_date__gt=start
+    ).exclude(status='cancelled').values_list('check_in_date', 'check_out_date', 'rooms')
+    for check_in, check_out, rooms in bookings:
+        delta[max((check_in - start).days, 0)] += rooms
+        delta[min((check_out - start).days, nights)] -= rooms
+
+    calendar = {}
+    booked = 0
+    for i, day in enumerate(days):
+        booked += delta[i]
+        calendar[day] = (rates[i], max(hotel.total_rooms - booked, 0))
+    return calendar
+
+def get_calendar(hotel, start, end):
+    """Nightly calendar for [start, end), served from per-month cache entries.
+
+    Missing months are computed together in a single build and written back
+    with one ``set_many``; bookings and rate changes bump the hotel's
+    version, which orphans the stale months.
+    """
+    version = calendar_version(hotel.id)
+    months = []
+    month = _month_start(start)
+    while month < end:
+        months.append(month)
+        month = _next_month(month)
+
+    keys = {month: f'hotel_calendar:{hotel.id}:{month:%Y-%m}:{version}' for month in months}
+    cached = cache.get_many(keys.values())
+
+    missing = [month for month in months if keys[month] not in cached]
+    if missing:
+        built = build_calendar(hotel, missing[0], _next_month(missing[-1]))
+        fresh = {}
+        for month in missing:
+            following = _next_month(month)
+            entry = {day: value for day, value in built.items() if month <= day < following}
+            cached[keys[month]] = fresh[keys[month]] = entry
+        cache.set_many(fresh, getattr(settings, 'HOTEL_CALENDAR_CACHE_SECONDS', 60 * 60))
+
+    nights = []
+    for month in months:
+        for day, (price, rooms_left) in sorted(cached[keys[month]].items()):
+            if start <= day < end:
+                nights.append({
+                    'date': day,
+                    'price': float(price) if price is not None else None,
+                    'rooms_left': rooms_left,
+                })
+    return nights
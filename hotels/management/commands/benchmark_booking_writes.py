@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.utils import ConnectionHandler
+from pathlib import Path
+import tempfile
+import threading
+import time
+
+from travel_api.db import database_settings
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent booking writes on SQLite with the old and the tuned connection settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--bookings', type=int, default=200, help='Bookings attempted per thread')
+
+    def handle(self, *args, **options):
+        tuned = database_settings()
+        if tuned['ENGINE'] != SQLITE_ENGINE:
+            raise CommandError('This benchmark measures the SQLite settings; unset DB_ENGINE to run it')
+
+        profiles = (
+            # Django's SQLite defaults, which is what the old settings ran with
+            ('default settings', {'ENGINE': SQLITE_ENGINE}),
+            # The DATABASES entry from settings, so init_command and transaction_mode are what gets measured
+            ('tuned settings', tuned),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for label, profile in profiles:
+                alias = f"benchmark_{label.split()[0]}"
+                path = Path(directory) / f"{alias}.sqlite3"
+                self.register(alias, dict(profile, NAME=str(path)))
+                try:
+                    committed, locked, elapsed = self.run(alias, options['threads'], options['bookings'])
+                finally:
+                    del connections.settings[alias]
+                self.stdout.write(
+                    f"{label}: {committed / elapsed:,.0f} bookings/s, "
+                    f"{locked} failed with 'database is locked' ({committed} committed in {elapsed:.2f}s)"
+                )
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def register(self, alias, settings_dict):
+        # A throwaway handler fills in the keys Django defaults for every DATABASES entry
+        connections.settings[alias] = ConnectionHandler({DEFAULT_DB_ALIAS: settings_dict}).settings[DEFAULT_DB_ALIAS]
+
+    def run(self, alias, threads, bookings):
+        with connections[alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE inventory (id INTEGER PRIMARY KEY, available INTEGER NOT NULL)')
+            cursor.execute('CREATE TABLE booking (id INTEGER PRIMARY KEY, reference TEXT NOT NULL)')
+            cursor.execute('INSERT INTO inventory (id, available) VALUES (1, %s)', [threads * bookings])
+        connections[alias].close()
+
+        counts = {'committed': 0, 'locked': 0}
+        lock = threading.Lock()
+        start = threading.Barrier(threads + 1)
+
+        def worker(number):
+            # Each thread gets its own connection from the handler
+            connection = connections[alias]
+            committed = locked = 0
+            connection.ensure_connection()
+            start.wait()
+            for i in range(bookings):
+                # Same shape as a booking: read availability, then write
+                try:
+                    with transaction.atomic(using=alias), connection.cursor() as cursor:
+                        cursor.execute('SELECT available FROM inventory WHERE id = 1')
+                        (available,) = cursor.fetchone()
+                        if available > 0:
+                            cursor.execute('UPDATE inventory SET available = available - 1 WHERE id = 1')
+                            cursor.execute('INSERT INTO booking (reference) VALUES (%s)', [f'{number}-{i}'])
+                    committed += 1
+                except OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    locked += 1
+            connection.close()
+            with lock:
+                counts['committed'] += committed
+                counts['locked'] += locked
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in workers:
+            thread.start()
+        start.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        return counts['committed'], counts['locked'], time.perf_counter() - started
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+import gc
+import random
+import statistics
+import time
+
+from hotels.models import Hotel, RatePlan, LengthOfStayDiscount
+from hotels.pricing import price_stays
+
+class Command(BaseCommand):
+    help = 'Benchmark batched stay pricing against a latency budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=10000)
+        parser.add_argument('--nights', type=int, default=14)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--budget-ms', type=float, default=250.0)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        check_in = date.today() + timedelta(days=30)
+        check_out = check_in + timedelta(days=options['nights'])
+
+        # Build the catalog in memory so the benchmark measures pricing, not the database
+        hotels = []
+        plans_by_hotel = defaultdict(list)
+        discounts_by_hotel = defaultdict(list)
+        for hotel_id in range(1, options['hotels'] + 1):
+            hotel = Hotel(id=hotel_id, price_per_night=Decimal(rng.randint(60, 600)))
+            hotels.append(hotel)
+
+            # Two seasons straddling the stay, weekend uplift on Friday/Saturday
+            split = check_in + timedelta(days=rng.randint(0, options['nights']))
+            for start, end in ((check_in - timedelta(days=60), split - timedelta(days=1)),
+                               (split, check_out + timedelta(days=60))):
+                plans_by_hotel[hotel_id].append(RatePlan(
+                    hotel_id=hotel_id,
+                    name='Season',
+                    start_date=start,
+                    end_date=end,
+                    price_per_night=hotel.price_per_night * Decimal(rng.choice(['0.8', '1.0', '1.3'])),
+                    weekday_multipliers=[1.0, 1.0, 1.0, 1.0, 1.2, 1.25, 1.0]
+                ))
+            discounts_by_hotel[hotel_id].append(LengthOfStayDiscount(
+                hotel_id=hotel_id, min_nights=7, discount_percent=Decimal('10')
+            ))
+
+        def run():
+            return price_stays(
+                hotels, check_in, check_out, rooms=2,
+                rate_data=(plans_by_hotel, discounts_by_hotel)
+            )
+
+        # Warm up once, and keep the collector out of the timed runs: the catalog
+        # above is large enough for a collection to land in any of them
+        totals = run()
+        timings = []
+        for _ in range(options['repeat']):
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                gc.enable()
+
+        median = statistics.median(timings)
+        self.stdout.write(
+            f"Priced {len(totals)} hotels x {options['nights']} nights: "
+            f"median {median:.1f} ms, best {min(timings):.1f} ms, worst {max(timings):.1f} ms "
+            f"(budget {options['budget_ms']:.0f} ms)"
+        )
+
+        if median > options['budget_ms']:
+            raise CommandError(f"Stay pricing exceeded the {options['budget_ms']:.0f} ms budget")
+
+        self.stdout.write(self.style.SUCCESS('Stay pricing is within budget'))
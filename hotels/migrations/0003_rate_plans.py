@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:42
+
+import django.core.validators
+import django.db.models.deletion
+import hotels.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0002_hotelcategory'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='hotel',
+            options={'ordering': ['name']},
+        ),
+        migrations.CreateModel(
+            name='LengthOfStayDiscount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_nights', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(2)])),
+                ('discount_percent', models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stay_discounts', to='hotels.hotel')),
+            ],
+            options={
+                'ordering': ['hotel', 'min_nights'],
+                'unique_together': {('hotel', 'min_nights')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RatePlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('weekday_multipliers', models.JSONField(default=hotels.models.default_weekday_multipliers)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rate_plans', to='hotels.hotel')),
+            ],
+            options={
+                'ordering': ['hotel', 'start_date'],
+                'indexes': [models.Index(fields=['hotel', 'start_date', 'end_date'], name='hotels_rate_hotel_i_ae06c7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:44
+
+import thumbnails.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0003_rate_plans'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='destination',
+            name='image',
+            field=thumbnails.fields.ContentAddressedImageField(blank=True, null=True, upload_to='destinations/'),
+        ),
+        migrations.AlterField(
+            model_name='hotel',
+            name='main_image',
+            field=thumbnails.fields.ContentAddressedImageField(blank=True, null=True, upload_to='hotels/'),
+        ),
+        migrations.AlterField(
+            model_name='hotelimage',
+            name='image',
+            field=thumbnails.fields.ContentAddressedImageField(upload_to='hotels/gallery/'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:46
+
+from django.db import migrations, models
+
+
+def backfill_amenity_masks(apps, schema_editor):
+    Amenity = apps.get_model('hotels', 'Amenity')
+    Hotel = apps.get_model('hotels', 'Hotel')
+
+    amenities = list(Amenity.objects.order_by('id')[:63])
+    for bit, amenity in enumerate(amenities):
+        amenity.bit = bit
+    Amenity.objects.bulk_update(amenities, ['bit'])
+
+    masks = {}
+    rows = Hotel.amenities.through.objects.filter(amenity__bit__isnull=False).values_list('hotel_id', 'amenity__bit')
+    for hotel_id, bit in rows:
+        masks[hotel_id] = masks.get(hotel_id, 0) | (1 << bit)
+    Hotel.objects.bulk_update(
+        [Hotel(id=hotel_id, amenity_mask=mask) for hotel_id, mask in masks.items()],
+        ['amenity_mask'],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0004_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='amenity',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_amenity_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0005_amenity_mask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hotelreview',
+            index=models.Index(fields=['hotel', '-created_at', '-id'], name='hotel_review_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotelreview',
+            index=models.Index(fields=['hotel', 'rating', '-created_at', '-id'], name='hotel_review_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:52
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0006_review_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('max_occupancy', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10)])),
+                ('bed_configuration', models.CharField(blank=True, max_length=100)),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_rooms', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_types', to='hotels.hotel')),
+            ],
+            options={
+                'ordering': ['hotel', 'price_per_night'],
+                'unique_together': {('hotel', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('available', models.PositiveIntegerField()),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='hotels.roomtype')),
+            ],
+            options={
+                'verbose_name_plural': 'Room inventory',
+                'ordering': ['room_type', 'date'],
+                'unique_together': {('room_type', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0007_room_types'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotelbooking',
+            name='room_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='hotels.roomtype'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0008_booking_room_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='hotels.hotel')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='hotels.hotel')),
+            ],
+            options={
+                'ordering': ['hotel', 'rank'],
+                'unique_together': {('hotel', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+from travel_api.slugs import unique_slug
+
+
+def backfill_destination_slugs(apps, schema_editor):
+    Destination = apps.get_model('hotels', 'Destination')
+
+    taken = set()
+    destinations = list(Destination.objects.order_by('id').only('id', 'name', 'country'))
+    for destination in destinations:
+        destination.slug = unique_slug(f"{destination.name} {destination.country}", taken, max_length=120)
+    Destination.objects.bulk_update(destinations, ['slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0009_hotel_neighbours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=120, null=True),
+        ),
+        migrations.RunPython(backfill_destination_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='destination',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=120, unique=True),
+        ),
+    ]
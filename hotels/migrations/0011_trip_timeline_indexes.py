@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0010_destination_slug'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hotelbooking',
+            index=models.Index(fields=['user', 'check_in_date', 'id'], name='hotel_booking_trips_idx'),
+        ),
+    ]
@@ -1,20 +1,30 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
+from thumbnails.fields import ContentAddressedImageField
+from travel_api.slugs import slug_for
 
 User = get_user_model()
 
 class Destination(models.Model):
     name = models.CharField(max_length=100)
     country = models.CharField(max_length=100)
+    # e.g. "paris-france"; filled from name and country on first save
+    slug = models.SlugField(max_length=120, unique=True, blank=True)
     description = models.TextField()
-    image = models.ImageField(upload_to='destinations/', null=True, blank=True)
+    image = ContentAddressedImageField(upload_to='destinations/', null=True, blank=True)
     is_popular = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.name}, {self.country}"
 
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slug_for(self, f"{self.name} {self.country}", max_length=120)
+        super().save(*args, **kwargs)
+
 class HotelCategory(models.Model):
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
@@ -28,8 +38,12 @@ class HotelCategory(models.Model):
         return self.name
 
 class Amenity(models.Model):
+    # Bits 0-62 of Hotel.amenity_mask (a signed 64-bit column)
+    MAX_BIT = 62
+
     name = models.CharField(max_length=50, unique=True)
     icon = models.CharField(max_length=50, blank=True)  # Font Awesome icon class
+    bit = models.PositiveSmallIntegerField(unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name_plural = "Amenities"
@@ -37,6 +51,19 @@ class Amenity(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def mask(self):
+        return 1 << self.bit
+
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            used = set(Amenity.objects.exclude(bit__isnull=True).values_list('bit', flat=True))
+            free = [bit for bit in range(self.MAX_BIT + 1) if bit not in used]
+            if not free:
+                raise ValidationError(f"At most {self.MAX_BIT + 1} amenities are supported")
+            self.bit = free[0]
+        super().save(*args, **kwargs)
+
 class Hotel(models.Model):
     STAR_RATING = [
         (1, '1 Star'),
@@ -52,7 +79,9 @@ class Hotel(models.Model):
     description = models.TextField()
     star_rating = models.IntegerField(choices=STAR_RATING)
     amenities = models.ManyToManyField(Amenity, blank=True)
-    main_image = models.ImageField(upload_to='hotels/', null=True, blank=True)
+    # Denormalized OR of Amenity.mask for every amenity above, kept in sync by hotels.signals
+    amenity_mask = models.BigIntegerField(default=0, editable=False)
+    main_image = ContentAddressedImageField(upload_to='hotels/', null=True, blank=True)
     price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
     total_rooms = models.PositiveIntegerField()
     available_rooms = models.PositiveIntegerField()
@@ -68,6 +97,19 @@ class Hotel(models.Model):
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def refresh_amenity_masks(hotel_ids):
+        """Recompute amenity_mask for the given hotels from the amenities relation"""
+        hotel_ids = list(hotel_ids)
+        masks = dict.fromkeys(hotel_ids, 0)
+        rows = Hotel.amenities.through.objects.filter(hotel_id__in=hotel_ids).values_list('hotel_id', 'amenity__bit')
+        for hotel_id, bit in rows:
+            if bit is not None:
+                masks[hotel_id] |= 1 << bit
+
+        hotels = [Hotel(id=hotel_id, amenity_mask=mask) for hotel_id, mask in masks.items()]
+        Hotel.objects.bulk_update(hotels, ['amenity_mask'], batch_size=500)
+
     @property
     def average_rating(self):
         reviews = self.reviews.all()
@@ -75,9 +117,94 @@ class Hotel(models.Model):
             return sum([review.rating for review in reviews]) / len(reviews)
         return 0
 
+class RoomType(models.Model):
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='room_types')
+    name = models.CharField(max_length=100)
+    max_occupancy = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(10)])
+    bed_configuration = models.CharField(max_length=100, blank=True)  # e.g. "1 King", "2 Queen"
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    total_rooms = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['hotel', 'price_per_night']
+        unique_together = ['hotel', 'name']
+
+    def __str__(self):
+        return f"{self.hotel.name} - {self.name}"
+
+class RoomInventory(models.Model):
+    """Rooms of a type left on one night; nights without a row have every room free"""
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='inventory')
+    date = models.DateField()
+    available = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name_plural = "Room inventory"
+        unique_together = ['room_type', 'date']
+        ordering = ['room_type', 'date']
+
+    def __str__(self):
+        return f"{self.room_type} on {self.date}: {self.available} left"
+
+def default_weekday_multipliers():
+    return [1.0] * 7
+
+class RatePlan(models.Model):
+    """Seasonal nightly rate for a hotel, with Monday-first day-of-week multipliers"""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='rate_plans')
+    name = models.CharField(max_length=100)
+    start_date = models.DateField()
+    end_date = models.DateField()  # Inclusive
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    weekday_multipliers = models.JSONField(default=default_weekday_multipliers)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['hotel', 'start_date']
+        indexes = [
+            models.Index(fields=['hotel', 'start_date', 'end_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel.name} - {self.name} ({self.start_date} to {self.end_date})"
+
+    def clean(self):
+        if self.end_date < self.start_date:
+            raise ValidationError("End date must be on or after start date")
+
+        if len(self.weekday_multipliers or []) != 7:
+            raise ValidationError("Weekday multipliers must have exactly 7 values (Monday first)")
+
+        overlapping = RatePlan.objects.filter(
+            hotel_id=self.hotel_id,
+            is_active=True,
+            start_date__lte=self.end_date,
+            end_date__gte=self.start_date
+        ).exclude(pk=self.pk)
+        if self.is_active and overlapping.exists():
+            raise ValidationError("Rate plan overlaps another active rate plan for this hotel")
+
+class LengthOfStayDiscount(models.Model):
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='stay_discounts')
+    min_nights = models.PositiveIntegerField(validators=[MinValueValidator(2)])
+    discount_percent = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        validators=[MinValueValidator(0), MaxValueValidator(100)]
+    )
+
+    class Meta:
+        unique_together = ['hotel', 'min_nights']
+        ordering = ['hotel', 'min_nights']
+
+    def __str__(self):
+        return f"{self.hotel.name} - {self.discount_percent}% off {self.min_nights}+ nights"
+
 class HotelImage(models.Model):
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='hotels/gallery/')
+    image = ContentAddressedImageField(upload_to='hotels/gallery/')
     caption = models.CharField(max_length=200, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -94,6 +221,7 @@ class HotelBooking(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE)
+    room_type = models.ForeignKey('RoomType', on_delete=models.SET_NULL, null=True, blank=True)
     booking_reference = models.CharField(max_length=10, unique=True)
     check_in_date = models.DateField()
     check_out_date = models.DateField()
@@ -106,6 +234,12 @@ class HotelBooking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # "My trips" timeline: a user's stays in check-in order
+            models.Index(fields=['user', 'check_in_date', 'id'], name='hotel_booking_trips_idx'),
+        ]
+
     def __str__(self):
         return f"Booking {self.booking_reference} - {self.hotel.name}"
 
@@ -119,6 +253,26 @@ class HotelReview(models.Model):
 
     class Meta:
         unique_together = ['user', 'hotel']
+        indexes = [
+            # Review feed: newest first within a hotel, optionally for one rating
+            models.Index(fields=['hotel', '-created_at', '-id'], name='hotel_review_feed_idx'),
+            models.Index(fields=['hotel', 'rating', '-created_at', '-id'], name='hotel_review_rating_idx'),
+        ]
 
     def __str__(self):
         return f"{self.hotel.name} - {self.rating} stars by {self.user.email}"
+
+class HotelNeighbour(models.Model):
+    """Precomputed "you may also like" hotels, rebuilt offline by build_hotel_recommendations"""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        # Also the index the detail view reads the neighbours through
+        unique_together = ['hotel', 'rank']
+        ordering = ['hotel', 'rank']
+
+    def __str__(self):
+        return f"{self.hotel.name} -> {self.neighbour.name} (#{self.rank})"
@@ -0,0 +1,217 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.core.cache import cache
+
+from travel_api.cache_versions import get_versions, bump_versions
+from .models import Hotel, RatePlan, LengthOfStayDiscount
+
+CENTS = Decimal('0.01')
+HUNDRED = Decimal('100')
+
+class StayWindow:
+    """Per-weekday prefix counts over the nights of a stay.
+
+    Built once per search and shared by every hotel being priced, so the
+    number of nights a rate plan covers on each weekday is an O(1) lookup
+    instead of a walk over the stay dates.
+    """
+
+    def __init__(self, check_in, check_out):
+        self.check_in = check_in
+        self.check_out = check_out
+        self.nights = (check_out - check_in).days
+
+        # prefix[w][i] = number of nights falling on weekday w among the first i nights
+        self.prefix = [[0] * (self.nights + 1) for _ in range(7)]
+        for i in range(self.nights):
+            weekday = (check_in + timedelta(days=i)).weekday()
+            for w in range(7):
+                self.prefix[w][i + 1] = self.prefix[w][i] + (1 if w == weekday else 0)
+
+    def night_range(self, start_date, end_date):
+        """Night indexes [start, end) covered by an inclusive date range"""
+        start = max((start_date - self.check_in).days, 0)
+        end = min((end_date - self.check_in).days + 1, self.nights)
+        return start, max(start, end)
+
+    def weekday_counts(self, start, end):
+        return [self.prefix[w][end] - self.prefix[w][start] for w in range(7)]
+
+def load_rate_data(hotel_ids, check_in, check_out):
+    """Fetch active rate plans and stay discounts for many hotels in two queries"""
+    plans_by_hotel = defaultdict(list)
+    discounts_by_hotel = defaultdict(list)
+
+    plans = RatePlan.objects.filter(
+        hotel_id__in=hotel_ids,
+        is_active=True,
+        start_date__lt=check_out,
+        end_date__gte=check_in
+    ).only('hotel_id', 'start_date', 'end_date', 'price_per_night', 'weekday_multipliers')
+    for plan in plans:
+        plans_by_hotel[plan.hotel_id].append(plan)
+
+    nights = (check_out - check_in).days
+    discounts = LengthOfStayDiscount.objects.filter(
+        hotel_id__in=hotel_ids,
+        min_nights__lte=nights
+    ).only('hotel_id', 'min_nights', 'discount_percent')
+    for discount in discounts:
+        discounts_by_hotel[discount.hotel_id].append(discount)
+
+    return plans_by_hotel, discounts_by_hotel
+
+def _plan_weights(plan):
+    weights = getattr(plan, '_decimal_weights', None)
+    if weights is None:
+        weights = tuple(Decimal(str(m)) for m in plan.weekday_multipliers)
+        plan._decimal_weights = weights
+    return weights
+
+def plan_segments(plans, window):
+    """(plan, first night, end night) for the nights each plan prices.
+
+    RatePlan.clean() rejects overlapping active plans, but rows written
+    through the ORM or bulk_create skip it. Plans are applied in start
+    order and each night goes to the first plan covering it, so an overlap
+    can never price a night twice.
+    """
+    segments = []
+    priced_until = 0
+    for plan in sorted(plans, key=lambda p: (p.start_date, p.pk or 0)):
+        start, end = window.night_range(plan.start_date, plan.end_date)
+        start = max(start, priced_until)
+        if start < end:
+            segments.append((plan, start, end))
+            priced_until = end
+    return segments
+
+def price_stays(hotels, check_in, check_out, rooms=1, rate_data=None, room_rates=None):
+    """Price a stay for every hotel in one batch.
+
+    Returns a dict mapping hotel id to the total price for all rooms. Nights
+    not covered by a rate plan are charged at ``Hotel.price_per_night``; the
+    largest length-of-stay discount the stay qualifies for is applied last.
+
+    ``room_rates`` maps a hotel id to the combined nightly price of the room
+    types booked there, which replaces ``rooms`` x the hotel rate. The
+    hotel's plans are scaled by room rate / hotel rate, so seasons, weekday
+    multipliers and stay discounts apply to room types the same way.
+
+    The batch works column-wise: every plan segment of every hotel is
+    flattened into one list and weighted against the shared weekday prefix
+    table, with the weight of each (multipliers, night range) pair computed
+    once for the whole batch, since hotels mostly share both.
+    """
+    hotels = list(hotels)
+    window = StayWindow(check_in, check_out)
+    nights = window.nights
+
+    if rate_data is None:
+        rate_data = load_rate_data([hotel.id for hotel in hotels], check_in, check_out)
+    plans_by_hotel, discounts_by_hotel = rate_data
+
+    position = {hotel.id: i for i, hotel in enumerate(hotels)}
+    uncovered = [nights] * len(hotels)
+    plan_totals = [Decimal('0')] * len(hotels)
+
+    segments = [
+        (position[hotel_id], plan, start, end)
+        for hotel_id, plans in plans_by_hotel.items() if hotel_id in position
+        for plan, start, end in plan_segments(plans, window)
+    ]
+    weights = {}
+    for i, plan, start, end in segments:
+        multipliers = _plan_weights(plan)
+        key = (multipliers, start, end)
+        weight = weights.get(key)
+        if weight is None:
+            counts = window.weekday_counts(start, end)
+            weight = weights[key] = sum(w * c for w, c in zip(multipliers, counts) if c)
+        plan_totals[i] += plan.price_per_night * weight
+        uncovered[i] -= end - start
+
+    best_discount = {}
+    for hotel_id, discounts in discounts_by_hotel.items():
+        percents = [d.discount_percent for d in discounts if d.min_nights <= nights]
+        if percents and hotel_id in position:
+            best_discount[hotel_id] = max(percents)
+
+    room_rates = room_rates or {}
+    totals = {}
+    for i, hotel in enumerate(hotels):
+        total = plan_totals[i] + hotel.price_per_night * uncovered[i]
+        count = rooms
+        room_rate = room_rates.get(hotel.id)
+        if room_rate is not None:
+            total = scale_rate(total, room_rate, hotel.price_per_night, nights)
+            count = 1
+        percent = best_discount.get(hotel.id)
+        if percent:
+            total = total * (HUNDRED - percent) / HUNDRED
+        totals[hotel.id] = (total * count).quantize(CENTS, ROUND_HALF_UP)
+    return totals
+
+def scale_rate(hotel_amount, room_rate, hotel_rate, nights=1):
+    """``hotel_amount``, charged at the hotel rate, restated for a room type.
+
+    A hotel without a base rate has no season to scale, so the room rate
+    applies flat.
+    """
+    if not hotel_rate:
+        return room_rate * nights
+    return hotel_amount * room_rate / hotel_rate
+
+def nightly_rates(hotel, start, end, plans=None):
+    """Per-night rate for each night in [start, end), before stay discounts"""
+    window = StayWindow(start, end)
+    if plans is None:
+        plans = load_rate_data([hotel.id], start, end)[0].get(hotel.id, [])
+
+    rates = [hotel.price_per_night] * window.nights
+    for plan, first, last in plan_segments(plans, window):
+        weights = _plan_weights(plan)
+        for i in range(first, last):
+            weekday = (start + timedelta(days=i)).weekday()
+            rates[i] = (plan.price_per_night * weights[weekday]).quantize(CENTS, ROUND_HALF_UP)
+    return rates
+
+def stay_version_key(hotel_id):
+    return f'stay_price_version:{hotel_id}'
+
+def bump_stay_prices(hotel_ids):
+    """Drop memoized stay prices of hotels whose rates changed"""
+    bump_versions([stay_version_key(hotel_id) for hotel_id in set(hotel_ids)])
+
+def cached_stay_prices(hotel_ids, check_in, check_out):
+    """One-room stay totals keyed by hotel id, memoized per (hotel, stay).
+
+    Entries live under the hotel's version, which rate plan, discount and
+    hotel changes bump. Hotels missing from the cache are priced together
+    with ``price_stays``.
+    """
+    hotel_ids = list(set(hotel_ids))
+    if not hotel_ids:
+        return {}
+
+    versions = get_versions([stay_version_key(hotel_id) for hotel_id in hotel_ids])
+    keys = {
+        hotel_id: f'stay_price:{hotel_id}:{check_in.isoformat()}:{check_out.isoformat()}:{versions[stay_version_key(hotel_id)]}'
+        for hotel_id in hotel_ids
+    }
+    cached = cache.get_many(keys.values())
+    prices = {hotel_id: cached[keys[hotel_id]] for hotel_id in hotel_ids if keys[hotel_id] in cached}
+
+    missing = [hotel_id for hotel_id in hotel_ids if hotel_id not in prices]
+    if missing:
+        hotels = Hotel.objects.filter(id__in=missing).only('id', 'price_per_night')
+        fresh = price_stays(hotels, check_in, check_out)
+        prices.update(fresh)
+        cache.set_many(
+            {keys[hotel_id]: price for hotel_id, price in fresh.items()},
+            getattr(settings, 'BUNDLE_PRICE_CACHE_SECONDS', 15 * 60)
+        )
+
+    return prices
@@ -0,0 +1,43 @@
+from django.db import transaction
+
+from travel_api.similarity import one_hot, log_scale, top_k_neighbours
+from .models import Amenity, Hotel, HotelNeighbour
+
+# Relative pull of each feature group on the cosine similarity
+DESTINATION_WEIGHT = 2.0
+STAR_WEIGHT = 1.0
+PRICE_WEIGHT = 1.0
+AMENITY_WEIGHT = 0.5
+
+def hotel_feature_vectors():
+    """(ids, vectors) for every hotel: destination, star rating, price and amenities"""
+    rows = list(Hotel.objects.values_list('id', 'destination_id', 'star_rating', 'price_per_night', 'amenity_mask'))
+    bits = sorted(Amenity.objects.exclude(bit__isnull=True).values_list('bit', flat=True))
+
+    _, destination = one_hot([row[1] for row in rows], DESTINATION_WEIGHT)
+    price = log_scale([row[3] for row in rows])
+
+    ids, vectors = [], []
+    for hotel_id, destination_id, star_rating, price_per_night, amenity_mask in rows:
+        ids.append(hotel_id)
+        vectors.append(
+            destination(destination_id)
+            + [STAR_WEIGHT * star_rating / 5, PRICE_WEIGHT * price(price_per_night)]
+            + [AMENITY_WEIGHT if amenity_mask >> bit & 1 else 0.0 for bit in bits]
+        )
+    return ids, vectors
+
+def rebuild_hotel_neighbours(k=10):
+    """Replace the whole neighbour table; returns the number of rows written"""
+    ids, vectors = hotel_feature_vectors()
+    neighbours = top_k_neighbours(ids, vectors, k)
+
+    rows = [
+        HotelNeighbour(hotel_id=hotel_id, neighbour_id=neighbour_id, rank=rank, score=score)
+        for hotel_id, ranked in neighbours.items()
+        for rank, (neighbour_id, score) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        HotelNeighbour.objects.all().delete()
+        HotelNeighbour.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
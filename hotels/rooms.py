@@ -0,0 +1,135 @@
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import F, Min
+
+from .models import RoomType, RoomInventory
+
+RoomOffer = namedtuple('RoomOffer', ['room_type_id', 'name', 'capacity', 'price', 'available'])
+
+def load_room_offers(hotel_ids, check_in, check_out):
+    """Room types bookable for a whole stay, keyed by hotel id.
+
+    Every hotel that defines room types gets a key, with an empty list when
+    all of them are sold out, so callers can tell it apart from a hotel
+    priced at its flat rate. Two queries regardless of hotel count: the room
+    types, and the tightest nightly inventory per room type across the stay.
+    """
+    room_types = list(
+        RoomType.objects.filter(hotel_id__in=hotel_ids)
+        .only('hotel_id', 'name', 'max_occupancy', 'price_per_night', 'total_rooms')
+    )
+    if not room_types:
+        return {}
+
+    tightest = dict(
+        RoomInventory.objects.filter(
+            room_type__hotel_id__in=hotel_ids,
+            date__gte=check_in,
+            date__lt=check_out
+        ).values('room_type_id').annotate(min_available=Min('available')).values_list('room_type_id', 'min_available')
+    )
+
+    offers = {}
+    for room_type in room_types:
+        hotel_offers = offers.setdefault(room_type.hotel_id, [])
+        # Nights without an inventory row still have every room free
+        available = room_type.total_rooms
+        if room_type.id in tightest:
+            available = min(available, tightest[room_type.id])
+        if available > 0:
+            hotel_offers.append(RoomOffer(
+                room_type.id, room_type.name, room_type.max_occupancy, room_type.price_per_night, available
+            ))
+    return offers
+
+def reserve_room_inventory(room_type, check_in, check_out, rooms):
+    """Take ``rooms`` rooms of a type for every night of a stay.
+
+    Must run inside a transaction: returns False without rolling back when
+    any night is short, and the caller discards the partial decrement.
+    """
+    nights = [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+    # Materialise untouched nights at full capacity so they can be decremented
+    RoomInventory.objects.bulk_create(
+        [RoomInventory(room_type=room_type, date=night, available=room_type.total_rooms) for night in nights],
+        ignore_conflicts=True
+    )
+    reserved = RoomInventory.objects.filter(
+        room_type=room_type, date__in=nights, available__gte=rooms
+    ).update(available=F('available') - rooms)
+    return reserved == len(nights)
+
+def cheapest_room_combination(offers, guests, rooms):
+    """Cheapest way to book exactly ``rooms`` rooms that sleep at least ``guests``.
+
+    Returns (nightly_price, [(offer, count), ...]) or None when nothing fits.
+
+    Rooms sleeping the same number of guests are interchangeable, so only the
+    ``rooms`` cheapest of each capacity are candidates. A small knapsack over
+    (rooms used, guests covered) then finds the optimum without enumerating
+    every combination.
+    """
+    if rooms <= 0:
+        return None
+
+    offers = sorted(offers, key=lambda o: (o.price, -o.capacity))
+
+    # One room: the cheapest type that sleeps everyone
+    if rooms == 1:
+        for offer in offers:
+            if offer.capacity >= guests:
+                return offer.price, [(offer, 1)]
+        return None
+
+    # Capacity beyond the party size buys nothing, so cap it; rooms of equal
+    # capacity are interchangeable, so keep the cheapest few of each
+    groups = defaultdict(list)
+    for offer in offers:
+        capacity = min(offer.capacity, guests)
+        group = groups[capacity]
+        for _ in range(min(offer.available, rooms - len(group))):
+            group.append(offer)
+
+    if sum(sorted((c for c, group in groups.items() for _ in group), reverse=True)[:rooms]) < guests:
+        return None
+
+    # Knapsack over (rooms used, guests covered) taking j cheapest rooms of a
+    # capacity at a time; prices in cents keep the inner loop on plain ints
+    states = {(0, 0): 0}
+    history = []
+    for capacity, group in groups.items():
+        prefix = [0]
+        for offer in group:
+            prefix.append(prefix[-1] + int(offer.price * 100))
+
+        next_states = dict(states)
+        choices = {}
+        for origin, cents in states.items():
+            used, covered = origin
+            for taken in range(1, min(len(group), rooms - used) + 1):
+                covered += capacity
+                state = (used + taken, covered if covered < guests else guests)
+                candidate = cents + prefix[taken]
+                best = next_states.get(state)
+                if best is None or candidate < best:
+                    next_states[state] = candidate
+                    choices[state] = (origin, taken)
+        states = next_states
+        history.append((group, choices))
+
+    state = (rooms, guests)
+    if state not in states:
+        return None
+
+    # Walk the choices back to the rooms taken from each capacity
+    counts = defaultdict(int)
+    for group, choices in reversed(history):
+        if state in choices:
+            state, taken = choices[state]
+            for offer in group[:taken]:
+                counts[offer] += 1
+
+    price = sum((offer.price * count for offer, count in counts.items()), Decimal('0'))
+    return price, sorted(counts.items(), key=lambda item: item[0].price)
@@ -1,7 +1,10 @@
 from rest_framework import serializers
-from .models import Destination, Amenity, Hotel, HotelImage, HotelBooking, HotelReview, HotelCategory
+from django.db.models import Q
+from .models import Destination, Amenity, Hotel, HotelImage, HotelBooking, HotelReview, HotelCategory, RoomType
+from .pricing import price_stays
+from thumbnails.serializers import ThumbnailField
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 class HotelCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,6 +12,8 @@ class HotelCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description']
 
 class DestinationSerializer(serializers.ModelSerializer):
+    image_thumbnails = ThumbnailField(source='image')
+
     class Meta:
         model = Destination
         fields = '__all__'
@@ -19,9 +24,16 @@ class AmenitySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class HotelImageSerializer(serializers.ModelSerializer):
+    image_thumbnails = ThumbnailField(source='image')
+
     class Meta:
         model = HotelImage
-        fields = ['id', 'image', 'caption']
+        fields = ['id', 'image', 'image_thumbnails', 'caption']
+
+class RoomTypeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RoomType
+        fields = ['id', 'name', 'max_occupancy', 'bed_configuration', 'price_per_night', 'total_rooms']
 
 class HotelReviewSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
@@ -34,6 +46,7 @@ class HotelSerializer(serializers.ModelSerializer):
     destination = DestinationSerializer(read_only=True)
     amenities = AmenitySerializer(many=True, read_only=True)
     images = HotelImageSerializer(many=True, read_only=True)
+    room_types = RoomTypeSerializer(many=True, read_only=True)
     reviews = HotelReviewSerializer(many=True, read_only=True)
     average_rating = serializers.ReadOnlyField()
     
@@ -44,14 +57,16 @@ class HotelSerializer(serializers.ModelSerializer):
 class HotelListSerializer(serializers.ModelSerializer):
     destination = DestinationSerializer(read_only=True)
     average_rating = serializers.ReadOnlyField()
+    main_image_thumbnails = ThumbnailField(source='main_image')
     
     class Meta:
         model = Hotel
         fields = ['id', 'name', 'destination', 'star_rating', 'main_image', 
-                 'price_per_night', 'average_rating', 'is_featured']
+                 'main_image_thumbnails', 'price_per_night', 'average_rating', 'is_featured']
 
 class HotelSearchSerializer(serializers.Serializer):
-    destination = serializers.CharField(required=False)
+    destination = serializers.CharField(required=False, help_text="Free text matched against destination and hotel names")
+    destination_slug = serializers.CharField(required=False, help_text="Destination slug or id")
     check_in_date = serializers.DateField()
     check_out_date = serializers.DateField()
     guests = serializers.IntegerField(min_value=1, max_value=10, default=1)
@@ -59,6 +74,22 @@ class HotelSearchSerializer(serializers.Serializer):
     min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     star_rating = serializers.IntegerField(min_value=1, max_value=5, required=False)
+    amenities = serializers.CharField(required=False, help_text="Comma-separated amenity ids or names, all required")
+    facets = serializers.BooleanField(default=True, help_text="Include facet counts in the response")
+
+    def validate_amenities(self, value):
+        wanted = [item.strip() for item in value.split(',') if item.strip()]
+        query = Q()
+        for item in wanted:
+            # isdecimal, not isdigit: '²' is a digit that int() rejects
+            query |= Q(id=int(item)) if item.isdecimal() else Q(name__iexact=item)
+        amenities = list(Amenity.objects.filter(query)) if wanted else []
+
+        found = {str(a.id) for a in amenities} | {a.name.lower() for a in amenities}
+        missing = [item for item in wanted if item.lower() not in found]
+        if missing:
+            raise serializers.ValidationError(f"Unknown amenities: {', '.join(missing)}")
+        return amenities
 
     def validate(self, data):
         if data['check_out_date'] <= data['check_in_date']:
@@ -69,14 +100,36 @@ class HotelSearchSerializer(serializers.Serializer):
         
         return data
 
+class HotelCalendarSerializer(serializers.Serializer):
+    MAX_NIGHTS = 62
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False, help_text="Exclusive; defaults to 30 nights after start_date")
+
+    def validate(self, data):
+        start = data.get('start_date') or datetime.now().date()
+        end = data.get('end_date') or start + timedelta(days=30)
+        
+        if end <= start:
+            raise serializers.ValidationError("End date must be after start date")
+        
+        if (end - start).days > self.MAX_NIGHTS:
+            raise serializers.ValidationError(f"Calendar window cannot exceed {self.MAX_NIGHTS} nights")
+        
+        data['start_date'] = start
+        data['end_date'] = end
+        return data
+
 class HotelBookingSerializer(serializers.ModelSerializer):
     hotel = HotelSerializer(read_only=True)
     hotel_id = serializers.IntegerField(write_only=True)
+    room_type = RoomTypeSerializer(read_only=True)
+    room_type_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
     nights = serializers.ReadOnlyField()
     
     class Meta:
         model = HotelBooking
-        fields = ['id', 'hotel', 'hotel_id', 'booking_reference', 'check_in_date', 
+        fields = ['id', 'hotel', 'hotel_id', 'room_type', 'room_type_id', 'booking_reference', 'check_in_date', 
                  'check_out_date', 'nights', 'guests', 'rooms', 'total_price', 
                  'status', 'special_requests', 'created_at']
         read_only_fields = ['id', 'booking_reference', 'status', 'created_at']
@@ -88,6 +141,20 @@ class HotelBookingSerializer(serializers.ModelSerializer):
         if data['check_in_date'] < datetime.now().date():
             raise serializers.ValidationError("Check-in date cannot be in the past")
         
+        room_type_id = data.pop('room_type_id', None)
+        if room_type_id is not None:
+            room_type = RoomType.objects.filter(id=room_type_id, hotel_id=data['hotel_id']).first()
+            if room_type is None:
+                raise serializers.ValidationError("Room type does not belong to this hotel")
+            if room_type.max_occupancy * data['rooms'] < data['guests']:
+                raise serializers.ValidationError(
+                    f"{data['rooms']} {room_type.name} room(s) sleep at most {room_type.max_occupancy * data['rooms']} guests"
+                )
+            data['room_type'] = room_type
+        elif RoomType.objects.filter(hotel_id=data['hotel_id']).exists():
+            # Only a room type booking takes nightly RoomInventory, which search and the calendar read
+            raise serializers.ValidationError({'room_type_id': "This hotel requires a room type"})
+        
         return data
 
     def create(self, validated_data):
@@ -100,7 +167,13 @@ class HotelBookingSerializer(serializers.ModelSerializer):
         nights = (check_out - check_in).days
         
         hotel = Hotel.objects.get(id=validated_data['hotel_id'])
-        total_price = hotel.price_per_night * nights * validated_data['rooms']
+        room_rates = None
+        room_type = validated_data.get('room_type')
+        if room_type is not None:
+            room_rates = {hotel.id: room_type.price_per_night * validated_data['rooms']}
+        total_price = price_stays(
+            [hotel], check_in, check_out, rooms=validated_data['rooms'], room_rates=room_rates
+        )[hotel.id]
         
         validated_data['nights'] = nights
         validated_data['total_price'] = total_price
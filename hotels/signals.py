@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, pre_delete, post_save, post_delete
+from django.dispatch import receiver
+
+from travel_api.catalog_cache import bump_catalog_versions
+
+from .models import (
+    Amenity, Destination, Hotel, HotelBooking, HotelCategory, HotelReview, RatePlan, LengthOfStayDiscount,
+    RoomType, RoomInventory
+)
+from .calendar import bump_calendar_version
+from .pricing import bump_stay_prices
+
+@receiver(m2m_changed, sender=Hotel.amenities.through)
+def sync_amenity_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # Remember which hotels lose this amenity before the rows disappear
+        instance._cleared_hotel_ids = list(instance.hotel_set.values_list('id', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        Hotel.refresh_amenity_masks([instance.pk])
+    elif action == 'post_clear':
+        Hotel.refresh_amenity_masks(getattr(instance, '_cleared_hotel_ids', []))
+    elif pk_set:
+        Hotel.refresh_amenity_masks(pk_set)
+
+@receiver(pre_delete, sender=Amenity)
+def clear_amenity_bit(sender, instance, **kwargs):
+    # The through rows cascade without an m2m_changed signal, so drop the bit here
+    if instance.bit is not None:
+        Hotel.objects.filter(amenities=instance).update(
+            amenity_mask=F('amenity_mask').bitand(~instance.mask)
+        )
+
+# Versions are bumped once the write commits. Bumped inside the transaction, a
+# concurrent read could still see the old rows and cache them under the new version.
+
+@receiver([post_save, post_delete], sender=HotelBooking)
+@receiver([post_save, post_delete], sender=RatePlan)
+@receiver([post_save, post_delete], sender=RoomType)
+def invalidate_hotel_calendar(sender, instance, **kwargs):
+    hotel_id = instance.hotel_id
+    transaction.on_commit(lambda: bump_calendar_version(hotel_id))
+
+@receiver([post_save, post_delete], sender=RoomInventory)
+def invalidate_room_calendar(sender, instance, **kwargs):
+    # Inventory is usually saved with its room type loaded; only look it up otherwise
+    if RoomInventory.room_type.is_cached(instance):
+        hotel_id = instance.room_type.hotel_id
+    else:
+        hotel_id = RoomType.objects.filter(pk=instance.room_type_id).values_list('hotel_id', flat=True).first()
+    if hotel_id is not None:
+        transaction.on_commit(lambda: bump_calendar_version(hotel_id))
+
+@receiver(post_save, sender=Hotel)
+def invalidate_calendar_on_hotel_change(sender, instance, **kwargs):
+    # Base price and room count feed every night of the calendar
+    hotel_id = instance.pk
+    transaction.on_commit(lambda: bump_calendar_version(hotel_id))
+    transaction.on_commit(lambda: bump_stay_prices([hotel_id]))
+
+@receiver([post_save, post_delete], sender=RatePlan)
+@receiver([post_save, post_delete], sender=LengthOfStayDiscount)
+def invalidate_stay_prices(sender, instance, **kwargs):
+    hotel_id = instance.hotel_id
+    transaction.on_commit(lambda: bump_stay_prices([hotel_id]))
+
+@receiver([post_save, post_delete], sender=Destination)
+@receiver([post_save, post_delete], sender=HotelCategory)
+@receiver([post_save, post_delete], sender=Hotel)
+def invalidate_hotel_catalog(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_catalog_versions([sender]))
+
+@receiver([post_save, post_delete], sender=HotelReview)
+def invalidate_hotel_ratings(sender, instance, **kwargs):
+    # Listed hotels carry their average rating
+    transaction.on_commit(lambda: bump_catalog_versions([Hotel]))
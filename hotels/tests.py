@@ -4,8 +4,22 @@ from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from django.core.cache import cache
+from django.utils import timezone
+from unittest.mock import patch
+from travel_api.catalog_cache import catalog_bumped_key
+from travel_api.routers import primary_reads
 from decimal import Decimal
-from .models import Destination, HotelCategory, Hotel, Amenity
+from datetime import date, timedelta
+from .models import (
+    Destination, HotelCategory, Hotel, HotelBooking, HotelReview, Amenity,
+    RoomType, RoomInventory, RatePlan, LengthOfStayDiscount, HotelNeighbour
+)
+from .pricing import price_stays
+from .rooms import load_room_offers, cheapest_room_combination
+from .recommendations import rebuild_hotel_neighbours
+from .calendar import calendar_version
+from management.models import IdempotencyKey
 
 User = get_user_model()
 
@@ -158,4 +172,729 @@ class HotelAPITest(APITestCase):
             'rooms': 1
         }
         response = self.client.get(url, params)
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class StayPricingTest(TestCase):
+    def setUp(self):
+        self.destination = Destination.objects.create(
+            name='Paris',
+            country='France',
+            description='City of Light'
+        )
+        self.hotel = Hotel.objects.create(
+            name='Grand Hotel Paris',
+            destination=self.destination,
+            address='123 Champs Elysees',
+            description='Luxury hotel in Paris',
+            star_rating=5,
+            price_per_night=Decimal('100.00'),
+            total_rooms=100,
+            available_rooms=95
+        )
+        self.flat_hotel = Hotel.objects.create(
+            name='Budget Inn',
+            destination=self.destination,
+            address='1 Rue Simple',
+            description='Simple hotel',
+            star_rating=2,
+            price_per_night=Decimal('50.00'),
+            total_rooms=20,
+            available_rooms=20
+        )
+        # Next Monday, far enough ahead to pass search validation
+        today = date.today() + timedelta(days=14)
+        self.monday = today + timedelta(days=(7 - today.weekday()) % 7)
+
+    def test_flat_rate_without_plans(self):
+        totals = price_stays([self.flat_hotel], self.monday, self.monday + timedelta(days=3), rooms=2)
+        self.assertEqual(totals[self.flat_hotel.id], Decimal('300.00'))
+
+    def test_seasonal_plan_with_weekend_multiplier(self):
+        # Plan covers Friday-Sunday of the stay only; Saturday is charged 1.5x
+        RatePlan.objects.create(
+            hotel=self.hotel,
+            name='Summer weekend',
+            start_date=self.monday + timedelta(days=4),
+            end_date=self.monday + timedelta(days=6),
+            price_per_night=Decimal('200.00'),
+            weekday_multipliers=[1, 1, 1, 1, 1, 1.5, 1]
+        )
+        totals = price_stays([self.hotel, self.flat_hotel], self.monday, self.monday + timedelta(days=7))
+
+        # Mon-Thu at base (4 x 100) + Fri 200 + Sat 300 + Sun 200
+        self.assertEqual(totals[self.hotel.id], Decimal('1100.00'))
+        self.assertEqual(totals[self.flat_hotel.id], Decimal('350.00'))
+
+    def test_overlapping_plans_price_each_night_once(self):
+        # bulk_create skips RatePlan.clean(), so the overlap reaches the pricer
+        RatePlan.objects.bulk_create([
+            RatePlan(hotel=self.hotel, name='Spring', start_date=self.monday,
+                     end_date=self.monday + timedelta(days=4), price_per_night=Decimal('120.00')),
+            RatePlan(hotel=self.hotel, name='Festival', start_date=self.monday + timedelta(days=2),
+                     end_date=self.monday + timedelta(days=30), price_per_night=Decimal('200.00')),
+        ])
+        totals = price_stays([self.hotel], self.monday, self.monday + timedelta(days=7))
+
+        # Mon-Fri from the earlier plan, Sat-Sun from the later one
+        self.assertEqual(totals[self.hotel.id], Decimal('1000.00'))
+
+    def test_best_length_of_stay_discount_applies(self):
+        LengthOfStayDiscount.objects.create(hotel=self.hotel, min_nights=3, discount_percent=Decimal('5'))
+        LengthOfStayDiscount.objects.create(hotel=self.hotel, min_nights=7, discount_percent=Decimal('20'))
+
+        short_stay = price_stays([self.hotel], self.monday, self.monday + timedelta(days=3))
+        long_stay = price_stays([self.hotel], self.monday, self.monday + timedelta(days=7))
+
+        self.assertEqual(short_stay[self.hotel.id], Decimal('285.00'))
+        self.assertEqual(long_stay[self.hotel.id], Decimal('560.00'))
+
+    def test_search_reports_priced_stay_total(self):
+        RatePlan.objects.create(
+            hotel=self.hotel,
+            name='High season',
+            start_date=self.monday,
+            end_date=self.monday + timedelta(days=30),
+            price_per_night=Decimal('150.00')
+        )
+        url = reverse('hotels:search_hotels')
+        params = {
+            'destination': 'Grand',
+            'check_in_date': self.monday.isoformat(),
+            'check_out_date': (self.monday + timedelta(days=2)).isoformat(),
+            'rooms': 2
+        }
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hotels'][0]['total_price_for_stay'], 600.0)
+
+class AmenityMaskTest(APITestCase):
+    def setUp(self):
+        self.destination = Destination.objects.create(
+            name='Paris',
+            country='France',
+            description='City of Light'
+        )
+        self.pool = Amenity.objects.create(name='Pool')
+        self.wifi = Amenity.objects.create(name='WiFi')
+        self.spa = Amenity.objects.create(name='Spa')
+        self.resort = self.create_hotel('Resort', [self.pool, self.wifi, self.spa])
+        self.city = self.create_hotel('City Hotel', [self.wifi])
+        self.check_in = date.today() + timedelta(days=10)
+
+    def create_hotel(self, name, amenities):
+        hotel = Hotel.objects.create(
+            name=name,
+            destination=self.destination,
+            address='1 Test St',
+            description='Test hotel',
+            star_rating=4,
+            price_per_night=Decimal('100.00'),
+            total_rooms=10,
+            available_rooms=10
+        )
+        hotel.amenities.set(amenities)
+        return hotel
+
+    def test_amenities_get_distinct_bits(self):
+        bits = {self.pool.bit, self.wifi.bit, self.spa.bit}
+        self.assertEqual(len(bits), 3)
+
+    def test_mask_follows_m2m_changes(self):
+        self.resort.refresh_from_db()
+        self.assertEqual(self.resort.amenity_mask, self.pool.mask | self.wifi.mask | self.spa.mask)
+
+        self.resort.amenities.remove(self.spa)
+        self.resort.refresh_from_db()
+        self.assertEqual(self.resort.amenity_mask, self.pool.mask | self.wifi.mask)
+
+        self.pool.hotel_set.add(self.city)
+        self.city.refresh_from_db()
+        self.assertEqual(self.city.amenity_mask, self.pool.mask | self.wifi.mask)
+
+        self.wifi.hotel_set.clear()
+        self.resort.refresh_from_db()
+        self.city.refresh_from_db()
+        self.assertEqual(self.resort.amenity_mask, self.pool.mask)
+        self.assertEqual(self.city.amenity_mask, self.pool.mask)
+
+    def test_deleting_amenity_clears_bit(self):
+        pool_mask = self.pool.mask
+        self.pool.delete()
+        self.resort.refresh_from_db()
+        self.assertEqual(self.resort.amenity_mask & pool_mask, 0)
+
+    def test_search_requires_all_amenities_and_returns_facets(self):
+        url = reverse('hotels:search_hotels')
+        params = {
+            'check_in_date': self.check_in.isoformat(),
+            'check_out_date': (self.check_in + timedelta(days=2)).isoformat(),
+            'amenities': f'pool,{self.wifi.id}'
+        }
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([h['name'] for h in response.data['hotels']], ['Resort'])
+
+        # The amenity facet ignores the amenity filter itself
+        facets = {f['name']: f['count'] for f in response.data['facets']['amenities']}
+        self.assertEqual(facets, {'Pool': 1, 'Spa': 1, 'WiFi': 2})
+
+    def test_search_rejects_unknown_amenity(self):
+        url = reverse('hotels:search_hotels')
+        params = {
+            'check_in_date': self.check_in.isoformat(),
+            'check_out_date': (self.check_in + timedelta(days=2)).isoformat(),
+            'amenities': 'helipad'
+        }
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_rejects_non_decimal_digits(self):
+        url = reverse('hotels:search_hotels')
+        params = {
+            'check_in_date': self.check_in.isoformat(),
+            'check_out_date': (self.check_in + timedelta(days=2)).isoformat(),
+            'amenities': '²'
+        }
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class HotelSearchFacetTest(APITestCase):
+    def setUp(self):
+        self.paris = Destination.objects.create(name='Paris', country='France', description='City of Light')
+        self.rome = Destination.objects.create(name='Rome', country='Italy', description='Eternal City')
+        self.create_hotel('Paris Budget', self.paris, 3, '80.00')
+        self.create_hotel('Paris Palace', self.paris, 5, '450.00')
+        self.create_hotel('Rome Palace', self.rome, 5, '350.00')
+        self.check_in = date.today() + timedelta(days=10)
+        self.url = reverse('hotels:search_hotels')
+
+    def create_hotel(self, name, destination, stars, price):
+        return Hotel.objects.create(
+            name=name,
+            destination=destination,
+            address='1 Test St',
+            description='Test hotel',
+            star_rating=stars,
+            price_per_night=Decimal(price),
+            total_rooms=10,
+            available_rooms=10
+        )
+
+    def search(self, **params):
+        params.update({
+            'check_in_date': self.check_in.isoformat(),
+            'check_out_date': (self.check_in + timedelta(days=2)).isoformat(),
+        })
+        return self.client.get(self.url, params)
+
+    def test_each_facet_ignores_its_own_filter(self):
+        response = self.search(destination='Paris', star_rating=5)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([h['name'] for h in response.data['hotels']], ['Paris Palace'])
+
+        facets = response.data['facets']
+        stars = {f['value']: f['count'] for f in facets['star_rating']}
+        destinations = {f['name']: f['count'] for f in facets['destination']}
+        prices = {(f['min'], f['max']): f['count'] for f in facets['price']}
+
+        # Star counts within Paris, destination counts within 5-star hotels
+        self.assertEqual(stars[3], 1)
+        self.assertEqual(stars[5], 1)
+        self.assertEqual(destinations, {'Paris': 1, 'Rome': 1})
+        self.assertEqual(prices[(300, 500)], 1)
+        self.assertEqual(prices[(0, 100)], 0)
+
+    def test_facets_use_a_single_query(self):
+        from .views import hotel_search_facets
+        with self.assertNumQueries(2):  # amenity list + one grouped aggregate
+            hotel_search_facets(Hotel.objects.all(), {})
+
+    def test_facets_can_be_skipped(self):
+        response = self.search(facets='false')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('facets', response.data)
+        self.assertEqual(len(response.data['hotels']), 3)
+
+class HotelBookingAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.destination = Destination.objects.create(name='Paris', country='France', description='City of Light')
+        self.hotel = Hotel.objects.create(
+            name='Grand Hotel Paris',
+            destination=self.destination,
+            address='123 Champs Elysees',
+            description='Luxury hotel in Paris',
+            star_rating=5,
+            price_per_night=Decimal('100.00'),
+            total_rooms=10,
+            available_rooms=3
+        )
+        self.url = reverse('hotels:booking_create')
+        check_in = date.today() + timedelta(days=10)
+        self.payload = {
+            'hotel_id': self.hotel.id,
+            'check_in_date': check_in.isoformat(),
+            'check_out_date': (check_in + timedelta(days=2)).isoformat(),
+            'guests': 2,
+            'rooms': 2,
+            'total_price': '0.00'
+        }
+
+    def test_booking_decrements_rooms(self):
+        response = self.client.post(self.url, self.payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total_price'], '400.00')
+        self.hotel.refresh_from_db()
+        self.assertEqual(self.hotel.available_rooms, 1)
+
+    def test_booking_rejected_when_rooms_run_out(self):
+        self.client.post(self.url, self.payload)
+        response = self.client.post(self.url, self.payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.hotel.refresh_from_db()
+        self.assertEqual(self.hotel.available_rooms, 1)
+        self.assertEqual(HotelBooking.objects.count(), 1)
+
+    def test_retry_with_idempotency_key_replays_response(self):
+        first = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='retry-1')
+        second = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='retry-1')
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['booking_reference'], first.data['booking_reference'])
+        self.assertEqual(HotelBooking.objects.count(), 1)
+        self.hotel.refresh_from_db()
+        self.assertEqual(self.hotel.available_rooms, 1)
+
+    def test_idempotency_key_reused_with_different_payload(self):
+        self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='retry-2')
+        response = self.client.post(self.url, dict(self.payload, rooms=1), HTTP_IDEMPOTENCY_KEY='retry-2')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_sold_out_response_is_not_replayed(self):
+        self.hotel.available_rooms = 1
+        self.hotel.save()
+        response = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='retry-4')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.hotel.available_rooms = 3
+        self.hotel.save()
+        response = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='retry-4')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_abandoned_idempotency_claim_is_released_after_its_lease(self):
+        claim = IdempotencyKey.objects.create(
+            user=self.user, scope='hotel_booking', key='retry-3', request_fingerprint='left-by-a-dead-worker'
+        )
+        IdempotencyKey.objects.filter(pk=claim.pk).update(created_at=timezone.now() - timedelta(minutes=10))
+
+        response = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='retry-3')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(IdempotencyKey.objects.get(key='retry-3').is_complete)
+
+class HotelReviewFeedTest(APITestCase):
+    def setUp(self):
+        self.destination = Destination.objects.create(name='Paris', country='France', description='City of Light')
+        self.hotel = Hotel.objects.create(
+            name='Grand Hotel Paris',
+            destination=self.destination,
+            address='123 Champs Elysees',
+            description='Luxury hotel in Paris',
+            star_rating=5,
+            price_per_night=Decimal('100.00'),
+            total_rooms=10,
+            available_rooms=10
+        )
+        for i in range(5):
+            user = User.objects.create_user(username=f'reviewer{i}', email=f'r{i}@example.com', password='testpass123')
+            HotelReview.objects.create(
+                user=user, hotel=self.hotel, rating=5 if i % 2 else 3,
+                title=f'Review {i}', comment='Nice stay'
+            )
+        self.url = reverse('hotels:review_list_create', kwargs={'hotel_id': self.hotel.id})
+
+    def test_feed_is_cursor_paginated_newest_first(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual([r['title'] for r in response.data['results']], ['Review 4', 'Review 3'])
+
+        titles = []
+        next_url = response.data['next']
+        while next_url:
+            page = self.client.get(next_url)
+            titles.extend(r['title'] for r in page.data['results'])
+            next_url = page.data['next']
+        self.assertEqual(titles, ['Review 2', 'Review 1', 'Review 0'])
+
+    def test_feed_filters_by_rating(self):
+        response = self.client.get(self.url, {'rating': 5})
+        self.assertEqual([r['title'] for r in response.data['results']], ['Review 3', 'Review 1'])
+
+        response = self.client.get(self.url, {'rating': 9})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class RoomCombinationTest(APITestCase):
+    def setUp(self):
+        self.destination = Destination.objects.create(name='Paris', country='France', description='City of Light')
+        self.hotel = Hotel.objects.create(
+            name='Grand Hotel Paris',
+            destination=self.destination,
+            address='123 Champs Elysees',
+            description='Luxury hotel in Paris',
+            star_rating=5,
+            price_per_night=Decimal('100.00'),
+            total_rooms=20,
+            available_rooms=20
+        )
+        self.single = RoomType.objects.create(hotel=self.hotel, name='Single', max_occupancy=1,
+                                              bed_configuration='1 Twin', price_per_night=Decimal('60'), total_rooms=5)
+        self.double = RoomType.objects.create(hotel=self.hotel, name='Double', max_occupancy=2,
+                                              bed_configuration='1 Queen', price_per_night=Decimal('100'), total_rooms=5)
+        self.triple = RoomType.objects.create(hotel=self.hotel, name='Triple', max_occupancy=3,
+                                              bed_configuration='3 Twin', price_per_night=Decimal('130'), total_rooms=1)
+        self.check_in = date.today() + timedelta(days=10)
+        self.check_out = self.check_in + timedelta(days=2)
+
+    def combination(self, guests, rooms):
+        offers = load_room_offers([self.hotel.id], self.check_in, self.check_out)[self.hotel.id]
+        result = cheapest_room_combination(offers, guests, rooms)
+        if result is None:
+            return None
+        price, chosen = result
+        return price, {offer.name: count for offer, count in chosen}
+
+    def test_picks_cheapest_fitting_combination(self):
+        # Triple + single (190) beats two doubles (200)
+        self.assertEqual(self.combination(4, 2), (Decimal('190'), {'Single': 1, 'Triple': 1}))
+        self.assertEqual(self.combination(2, 1), (Decimal('100'), {'Double': 1}))
+        self.assertEqual(self.combination(3, 3), (Decimal('180'), {'Single': 3}))
+
+    def test_respects_nightly_inventory(self):
+        RoomInventory.objects.create(room_type=self.triple, date=self.check_in + timedelta(days=1), available=0)
+        self.assertEqual(self.combination(4, 2), (Decimal('200'), {'Double': 2}))
+
+    def test_party_that_cannot_fit(self):
+        self.assertIsNone(self.combination(7, 2))
+
+    def test_search_uses_room_types(self):
+        url = reverse('hotels:search_hotels')
+        params = {
+            'check_in_date': self.check_in.isoformat(),
+            'check_out_date': self.check_out.isoformat(),
+            'guests': 4,
+            'rooms': 2,
+        }
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        hotel = response.data['hotels'][0]
+        self.assertEqual(hotel['total_price_for_stay'], 380.0)
+        self.assertEqual({r['name']: r['count'] for r in hotel['room_combination']}, {'Single': 1, 'Triple': 1})
+
+        response = self.client.get(url, dict(params, guests=7))
+        self.assertEqual(response.data['hotels'], [])
+
+    def test_room_combinations_follow_rate_plans(self):
+        # The season lifts the hotel rate by half, and the rooms with it
+        RatePlan.objects.create(hotel=self.hotel, name='High season', start_date=self.check_in,
+                                end_date=self.check_out, price_per_night=Decimal('150.00'))
+        LengthOfStayDiscount.objects.create(hotel=self.hotel, min_nights=2, discount_percent=Decimal('10'))
+        response = self.client.get(reverse('hotels:search_hotels'), {
+            'check_in_date': self.check_in.isoformat(),
+            'check_out_date': self.check_out.isoformat(),
+            'guests': 4,
+            'rooms': 2,
+        })
+        # (60 + 130) x 1.5 x 2 nights, less 10%
+        self.assertEqual(response.data['hotels'][0]['total_price_for_stay'], 513.0)
+
+    def test_search_drops_sold_out_room_typed_hotel(self):
+        for room_type in (self.single, self.double, self.triple):
+            RoomInventory.objects.create(room_type=room_type, date=self.check_in, available=0)
+
+        self.assertEqual(load_room_offers([self.hotel.id], self.check_in, self.check_out), {self.hotel.id: []})
+        response = self.client.get(reverse('hotels:search_hotels'), {
+            'check_in_date': self.check_in.isoformat(),
+            'check_out_date': self.check_out.isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hotels'], [])
+
+class HotelCalendarTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='calendaruser',
+            email='calendar@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+
+        self.destination = Destination.objects.create(name='Paris', country='France', description='City of Light')
+        self.hotel = Hotel.objects.create(
+            name='Grand Hotel Paris',
+            destination=self.destination,
+            address='123 Champs Elysees',
+            description='Luxury hotel in Paris',
+            star_rating=5,
+            price_per_night=Decimal('100.00'),
+            total_rooms=10,
+            available_rooms=10
+        )
+        self.start = date.today() + timedelta(days=10)
+        self.url = reverse('hotels:hotel_calendar', kwargs={'pk': self.hotel.id})
+        self.params = {
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=5)).isoformat()
+        }
+
+    def book(self, offset, nights, rooms, status='confirmed'):
+        check_in = self.start + timedelta(days=offset)
+        return HotelBooking.objects.create(
+            user=self.user, hotel=self.hotel, booking_reference=f'HB{offset}{nights}{rooms}',
+            check_in_date=check_in, check_out_date=check_in + timedelta(days=nights),
+            nights=nights, guests=1, rooms=rooms, total_price=Decimal('0'), status=status
+        )
+
+    def test_calendar_applies_rate_plans_and_bookings(self):
+        RatePlan.objects.create(
+            hotel=self.hotel, name='Festival',
+            start_date=self.start + timedelta(days=1), end_date=self.start + timedelta(days=2),
+            price_per_night=Decimal('150.00')
+        )
+        self.book(0, 2, 3)
+        self.book(1, 3, 2)
+        self.book(0, 5, 4, status='cancelled')
+
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        nights = response.data['nights']
+        self.assertEqual([n['price'] for n in nights], [100.0, 150.0, 150.0, 100.0, 100.0])
+        self.assertEqual([n['rooms_left'] for n in nights], [7, 5, 8, 8, 10])
+
+    def test_calendar_uses_room_inventory(self):
+        suite = RoomType.objects.create(hotel=self.hotel, name='Suite', max_occupancy=4,
+                                        price_per_night=Decimal('300.00'), total_rooms=2)
+        double = RoomType.objects.create(hotel=self.hotel, name='Double', max_occupancy=2,
+                                         price_per_night=Decimal('120.00'), total_rooms=3)
+        RoomInventory.objects.create(room_type=double, date=self.start + timedelta(days=1), available=0)
+        RoomInventory.objects.create(room_type=suite, date=self.start + timedelta(days=2), available=1)
+
+        response = self.client.get(self.url, self.params)
+        nights = response.data['nights']
+        self.assertEqual([n['price'] for n in nights[:3]], [120.0, 300.0, 120.0])
+        self.assertEqual([n['rooms_left'] for n in nights[:3]], [5, 2, 4])
+
+    def test_room_type_calendar_follows_rate_plans(self):
+        RoomType.objects.create(hotel=self.hotel, name='Double', max_occupancy=2,
+                                price_per_night=Decimal('120.00'), total_rooms=3)
+        RatePlan.objects.create(
+            hotel=self.hotel, name='Festival',
+            start_date=self.start + timedelta(days=1), end_date=self.start + timedelta(days=1),
+            price_per_night=Decimal('150.00')
+        )
+        response = self.client.get(self.url, self.params)
+        self.assertEqual([n['price'] for n in response.data['nights'][:3]], [120.0, 180.0, 120.0])
+
+    def test_calendar_months_are_cached_until_a_booking(self):
+        self.client.get(self.url, self.params)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, self.params)
+        self.assertEqual(response.data['nights'][0]['rooms_left'], 10)
+
+        # Creating a booking bumps the hotel's calendar version once it commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(0, 1, 4)
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.data['nights'][0]['rooms_left'], 6)
+
+    def test_calendar_version_bumps_after_commit(self):
+        room_type = RoomType.objects.create(hotel=self.hotel, name='Double', max_occupancy=2,
+                                            price_per_night=Decimal('120.00'), total_rooms=3)
+        version = calendar_version(self.hotel.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            # The room type is already loaded, so the receiver needs no query of its own
+            with self.assertNumQueries(1):
+                RoomInventory.objects.create(room_type=room_type, date=self.start, available=1)
+            self.assertEqual(calendar_version(self.hotel.id), version)
+        self.assertNotEqual(calendar_version(self.hotel.id), version)
+
+    def test_calendar_rejects_long_windows(self):
+        response = self.client.get(self.url, {
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=90)).isoformat()
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_room_type_booking_takes_nightly_inventory(self):
+        double = RoomType.objects.create(hotel=self.hotel, name='Double', max_occupancy=2,
+                                         price_per_night=Decimal('120.00'), total_rooms=1)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        payload = {
+            'hotel_id': self.hotel.id,
+            'room_type_id': double.id,
+            'check_in_date': self.start.isoformat(),
+            'check_out_date': (self.start + timedelta(days=2)).isoformat(),
+            'guests': 2,
+            'rooms': 1,
+            'total_price': '0.00'
+        }
+
+        response = self.client.post(reverse('hotels:booking_create'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total_price'], '240.00')
+        self.assertEqual(list(double.inventory.values_list('available', flat=True)), [0, 0])
+
+        # The second night is sold out, so the whole booking is rolled back
+        payload['check_in_date'] = (self.start + timedelta(days=1)).isoformat()
+        payload['check_out_date'] = (self.start + timedelta(days=3)).isoformat()
+        response = self.client.post(reverse('hotels:booking_create'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(double.inventory.count(), 2)
+        self.hotel.refresh_from_db()
+        self.assertEqual(self.hotel.available_rooms, 9)
+
+    def test_room_typed_hotel_requires_room_type(self):
+        RoomType.objects.create(hotel=self.hotel, name='Double', max_occupancy=2,
+                                price_per_night=Decimal('120.00'), total_rooms=1)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.post(reverse('hotels:booking_create'), {
+            'hotel_id': self.hotel.id,
+            'check_in_date': self.start.isoformat(),
+            'check_out_date': (self.start + timedelta(days=2)).isoformat(),
+            'guests': 2,
+            'rooms': 1,
+            'total_price': '0.00'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('room_type_id', response.data)
+        self.assertFalse(HotelBooking.objects.exists())
+
+class SimilarHotelTest(APITestCase):
+    def setUp(self):
+        paris = Destination.objects.create(name='Paris', country='France', description='City of Light')
+        tokyo = Destination.objects.create(name='Tokyo', country='Japan', description='Neon city')
+        spa = Amenity.objects.create(name='Spa')
+        self.ritz = self.create_hotel('Ritz', paris, 5, '900.00', [spa])
+        self.crillon = self.create_hotel('Crillon', paris, 5, '850.00', [spa])
+        self.hostel = self.create_hotel('Paris Hostel', paris, 1, '40.00', [])
+        self.capsule = self.create_hotel('Capsule Inn', tokyo, 1, '35.00', [])
+
+    def create_hotel(self, name, destination, stars, price, amenities):
+        hotel = Hotel.objects.create(
+            name=name, destination=destination, address='1 Test St', description='Test hotel',
+            star_rating=stars, price_per_night=Decimal(price), total_rooms=10, available_rooms=10
+        )
+        hotel.amenities.set(amenities)
+        return hotel
+
+    def test_neighbours_rank_closest_hotels_first(self):
+        self.assertEqual(rebuild_hotel_neighbours(k=2), 8)
+        ranked = list(HotelNeighbour.objects.filter(hotel=self.ritz).values_list('neighbour_id', flat=True))
+        self.assertEqual(ranked, [self.crillon.id, self.hostel.id])
+
+        # Rebuilding replaces the table instead of appending to it
+        rebuild_hotel_neighbours(k=1)
+        self.assertEqual(HotelNeighbour.objects.count(), 4)
+
+    def test_detail_view_includes_similar_hotels(self):
+        rebuild_hotel_neighbours(k=2)
+        response = self.client.get(reverse('hotels:hotel_detail', kwargs={'pk': self.ritz.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([h['name'] for h in response.data['similar_hotels']], ['Crillon', 'Paris Hostel'])
+
+class CatalogCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.destination = Destination.objects.create(name='Paris', country='France', description='City of Light')
+        self.category = HotelCategory.objects.create(name='Luxury', description='Luxury hotels')
+        self.hotel = Hotel.objects.create(
+            name='Grand Hotel Paris',
+            destination=self.destination,
+            address='123 Champs Elysees',
+            description='Luxury hotel in Paris',
+            star_rating=5,
+            price_per_night=Decimal('299.99'),
+            total_rooms=100,
+            available_rooms=95,
+            is_featured=True
+        )
+        self.user = User.objects.create_user(username='reviewer', email='reviewer@example.com', password='testpass123')
+
+    def test_repeat_requests_are_served_from_cache(self):
+        for name, params in (('hotels:category_list', {}), ('hotels:hotel_list', {'featured': 'true'})):
+            url = reverse(name)
+            first = self.client.get(url, params)
+            with self.assertNumQueries(0):
+                second = self.client.get(url, params)
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.data, first.data)
+
+    def test_destination_list_is_cached_until_a_save(self):
+        url = reverse('hotels:destination_list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Destination.objects.create(name='Rome', country='Italy', description='Eternal City')
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_fresh_versions_are_filled_from_the_primary(self):
+        url = reverse('hotels:category_list')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Palace'
+            self.category.save()
+        with patch('travel_api.catalog_cache.primary_reads', wraps=primary_reads) as primary:
+            response = self.client.get(url)
+            self.assertEqual(response.data[0]['name'], 'Palace')
+            primary.assert_called_once()
+
+            # Once the replicas have had time to catch up, fills go back to them
+            cache.delete(catalog_bumped_key(HotelCategory))
+            self.client.get(reverse('hotels:hotel_list'), {'featured': 'true'})
+            primary.assert_called_once()
+
+    def test_unfeatured_hotel_list_is_not_cached(self):
+        url = reverse('hotels:hotel_list')
+        self.client.get(url)
+        Hotel.objects.filter(pk=self.hotel.pk).update(name='Renamed')
+        response = self.client.get(url)
+        self.assertEqual(response.data['results'][0]['name'], 'Renamed')
+
+    def test_saves_invalidate_cached_lists(self):
+        url = reverse('hotels:hotel_list')
+        self.client.get(url, {'featured': 'true'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotel.name = 'Hotel Lumiere'
+            self.hotel.save()
+        response = self.client.get(url, {'featured': 'true'})
+        self.assertEqual(response.data['results'][0]['name'], 'Hotel Lumiere')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.destination.name = 'Paris Centre'
+            self.destination.save()
+        response = self.client.get(url, {'featured': 'true'})
+        self.assertEqual(response.data['results'][0]['destination']['name'], 'Paris Centre')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            HotelReview.objects.create(hotel=self.hotel, user=self.user, rating=4, title='Nice', comment='Lovely stay')
+        response = self.client.get(url, {'featured': 'true'})
+        self.assertEqual(response.data['results'][0]['average_rating'], 4)
+
+        category_url = reverse('hotels:category_list')
+        self.client.get(category_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(self.client.get(category_url).data, [])
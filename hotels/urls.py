@@ -6,6 +6,12 @@ app_name = 'hotels'
 urlpatterns = [
     path('', views.HotelListView.as_view(), name='hotel_list'),
     path('categories/', views.HotelCategoryListView.as_view(), name='category_list'),
+    path('destinations/', views.DestinationListView.as_view(), name='destination_list'),
     path('search/', views.search_hotels, name='search_hotels'),
+    path('bookings/', views.HotelBookingListView.as_view(), name='booking_list'),
+    path('bookings/create/', views.HotelBookingCreateView.as_view(), name='booking_create'),
+    path('bookings/<int:pk>/', views.HotelBookingDetailView.as_view(), name='booking_detail'),
+    path('<int:hotel_id>/reviews/', views.HotelReviewListCreateView.as_view(), name='review_list_create'),
+    path('<int:pk>/calendar/', views.hotel_calendar, name='hotel_calendar'),
     path('<int:pk>/', views.HotelDetailView.as_view(), name='hotel_detail'),
 ]
\ No newline at end of file
@@ -1,42 +1,63 @@
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
-from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q, F
+from django.db.models.lookups import Exact
 from datetime import datetime
 
-from .models import Destination, Hotel, HotelBooking, HotelReview, HotelCategory
+from .models import Destination, Hotel, HotelBooking, HotelReview, HotelCategory, Amenity, HotelNeighbour
+from .pricing import price_stays
+from .rooms import load_room_offers, cheapest_room_combination, reserve_room_inventory
+from .calendar import get_calendar
+from management.idempotency import idempotent, retryable_error
+from travel_api.pagination import ReviewCursorPagination
+from travel_api.facets import combine, facet_counts, price_bucket_options, price_facet
+from travel_api.slugs import lookup_id
+from travel_api.catalog_cache import CachedCatalogMixin
+from travel_api.throttling import SEARCH_THROTTLES
 from .serializers import (
     DestinationSerializer,
     HotelSerializer,
     HotelListSerializer,
     HotelSearchSerializer,
+    HotelCalendarSerializer,
     HotelBookingSerializer,
     HotelBookingListSerializer,
     HotelReviewSerializer,
     HotelCategorySerializer
 )
 
-class DestinationListView(generics.ListAPIView):
+class DestinationListView(CachedCatalogMixin, generics.ListAPIView):
     queryset = Destination.objects.all()
     serializer_class = DestinationSerializer
     permission_classes = [permissions.AllowAny]
+    cache_models = [Destination]
 
     def get_queryset(self):
-        queryset = Destination.objects.all()
+        queryset = Destination.objects.order_by('name')
         popular = self.request.query_params.get('popular', None)
         if popular:
             queryset = queryset.filter(is_popular=True)
         return queryset
 
-class HotelCategoryListView(generics.ListAPIView):
+class HotelCategoryListView(CachedCatalogMixin, generics.ListAPIView):
     queryset = HotelCategory.objects.all().order_by('name')
     serializer_class = HotelCategorySerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
+    cache_models = [HotelCategory]
 
-class HotelListView(generics.ListAPIView):
+class HotelListView(CachedCatalogMixin, generics.ListAPIView):
     serializer_class = HotelListSerializer
     permission_classes = [permissions.AllowAny]
+    # Review changes bump the Hotel version, for average_rating
+    cache_models = [Hotel, Destination]
+
+    def should_cache(self, request):
+        # The featured shelf is what the home page asks for on every visit
+        return bool(request.query_params.get('featured'))
 
     def get_queryset(self):
         queryset = Hotel.objects.all()
@@ -50,50 +71,151 @@ class HotelDetailView(generics.RetrieveAPIView):
     serializer_class = HotelSerializer
     permission_classes = [permissions.AllowAny]
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        
+        # Precomputed by build_hotel_recommendations; read through the (hotel, rank) index
+        neighbours = HotelNeighbour.objects.filter(hotel_id=response.data['id']).select_related(
+            'neighbour__destination'
+        ).prefetch_related('neighbour__reviews')
+        response.data['similar_hotels'] = HotelListSerializer(
+            [n.neighbour for n in neighbours], many=True, context=self.get_serializer_context()
+        ).data
+        return response
+
+# Nightly price buckets for the price facet; None means open-ended
+HOTEL_PRICE_BUCKETS = [(0, 100), (100, 200), (200, 300), (300, 500), (500, None)]
+
+def hotel_search_facets(base_queryset, filters):
+    """Star rating, price, destination and amenity counts in one grouped query"""
+    amenities = list(Amenity.objects.exclude(bit__isnull=True).order_by('name'))
+    counts = facet_counts(
+        base_queryset,
+        filters,
+        option_facets={
+            'star_rating': ('star_rating', {
+                value: Q(star_rating=value) for value, _ in Hotel.STAR_RATING
+            }),
+            'price': ('price', price_bucket_options('price_per_night', HOTEL_PRICE_BUCKETS)),
+            'amenities': ('amenities', {
+                amenity: Q(Exact(F('amenity_mask').bitand(amenity.mask), amenity.mask))
+                for amenity in amenities
+            }),
+        },
+        group_facets={
+            'destination': ('destination', ['destination_id', 'destination__name', 'destination__country', 'destination__slug']),
+        }
+    )
+
+    return {
+        'star_rating': [
+            {'value': value, 'count': count} for value, count in counts['star_rating'].items()
+        ],
+        'price': price_facet(counts['price'], HOTEL_PRICE_BUCKETS),
+        'destination': [
+            {'id': dest_id, 'name': name, 'country': country, 'slug': slug, 'count': count}
+            for (dest_id, name, country, slug), count in sorted(counts['destination'].items(), key=lambda i: i[0][1])
+        ],
+        'amenities': [
+            {'id': amenity.id, 'name': amenity.name, 'count': count}
+            for amenity, count in counts['amenities'].items()
+        ],
+    }
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes(SEARCH_THROTTLES)
 def search_hotels(request):
     serializer = HotelSearchSerializer(data=request.query_params)
     if serializer.is_valid():
         data = serializer.validated_data
         
-        queryset = Hotel.objects.all()
+        # Filters that are not faceted narrow the base set every facet is counted over
+        rooms_needed = data['rooms']
+        # Filter by availability (simplified - in production, check actual bookings)
+        base_queryset = Hotel.objects.filter(available_rooms__gte=rooms_needed)
         
-        # Filter by destination
+        # Faceted filters are kept apart so each facet can ignore its own
+        filters = {}
+        
+        # Filter by destination: destination_slug is an indexed equality, destination a text match
+        destination_filter = Q()
+        if data.get('destination_slug'):
+            # An unknown slug matches nothing rather than falling back to text
+            destination_filter &= Q(destination_id=lookup_id(Destination.objects.all(), data['destination_slug']))
         if data.get('destination'):
-            queryset = queryset.filter(
+            destination_filter &= (
                 Q(destination__name__icontains=data['destination']) |
                 Q(destination__country__icontains=data['destination']) |
                 Q(name__icontains=data['destination'])
             )
-        
-        # Filter by availability (simplified - in production, check actual bookings)
-        rooms_needed = data['rooms']
-        queryset = queryset.filter(available_rooms__gte=rooms_needed)
+        if destination_filter:
+            filters['destination'] = destination_filter
         
         # Filter by price range
+        price_filter = Q()
         if data.get('min_price'):
-            queryset = queryset.filter(price_per_night__gte=data['min_price'])
+            price_filter &= Q(price_per_night__gte=data['min_price'])
         if data.get('max_price'):
-            queryset = queryset.filter(price_per_night__lte=data['max_price'])
+            price_filter &= Q(price_per_night__lte=data['max_price'])
+        if price_filter:
+            filters['price'] = price_filter
         
         # Filter by star rating
         if data.get('star_rating'):
-            queryset = queryset.filter(star_rating=data['star_rating'])
+            filters['star_rating'] = Q(star_rating=data['star_rating'])
+        
+        # Filter by amenities: every requested bit must be set in the denormalized mask
+        if data.get('amenities'):
+            required_mask = 0
+            for amenity in data['amenities']:
+                required_mask |= amenity.mask
+            filters['amenities'] = Q(Exact(F('amenity_mask').bitand(required_mask), required_mask))
+        
+        queryset = base_queryset.filter(combine(filters))
         
         # Calculate nights for pricing display
         check_in = data['check_in_date']
         check_out = data['check_out_date']
         nights = (check_out - check_in).days
         
-        hotels = HotelListSerializer(queryset, many=True).data
+        hotel_objects = list(queryset)
+        
+        # Hotels that define room types must fit the party into the requested rooms;
+        # sold-out ones have an empty offer list and drop out here too
+        room_offers = load_room_offers([hotel.id for hotel in hotel_objects], check_in, check_out)
+        room_combinations = {}
+        for hotel in hotel_objects:
+            if hotel.id in room_offers:
+                combination = cheapest_room_combination(room_offers[hotel.id], data['guests'], rooms_needed)
+                if combination is not None:
+                    room_combinations[hotel.id] = combination
+        hotel_objects = [
+            hotel for hotel in hotel_objects
+            if hotel.id not in room_offers or hotel.id in room_combinations
+        ]
+        
+        # Room combinations go through the same rate plans as flat-rate hotels
+        stay_totals = price_stays(
+            hotel_objects, check_in, check_out, rooms=rooms_needed,
+            room_rates={hotel_id: price for hotel_id, (price, _) in room_combinations.items()}
+        )
+        hotels = HotelListSerializer(hotel_objects, many=True).data
         
-        # Add calculated total price for the stay
+        # Add calculated total price for the stay (seasonal rates and stay discounts applied)
         for hotel in hotels:
-            hotel['total_price_for_stay'] = float(hotel['price_per_night']) * nights * rooms_needed
+            hotel['total_price_for_stay'] = float(stay_totals[hotel['id']])
+            combination = room_combinations.get(hotel['id'])
+            if combination:
+                _, rooms_chosen = combination
+                hotel['room_combination'] = [
+                    {'room_type_id': offer.room_type_id, 'name': offer.name,
+                     'max_occupancy': offer.capacity, 'count': count}
+                    for offer, count in rooms_chosen
+                ]
             hotel['nights'] = nights
         
-        return Response({
+        result = {
             'hotels': hotels,
             'search_params': {
                 'check_in_date': check_in,
@@ -102,6 +224,33 @@ def search_hotels(request):
                 'guests': data['guests'],
                 'rooms': data['rooms']
             }
+        }
+        if data['facets']:
+            result['facets'] = hotel_search_facets(base_queryset, filters)
+        
+        return Response(result)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes(SEARCH_THROTTLES)
+def hotel_calendar(request, pk):
+    try:
+        hotel = Hotel.objects.get(pk=pk)
+    except Hotel.DoesNotExist:
+        return Response({'error': 'Hotel not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    serializer = HotelCalendarSerializer(data=request.query_params)
+    if serializer.is_valid():
+        start = serializer.validated_data['start_date']
+        end = serializer.validated_data['end_date']
+        
+        return Response({
+            'hotel_id': hotel.id,
+            'start_date': start,
+            'end_date': end,
+            'nights': get_calendar(hotel, start, end)
         })
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -110,23 +259,35 @@ class HotelBookingCreateView(generics.CreateAPIView):
     serializer_class = HotelBookingSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent('hotel_booking')
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Check hotel availability
-        hotel = Hotel.objects.get(id=serializer.validated_data['hotel_id'])
+        hotel_id = serializer.validated_data['hotel_id']
         rooms_needed = serializer.validated_data['rooms']
         
-        if hotel.available_rooms < rooms_needed:
-            return Response({'error': 'Not enough rooms available'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-        
-        booking = serializer.save()
-        
-        # Update available rooms (simplified - in production, use proper booking system)
-        hotel.available_rooms -= rooms_needed
-        hotel.save()
+        with transaction.atomic():
+            # Take the rooms with a conditional decrement so concurrent bookings cannot oversell
+            reserved = Hotel.objects.filter(
+                id=hotel_id, available_rooms__gte=rooms_needed
+            ).update(available_rooms=F('available_rooms') - rooms_needed)
+            
+            if not reserved:
+                if not Hotel.objects.filter(id=hotel_id).exists():
+                    return Response({'error': 'Hotel not found'}, status=status.HTTP_404_NOT_FOUND)
+                return retryable_error('Not enough rooms available')
+            
+            # A specific room type also needs its nightly inventory for every night
+            room_type = serializer.validated_data.get('room_type')
+            if room_type is not None:
+                check_in = serializer.validated_data['check_in_date']
+                check_out = serializer.validated_data['check_out_date']
+                if not reserve_room_inventory(room_type, check_in, check_out, rooms_needed):
+                    transaction.set_rollback(True)
+                    return retryable_error(f'Not enough {room_type.name} rooms available for these dates')
+            
+            booking = serializer.save()
         
         return Response(HotelBookingSerializer(booking).data, status=status.HTTP_201_CREATED)
 
@@ -148,9 +309,20 @@ class HotelReviewListCreateView(generics.ListCreateAPIView):
     serializer_class = HotelReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    pagination_class = ReviewCursorPagination
+
     def get_queryset(self):
         hotel_id = self.kwargs['hotel_id']
-        return HotelReview.objects.filter(hotel_id=hotel_id).order_by('-created_at')
+        queryset = HotelReview.objects.filter(hotel_id=hotel_id).select_related('user')
+        
+        # Optional rating filter, served by the (hotel, rating, created_at, id) index
+        rating = self.request.query_params.get('rating')
+        if rating:
+            if rating not in {'1', '2', '3', '4', '5'}:
+                raise ValidationError({'rating': 'Rating must be an integer from 1 to 5'})
+            queryset = queryset.filter(rating=int(rating))
+        
+        return queryset
 
     def perform_create(self, serializer):
         hotel_id = self.kwargs['hotel_id']
@@ -1,13 +1,30 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.forms.models import BaseInlineFormSet
 from django.utils.html import format_html
 from .models import Booking, BookingItem
+from .items import resolve_content_objects
+
+class BookingItemFormSet(BaseInlineFormSet):
+    def get_queryset(self):
+        # Each inline row's label is str(item), which would otherwise load its object on its own
+        if not hasattr(self, '_resolved_items'):
+            queryset = super().get_queryset().select_related('booking', 'content_type')
+            self._resolved_items = resolve_content_objects(queryset)
+        return self._resolved_items
 
 class BookingItemInline(admin.TabularInline):
     model = BookingItem
+    formset = BookingItemFormSet
     extra = 0
     readonly_fields = ('created_at',)
     fields = ('content_type', 'object_id', 'quantity', 'price', 'created_at')
 
+class BookingItemChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_list = resolve_content_objects(self.result_list)
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('booking_reference', 'user_email', 'status', 'total_amount', 'booking_date', 'travel_date')
@@ -35,7 +52,7 @@ class BookingAdmin(admin.ModelAdmin):
 
 @admin.register(BookingItem)
 class BookingItemAdmin(admin.ModelAdmin):
-    list_display = ('booking_reference', 'content_type', 'object_id', 'quantity', 'price', 'created_at')
+    list_display = ('booking_reference', 'content_type', 'item', 'quantity', 'price', 'created_at')
     list_filter = ('content_type', 'created_at')
     search_fields = ('booking__booking_reference',)
     ordering = ('-created_at',)
@@ -45,5 +62,12 @@ class BookingItemAdmin(admin.ModelAdmin):
         return obj.booking.booking_reference
     booking_reference.short_description = 'Booking Reference'
     
+    def item(self, obj):
+        return obj.content_object if obj.content_object is not None else f"Deleted #{obj.object_id}"
+    item.short_description = 'Item'
+    
+    def get_changelist(self, request, **kwargs):
+        return BookingItemChangeList
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('booking', 'content_type')
\ No newline at end of file
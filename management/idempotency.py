@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from datetime import timedelta
+from functools import wraps
+import hashlib
+import json
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+def request_fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def retryable_error(message, status_code=status.HTTP_400_BAD_REQUEST):
+    """An error that depends on current inventory rather than the request, e.g. sold out.
+
+    ``idempotent`` does not store it, so retrying with the same key once
+    rooms or seats free up runs the request again instead of replaying this.
+    """
+    response = Response({'error': message}, status=status_code)
+    response.retryable = True
+    return response
+
+def idempotent(scope):
+    """Replay the stored response when a client retries a POST with the same Idempotency-Key.
+
+    The first request claims the key before doing any work, so a retry that
+    arrives while the original is still running gets 409 instead of a second
+    booking. Responses below 500 are stored; server errors, exceptions and
+    ``retryable_error`` responses release the key so the client can try again. A claim that is still
+    incomplete after IDEMPOTENCY_LEASE_SECONDS is treated as abandoned, so a
+    worker that died mid-request does not block the key until its TTL ends.
+    """
+    def decorator(create):
+        @wraps(create)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key or not request.user.is_authenticated:
+                return create(self, request, *args, **kwargs)
+
+            if len(key) > 255:
+                return Response({'error': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            fingerprint = request_fingerprint(request)
+            ttl = timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+            lease = timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LEASE_SECONDS', 300))
+            lookup = {'user': request.user, 'scope': scope, 'key': key}
+            now = timezone.now()
+
+            # Keys past their TTL, and claims past their lease, may be reused for new work
+            IdempotencyKey.objects.filter(
+                Q(created_at__lt=now - ttl) | Q(response_status__isnull=True, created_at__lt=now - lease),
+                **lookup
+            ).delete()
+
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(request_fingerprint=fingerprint, **lookup)
+            except IntegrityError:
+                existing = IdempotencyKey.objects.filter(**lookup).first()
+                if existing is None:
+                    return Response({'error': 'A request with this Idempotency-Key is still in progress'},
+                                    status=status.HTTP_409_CONFLICT)
+                if existing.request_fingerprint != fingerprint:
+                    return Response({'error': f'{IDEMPOTENCY_HEADER} was already used with a different request'},
+                                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if not existing.is_complete:
+                    return Response({'error': 'A request with this Idempotency-Key is still in progress'},
+                                    status=status.HTTP_409_CONFLICT)
+
+                response = Response(existing.response_body, status=existing.response_status)
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            try:
+                response = create(self, request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+
+            # Filtered writes, in case a retry took over the claim after its lease ran out
+            if response.status_code >= 500 or getattr(response, 'retryable', False):
+                IdempotencyKey.objects.filter(pk=record.pk).delete()
+            else:
+                IdempotencyKey.objects.filter(pk=record.pk).update(
+                    response_status=response.status_code,
+                    response_body=json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+                )
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,43 @@
+from collections import defaultdict
+from django.contrib.contenttypes.models import ContentType
+
+from .models import BookingItem
+
+# Foreign keys each item type needs to render, selected in the same query
+CONTENT_OBJECT_RELATED = {
+    ('flights', 'flight'): ['airline', 'departure_airport', 'arrival_airport'],
+    ('hotels', 'hotel'): ['destination'],
+    ('packages', 'travelpackage'): ['category', 'destination'],
+}
+
+def resolve_content_objects(items):
+    """Load the content_object of every booking item with one in_bulk query per content type.
+
+    The objects are stored in each item's GenericForeignKey cache, so
+    ``item.content_object`` and ``str(item)`` no longer query. Items whose
+    object has been deleted resolve to None. Returns the items as a list.
+    """
+    items = list(items)
+    ids_by_type = defaultdict(set)
+    for item in items:
+        ids_by_type[item.content_type_id].add(item.object_id)
+
+    objects_by_type = {}
+    for content_type_id, object_ids in ids_by_type.items():
+        # get_for_id is served from ContentType's own cache
+        content_type = ContentType.objects.get_for_id(content_type_id)
+        model = content_type.model_class()
+        if model is None:
+            objects_by_type[content_type_id] = {}
+            continue
+        queryset = model._default_manager.all()
+        related = CONTENT_OBJECT_RELATED.get((content_type.app_label, content_type.model))
+        if related:
+            queryset = queryset.select_related(*related)
+        objects_by_type[content_type_id] = queryset.in_bulk(object_ids)
+
+    for item in items:
+        BookingItem.content_object.set_cached_value(
+            item, objects_by_type[item.content_type_id].get(item.object_id)
+        )
+    return items
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.serializers.json import DjangoJSONEncoder
 import uuid
 
 User = get_user_model()
@@ -27,6 +28,12 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # "My trips" timeline: a user's bookings in travel date order
+            models.Index(fields=['user', 'travel_date', 'id'], name='booking_trips_idx'),
+        ]
+
     def __str__(self):
         return f"Booking {self.booking_reference}"
 
@@ -40,4 +47,24 @@ class BookingItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.booking.booking_reference} - {self.content_object}"
\ No newline at end of file
+        return f"{self.booking.booking_reference} - {self.content_object}"
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a POST made with an Idempotency-Key header"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    scope = models.CharField(max_length=50)  # Endpoint the key was used on
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'scope', 'key']
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.user_id})"
+
+    @property
+    def is_complete(self):
+        return self.response_status is not None
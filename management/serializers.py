@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from .models import Booking, BookingItem
+from .items import resolve_content_objects
+
+class BookingItemSerializer(serializers.ModelSerializer):
+    item_type = serializers.CharField(source='content_type.model', read_only=True)
+    description = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BookingItem
+        fields = ['id', 'item_type', 'object_id', 'description', 'quantity', 'price']
+
+    def get_description(self, obj):
+        return str(obj.content_object) if obj.content_object is not None else None
+
+class BookingListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        bookings = list(data.all() if hasattr(data, 'all') else data)
+        # Resolve every item on the page together instead of one query per item
+        resolve_content_objects([item for booking in bookings for item in booking.items.all()])
+        return super().to_representation(bookings)
+
+class BookingSerializer(serializers.ModelSerializer):
+    items = BookingItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Booking
+        list_serializer_class = BookingListSerializer
+        fields = ['id', 'booking_reference', 'status', 'travel_date', 'total_amount', 
+                 'special_requests', 'items', 'booking_date', 'created_at']
@@ -1,15 +1,24 @@
-from django.test import TestCase
+from django.test import TestCase, SimpleTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from decimal import Decimal
 from datetime import date
+from types import SimpleNamespace
 from .models import Booking, BookingItem
-from hotels.models import Hotel, Destination
-from flights.models import Flight, Airline, Airport
-from packages.models import TravelPackage, PackageCategory
+from .items import resolve_content_objects
+from .serializers import BookingSerializer
+from hotels.models import Hotel, Destination, HotelBooking
+from flights.models import Flight, Airline, Airport, FlightBooking
+from packages.models import TravelPackage, PackageCategory, PackageBooking
+from travel_api.routers import PIN_COOKIE, ReplicaRouter, ReplicaPinningMiddleware, pin_key, primary_reads
 from django.utils import timezone
 from datetime import timedelta
 
@@ -91,6 +100,49 @@ class BookingItemModelTest(TestCase):
         self.assertEqual(booking_item.quantity, 2)
         self.assertEqual(booking_item.price, Decimal('399.98'))
 
+    def test_resolve_content_objects_batches_by_type(self):
+        hotel_type = ContentType.objects.get_for_model(Hotel)
+        package_type = ContentType.objects.get_for_model(TravelPackage)
+        second = Hotel.objects.create(
+            name='Second Hotel', destination=self.destination, address='1 Rue', description='Second',
+            star_rating=3, price_per_night=Decimal('99.99'), total_rooms=10, available_rooms=10
+        )
+        package = TravelPackage.objects.create(
+            name='Paris City Break', category=PackageCategory.objects.create(name='City Break'),
+            destination=self.destination, description='3 days in Paris', package_type='full_package',
+            duration_days=3, duration_nights=2, price_per_person=Decimal('799.99'), max_participants=10
+        )
+        for content_type, object_id in ((hotel_type, self.hotel.id), (hotel_type, second.id),
+                                        (package_type, package.id), (hotel_type, 999999)):
+            BookingItem.objects.create(
+                booking=self.booking, content_type=content_type, object_id=object_id, price=Decimal('10.00')
+            )
+
+        items = BookingItem.objects.select_related('booking').order_by('id')
+        ContentType.objects.get_for_models(Hotel, TravelPackage)
+        # One query for the items, then one per content type
+        with self.assertNumQueries(3):
+            items = resolve_content_objects(items)
+        with self.assertNumQueries(0):
+            labels = [str(item) for item in items]
+            self.assertEqual(items[2].content_object.category.name, 'City Break')
+
+        self.assertEqual([item.content_object for item in items], [self.hotel, second, package, None])
+        self.assertEqual(labels[0], 'BK123456 - Test Hotel')
+
+    def test_booking_list_serializes_items_in_batches(self):
+        hotel_type = ContentType.objects.get_for_model(Hotel)
+        for _ in range(3):
+            BookingItem.objects.create(
+                booking=self.booking, content_type=hotel_type, object_id=self.hotel.id, price=Decimal('10.00')
+            )
+        bookings = Booking.objects.prefetch_related('items__content_type')
+        # Bookings, their items, the content types, then a single hotel query
+        with self.assertNumQueries(4):
+            data = BookingSerializer(bookings, many=True).data
+        self.assertEqual([item['item_type'] for item in data[0]['items']], ['hotel'] * 3)
+        self.assertEqual(data[0]['items'][0]['description'], str(self.hotel))
+
 class BookingIntegrationTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -247,4 +299,192 @@ class BookingIntegrationTest(TestCase):
         )
         
         self.assertEqual(booking.special_requests, 'Vegetarian meals, late check-in')
-        self.assertEqual(booking.notes, 'Customer prefers ground floor room')
\ No newline at end of file
+        self.assertEqual(booking.notes, 'Customer prefers ground floor room')
+
+class MyTripsAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tripper',
+            email='tripper@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+
+        destination = Destination.objects.create(name='Paris', country='France', description='City of Light')
+        self.hotel = Hotel.objects.create(
+            name='Test Hotel', destination=destination, address='123 Test St', description='Test hotel',
+            star_rating=4, price_per_night=Decimal('199.99'), total_rooms=100, available_rooms=95
+        )
+        airline = Airline.objects.create(code='AA', name='American Airlines')
+        lax = Airport.objects.create(code='LAX', name='LAX Airport', city='Los Angeles', country='USA')
+        cdg = Airport.objects.create(code='CDG', name='CDG Airport', city='Paris', country='France')
+        self.package = TravelPackage.objects.create(
+            name='Paris City Break', category=PackageCategory.objects.create(name='City Break'),
+            destination=destination, description='3 days in Paris', package_type='full_package',
+            duration_days=3, duration_nights=2, price_per_person=Decimal('799.99'), max_participants=10
+        )
+
+        self.today = timezone.localdate()
+        self.expected = []
+        for offset in (5, 12, 20):
+            departure = timezone.make_aware(
+                timezone.datetime.combine(self.today + timedelta(days=offset), timezone.datetime.min.time())
+            ) + timedelta(hours=8)
+            flight = Flight.objects.create(
+                flight_number=f'AA{offset}', airline=airline, departure_airport=lax, arrival_airport=cdg,
+                departure_time=departure, arrival_time=departure + timedelta(hours=11),
+                duration=timedelta(hours=11), aircraft_type='Boeing 777',
+                economy_price=Decimal('599.99'), economy_seats=200, available_economy_seats=200
+            )
+            FlightBooking.objects.create(
+                user=self.user, flight=flight, booking_reference=f'FL{offset}',
+                passenger_count=1, total_price=Decimal('599.99')
+            )
+            self.expected.append((offset, 'flight'))
+        for offset in (5, 15):
+            check_in = self.today + timedelta(days=offset)
+            HotelBooking.objects.create(
+                user=self.user, hotel=self.hotel, booking_reference=f'HB{offset}', check_in_date=check_in,
+                check_out_date=check_in + timedelta(days=2), nights=2, guests=1, rooms=1,
+                total_price=Decimal('399.98')
+            )
+            self.expected.append((offset, 'hotel'))
+        for offset in (-3, 12):
+            PackageBooking.objects.create(
+                user=self.user, package=self.package, booking_reference=f'PB{offset}',
+                travel_date=self.today + timedelta(days=offset), participants=1, total_price=Decimal('799.99')
+            )
+            self.expected.append((offset, 'package'))
+        Booking.objects.create(
+            booking_reference='BK1', user=self.user, travel_date=self.today + timedelta(days=12),
+            total_amount=Decimal('100.00'), contact_email='tripper@example.com', contact_phone='+1234567890'
+        )
+        self.expected.append((12, 'booking'))
+        Booking.objects.create(
+            booking_reference='BK2', user=self.other, travel_date=self.today + timedelta(days=1),
+            total_amount=Decimal('100.00'), contact_email='other@example.com', contact_phone='+1234567890'
+        )
+
+        # Dates sort as midnight, so on the same day they come before an 08:00 flight
+        type_order = {'hotel': 0, 'package': 1, 'booking': 2, 'flight': 3}
+        self.expected.sort(key=lambda e: (e[0], type_order[e[1]]))
+
+    def test_trips_are_merged_in_travel_order_across_pages(self):
+        url = reverse('management:my_trips')
+        seen = []
+        query_counts = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {'page_size': 3} if not seen else None)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            query_counts.append(len(queries))
+            seen.extend(
+                ((item['travel_date'] - self.today).days, item['type']) for item in response.data['results']
+            )
+            url = response.data['next']
+
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(query_counts), 3)
+        # Auth, one query per booking type, the review prefetches and the booking items
+        self.assertLessEqual(max(query_counts), 8)
+
+    def test_upcoming_trips_skip_the_past(self):
+        response = self.client.get(reverse('management:my_trips'), {'upcoming': 'true'})
+        self.assertEqual(len(response.data['results']), len(self.expected) - 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('management:my_trips'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rescheduled_flight_moves_in_the_timeline(self):
+        flight = Flight.objects.get(flight_number='AA5')
+        # Saves that leave the departure alone do not touch the bookings
+        flight.status = 'delayed'
+        with self.assertNumQueries(1):
+            flight.save()
+        booking = FlightBooking.objects.get(flight=flight)
+        with self.assertNumQueries(1):
+            booking.save(update_fields=['status'])
+
+        flight.departure_time += timedelta(days=30)
+        flight.save()
+        self.assertEqual(FlightBooking.objects.get(flight=flight).departure_time, flight.departure_time)
+
+        response = self.client.get(reverse('management:my_trips'))
+        last = response.data['results'][-1]
+        self.assertEqual((last['type'], last['booking']['booking_reference']), ('flight', 'FL5'))
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def request_as(self, user_id, view, cookies=None):
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies or {})
+        request.user = SimpleNamespace(pk=user_id, is_authenticated=True)
+        return ReplicaPinningMiddleware(view)(request)
+
+    def test_catalog_reads_go_to_replicas(self):
+        self.assertEqual(self.router.db_for_read(Hotel), 'replica')
+        self.assertEqual(self.router.db_for_read(HotelBooking), 'replica')
+        self.assertEqual(self.router.db_for_read(Booking), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertEqual(self.router.db_for_write(Hotel), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'hotels'))
+
+    def test_primary_reads_block(self):
+        with primary_reads():
+            self.assertEqual(self.router.db_for_read(Hotel), 'default')
+        self.assertEqual(self.router.db_for_read(Hotel), 'replica')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Hotel), 'default')
+
+    def test_writers_read_their_writes(self):
+        seen = []
+
+        def book(request):
+            seen.append(self.router.db_for_read(HotelBooking))
+            self.router.db_for_write(HotelBooking)
+            seen.append(self.router.db_for_read(HotelBooking))
+            return HttpResponse()
+
+        def list_bookings(request):
+            seen.append(self.router.db_for_read(HotelBooking))
+            return HttpResponse()
+
+        self.request_as(1, book)
+        self.request_as(1, list_bookings)
+        self.request_as(2, list_bookings)
+        self.assertEqual(seen, ['replica', 'default', 'default', 'replica'])
+
+        cache.delete(pin_key(1))
+        self.request_as(1, list_bookings)
+        self.assertEqual(seen[-1], 'replica')
+
+    def test_pin_cookie_reaches_other_workers(self):
+        seen = []
+
+        def book(request):
+            self.router.db_for_write(HotelBooking)
+            return HttpResponse()
+
+        def list_bookings(request):
+            seen.append(self.router.db_for_read(HotelBooking))
+            return HttpResponse()
+
+        response = self.request_as(1, book)
+        cookie = response.cookies[PIN_COOKIE].value
+        # Another worker has its own local cache, so only the cookie carries the pin
+        cache.clear()
+        self.request_as(1, list_bookings, {PIN_COOKIE: cookie})
+        self.request_as(2, list_bookings, {PIN_COOKIE: cookie})
+        self.request_as(1, list_bookings, {PIN_COOKIE: 'forged'})
+        self.assertEqual(seen, ['default', 'replica', 'replica'])
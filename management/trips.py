@@ -0,0 +1,142 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+from datetime import datetime, time, timezone as dt_timezone
+from heapq import merge
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from flights.models import FlightBooking
+from flights.serializers import FlightBookingListSerializer
+from hotels.models import HotelBooking
+from hotels.serializers import HotelBookingListSerializer
+from packages.models import PackageBooking
+from packages.serializers import PackageBookingListSerializer
+from .models import Booking, BookingItem
+from .serializers import BookingSerializer
+
+# One index-ordered query per booking type; ``rank`` breaks ties between types on the same instant
+TripSource = namedtuple('TripSource', ['kind', 'rank', 'queryset', 'field', 'is_date', 'serializer_class'])
+
+TRIP_SOURCES = [
+    TripSource(
+        'flight', 0,
+        lambda user: FlightBooking.objects.filter(user=user).select_related(
+            'flight__airline', 'flight__departure_airport', 'flight__arrival_airport'
+        ),
+        'departure_time', False, FlightBookingListSerializer
+    ),
+    TripSource(
+        'hotel', 1,
+        lambda user: HotelBooking.objects.filter(user=user).select_related(
+            'hotel__destination'
+        ).prefetch_related('hotel__reviews'),
+        'check_in_date', True, HotelBookingListSerializer
+    ),
+    TripSource(
+        'package', 2,
+        lambda user: PackageBooking.objects.filter(user=user).select_related(
+            'package__category', 'package__destination'
+        ).prefetch_related('package__reviews'),
+        'travel_date', True, PackageBookingListSerializer
+    ),
+    TripSource(
+        'booking', 3,
+        lambda user: Booking.objects.filter(user=user).prefetch_related(
+            Prefetch('items', queryset=BookingItem.objects.select_related('content_type'))
+        ),
+        'travel_date', True, BookingSerializer
+    ),
+]
+
+def encode_cursor(position):
+    when, rank, pk = position
+    raw = f"{when.isoformat()}|{rank}|{pk}"
+    return urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(value):
+    """(when, rank, id) from a cursor string; raises ValueError when malformed"""
+    when, rank, pk = urlsafe_b64decode(value.encode()).decode().split('|')
+    when = datetime.fromisoformat(when)
+    if timezone.is_naive(when):
+        raise ValueError("Cursor timestamp must carry a timezone")
+    return when.astimezone(dt_timezone.utc), int(rank), int(pk)
+
+def start_of(day):
+    """Dates sort as midnight UTC so they interleave with flight departure times"""
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+def _moment(source, obj):
+    value = obj
+    for part in source.field.split('__'):
+        value = getattr(value, part)
+    return start_of(value) if source.is_date else value.astimezone(dt_timezone.utc)
+
+def _after(source, position):
+    """Rows of ``source`` sorting strictly after ``position`` in (when, rank, id) order"""
+    when, rank, pk = position
+    if source.is_date:
+        later = Q(**{f'{source.field}__gt': when.date()})
+        same = Q(**{source.field: when.date()}) if when.time() == time.min else None
+    else:
+        later = Q(**{f'{source.field}__gt': when})
+        same = Q(**{source.field: when})
+
+    if same is None or source.rank < rank:
+        return later
+    if source.rank > rank:
+        return later | same
+    return later | (same & Q(id__gt=pk))
+
+def _stream(source, rows):
+    for obj in rows:
+        yield _moment(source, obj), source.rank, obj.id, source, obj
+
+def trip_page(user, after=None, page_size=20):
+    """One page of a user's bookings of every type, ordered by travel time.
+
+    Each type is read with a single ``page_size + 1`` slice of an index-ordered
+    query past the cursor, and the slices are merged lazily. A page therefore
+    costs one query per type (plus the prefetches their serializers need)
+    however many bookings the user has.
+
+    Returns ([(source, when, obj), ...], next_position or None).
+    """
+    streams = []
+    for source in TRIP_SOURCES:
+        queryset = source.queryset(user)
+        if after is not None:
+            queryset = queryset.filter(_after(source, after))
+        streams.append(_stream(source, queryset.order_by(source.field, 'id')[:page_size + 1]))
+
+    entries = []
+    for entry in merge(*streams, key=lambda e: e[:3]):
+        entries.append(entry)
+        if len(entries) > page_size:
+            break
+
+    next_position = None
+    if len(entries) > page_size:
+        entries = entries[:page_size]
+        next_position = entries[-1][:3]
+
+    return [(source, when, obj) for when, _, _, source, obj in entries], next_position
+
+def serialize_trips(entries, context=None):
+    """Serialize a page with each type's list serializer, one batch per type"""
+    batches = {}
+    for source, _, obj in entries:
+        batches.setdefault(source.kind, (source, []))[1].append(obj)
+
+    rendered = {}
+    for kind, (source, objs) in batches.items():
+        data = source.serializer_class(objs, many=True, context=context).data
+        rendered.update({(kind, obj.id): item for obj, item in zip(objs, data)})
+
+    return [
+        {
+            'type': source.kind,
+            'travel_date': timezone.localtime(when).date() if not source.is_date else when.date(),
+            'booking': rendered[(source.kind, obj.id)],
+        }
+        for source, when, obj in entries
+    ]
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'management'
+
+urlpatterns = [
+    path('', views.my_trips, name='my_trips'),
+]
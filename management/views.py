@@ -0,0 +1,42 @@
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.utils import timezone
+
+from .trips import trip_page, serialize_trips, encode_cursor, decode_cursor, start_of
+
+TRIPS_PAGE_SIZE = 20
+TRIPS_MAX_PAGE_SIZE = 100
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def my_trips(request):
+    """Every flight, hotel, package and itinerary booking of the user, ordered by travel date"""
+    after = None
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    elif request.query_params.get('upcoming') in ('1', 'true'):
+        # Start just before today's first trip
+        after = (start_of(timezone.localdate()), -1, 0)
+    
+    try:
+        page_size = min(int(request.query_params.get('page_size', TRIPS_PAGE_SIZE)), TRIPS_MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = TRIPS_PAGE_SIZE
+    page_size = max(page_size, 1)
+    
+    entries, next_position = trip_page(request.user, after, page_size)
+    
+    next_url = None
+    if next_position is not None:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor(next_position))
+    
+    return Response({
+        'next': next_url,
+        'results': serialize_trips(entries, context={'request': request})
+    })
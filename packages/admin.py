@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import PackageCategory, TravelPackage
+from .models import PackageCategory, TravelPackage, PackageDeparture, PackageFlightRoute
 
 @admin.register(PackageCategory)
 class PackageCategoryAdmin(admin.ModelAdmin):
@@ -9,14 +9,25 @@ class PackageCategoryAdmin(admin.ModelAdmin):
     ordering = ('name',)
     
     fieldsets = (
-        (None, {'fields': ('name',)}),
+        (None, {'fields': ('name', 'slug')}),
         ('Details', {'fields': ('description', 'icon')}),
         ('Timestamps', {'fields': ('created_at',), 'classes': ('collapse',)}),
     )
     readonly_fields = ('created_at',)
 
+class PackageDepartureInline(admin.TabularInline):
+    model = PackageDeparture
+    extra = 0
+    ordering = ('travel_date',)
+
+class PackageFlightRouteInline(admin.TabularInline):
+    model = PackageFlightRoute
+    extra = 0
+
 @admin.register(TravelPackage)
 class TravelPackageAdmin(admin.ModelAdmin):
+    inlines = [PackageFlightRouteInline, PackageDepartureInline]
+    filter_horizontal = ('hotels',)
     list_display = ('name', 'destination', 'category', 'package_type', 'price_per_person', 'duration_display', 'is_featured', 'is_active')
     list_filter = ('category', 'destination', 'package_type', 'is_featured', 'is_active', 'includes_flight', 'includes_hotel')
     search_fields = ('name', 'description', 'destination__name')
@@ -26,8 +37,9 @@ class TravelPackageAdmin(admin.ModelAdmin):
     fieldsets = (
         (None, {'fields': ('name', 'destination', 'category', 'package_type')}),
         ('Details', {'fields': ('description',)}),
-        ('Duration & Capacity', {'fields': ('duration_days', 'duration_nights', 'min_participants', 'max_participants')}),
-        ('Pricing', {'fields': ('price_per_person',)}),
+        ('Duration & Capacity', {'fields': ('duration_days', 'duration_nights', 'min_participants', 'max_participants', 'departure_capacity')}),
+        ('Pricing', {'fields': ('price_per_person', 'extras_per_person')}),
+        ('Bundle Components', {'fields': ('hotels',)}),
         ('Inclusions', {'fields': ('includes_flight', 'includes_hotel', 'includes_meals', 'includes_transport')}),
         ('Media', {'fields': ('image_url',)}),
         ('Status', {'fields': ('is_featured', 'is_active')}),
@@ -0,0 +1,116 @@
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Case, DecimalField, F, Value, When
+
+from flights.fares import load_fares, cheapest_fare
+from hotels.pricing import cached_stay_prices, CENTS
+from .models import TravelPackage, PackageFlightRoute
+
+# Hotel rooms in a bundle are shared by this many travellers
+GUESTS_PER_ROOM = 2
+
+BundleQuote = namedtuple('BundleQuote', ['price_per_person', 'outbound_flight_id', 'return_flight_id', 'hotel_id'])
+
+def price_bundles(packages, travel_date, participants):
+    """Cheapest live flight + hotel bundle per package for a departure.
+
+    Returns {package_id: BundleQuote or None}. Packages without linked
+    components are left out, so callers fall back to ``price_per_person``;
+    None means the components exist but none can be sold for this date.
+
+    Component prices come from the per-(route, date) fare and per-(hotel,
+    stay) price memos, so a warm page costs two link queries and a handful
+    of cache reads no matter how many bundles it shows.
+    """
+    quotes = price_bundle_dates(packages, [travel_date], participants)
+    return {package_id: quote for (package_id, _), quote in quotes.items()}
+
+def price_bundle_dates(packages, travel_dates, participants):
+    """Like ``price_bundles`` for several departure dates at once.
+
+    Returns {(package_id, travel_date): BundleQuote or None}. Links are read
+    once and every fare leg across all dates goes through a single memo read.
+    """
+    packages = list(packages)
+    package_ids = [package.id for package in packages]
+
+    routes = defaultdict(list)
+    for package_id, departure, arrival in PackageFlightRoute.objects.filter(
+        package_id__in=package_ids
+    ).values_list('package_id', 'departure_airport_id', 'arrival_airport_id'):
+        routes[package_id].append((departure, arrival))
+
+    hotels = defaultdict(list)
+    for package_id, hotel_id in TravelPackage.hotels.through.objects.filter(
+        travelpackage_id__in=package_ids
+    ).values_list('travelpackage_id', 'hotel_id'):
+        hotels[package_id].append(hotel_id)
+
+    # Collect every leg and stay up front so each memo is read once
+    legs = set()
+    stays = defaultdict(set)
+    for package in packages:
+        for travel_date in travel_dates:
+            return_date = travel_date + timedelta(days=package.duration_nights)
+            if package.includes_flight:
+                for departure, arrival in routes[package.id]:
+                    legs.add((departure, arrival, travel_date))
+                    legs.add((arrival, departure, return_date))
+            if package.includes_hotel and package.duration_nights:
+                stays[(travel_date, package.duration_nights)].update(hotels[package.id])
+
+    fares = load_fares(legs)
+    stay_prices = {
+        (travel_date, nights): cached_stay_prices(hotel_ids, travel_date, travel_date + timedelta(days=nights))
+        for (travel_date, nights), hotel_ids in stays.items()
+    }
+
+    rooms = -(-participants // GUESTS_PER_ROOM)
+    quotes = {}
+    for package in packages:
+        package_routes = routes[package.id] if package.includes_flight else []
+        package_hotels = hotels[package.id] if package.includes_hotel and package.duration_nights else []
+        if not package_routes and not package_hotels:
+            continue
+
+        for travel_date in travel_dates:
+            price = package.extras_per_person
+            outbound_id = return_id = hotel_id = None
+
+            if package_routes:
+                return_date = travel_date + timedelta(days=package.duration_nights)
+                best = None
+                for departure, arrival in package_routes:
+                    outbound = cheapest_fare(fares[(departure, arrival, travel_date)], participants)
+                    inbound = cheapest_fare(fares[(arrival, departure, return_date)], participants)
+                    if outbound and inbound and (best is None or outbound[0] + inbound[0] < best[0]):
+                        best = (outbound[0] + inbound[0], outbound[2], inbound[2])
+                if best is None:
+                    quotes[(package.id, travel_date)] = None
+                    continue
+                price += best[0]
+                outbound_id, return_id = best[1], best[2]
+
+            if package_hotels:
+                stay_totals = stay_prices[(travel_date, package.duration_nights)]
+                hotel_id = min(package_hotels, key=lambda h: stay_totals[h])
+                price += stay_totals[hotel_id] * rooms / participants
+
+            quotes[(package.id, travel_date)] = BundleQuote(
+                Decimal(price).quantize(CENTS, ROUND_HALF_UP), outbound_id, return_id, hotel_id
+            )
+
+    return quotes
+
+def quoted_price_expression(quotes):
+    """Per-person price as search shows it: the live quote for bundles, the stored price otherwise.
+
+    ``quotes`` is what ``price_bundles`` returned for the same queryset, so
+    price filters and facet buckets agree with the prices on the page.
+    """
+    return Case(
+        *[When(pk=package_id, then=Value(quote.price_per_person)) for package_id, quote in quotes.items() if quote],
+        default=F('price_per_person'),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
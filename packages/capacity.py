@@ -0,0 +1,54 @@
+from datetime import timedelta
+from django.db.models import F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import PackageDeparture
+
+def seats_remaining_expression(travel_date):
+    """Seats left on ``travel_date`` for each package row, for use in a filter or annotation"""
+    ledger = PackageDeparture.objects.filter(
+        package=OuterRef('pk'), travel_date=travel_date
+    ).values('seats_remaining')[:1]
+    return Coalesce(Subquery(ledger), F('departure_capacity'), F('max_participants'), output_field=IntegerField())
+
+def reserve_departure_seats(package, travel_date, participants):
+    """Take seats on a departure with a conditional decrement.
+
+    Must run inside a transaction. Returns False, leaving the ledger
+    untouched, when fewer than ``participants`` seats are left.
+    """
+    # Materialise an untouched departure at full capacity so it can be decremented
+    PackageDeparture.objects.bulk_create(
+        [PackageDeparture(package=package, travel_date=travel_date, seats_remaining=package.seats_per_departure)],
+        ignore_conflicts=True
+    )
+    return PackageDeparture.objects.filter(
+        package=package, travel_date=travel_date, seats_remaining__gte=participants
+    ).update(seats_remaining=F('seats_remaining') - participants) == 1
+
+def release_departure_seats(package_id, travel_date, participants):
+    """Hand seats back to a departure, e.g. when a booking is cancelled"""
+    PackageDeparture.objects.filter(package_id=package_id, travel_date=travel_date).update(
+        seats_remaining=F('seats_remaining') + participants
+    )
+
+def seats_remaining(package, travel_date):
+    departure = PackageDeparture.objects.filter(package=package, travel_date=travel_date).first()
+    return departure.seats_remaining if departure else package.seats_per_departure
+
+def departure_seats(packages, start, end):
+    """Seats left per (package_id, travel_date) for every date in [start, end), from one ledger range query"""
+    packages = list(packages)
+    ledger = dict(
+        ((package_id, travel_date), seats)
+        for package_id, travel_date, seats in PackageDeparture.objects.filter(
+            package__in=packages, travel_date__gte=start, travel_date__lt=end
+        ).values_list('package_id', 'travel_date', 'seats_remaining')
+    )
+
+    days = [start + timedelta(days=i) for i in range((end - start).days)]
+    return {
+        (package.id, day): ledger.get((package.id, day), package.seats_per_departure)
+        for package in packages
+        for day in days
+    }
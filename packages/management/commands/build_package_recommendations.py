@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+import time
+
+from packages.recommendations import rebuild_package_neighbours
+
+class Command(BaseCommand):
+    help = 'Rebuild the similar-package neighbour table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=10, help='Neighbours to keep per package')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_package_neighbours(k=options['k'])
+        self.stdout.write(f"packages: {written} neighbours in {(time.perf_counter() - started) * 1000:.0f} ms")
+        self.stdout.write(self.style.SUCCESS('Package recommendations rebuilt'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:44
+
+import thumbnails.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0002_alter_packagecategory_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='travelpackage',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterField(
+            model_name='packageimage',
+            name='image',
+            field=thumbnails.fields.ContentAddressedImageField(upload_to='packages/gallery/'),
+        ),
+        migrations.AlterField(
+            model_name='travelpackage',
+            name='main_image',
+            field=thumbnails.fields.ContentAddressedImageField(blank=True, null=True, upload_to='packages/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0003_content_addressed_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='packagereview',
+            index=models.Index(fields=['package', '-created_at', '-id'], name='package_review_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagereview',
+            index=models.Index(fields=['package', 'rating', '-created_at', '-id'], name='package_review_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_departures(apps, schema_editor):
+    PackageBooking = apps.get_model('packages', 'PackageBooking')
+    PackageDeparture = apps.get_model('packages', 'PackageDeparture')
+
+    booked = (
+        PackageBooking.objects.exclude(status='cancelled')
+        .values('package_id', 'travel_date', 'package__max_participants')
+        .annotate(participants=Sum('participants'))
+    )
+    PackageDeparture.objects.bulk_create(
+        [
+            PackageDeparture(
+                package_id=row['package_id'],
+                travel_date=row['travel_date'],
+                seats_remaining=max(row['package__max_participants'] - row['participants'], 0)
+            )
+            for row in booked
+        ],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0004_review_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageDeparture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('travel_date', models.DateField()),
+                ('seats_remaining', models.PositiveIntegerField()),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departures', to='packages.travelpackage')),
+            ],
+            options={
+                'ordering': ['package', 'travel_date'],
+                'unique_together': {('package', 'travel_date')},
+            },
+        ),
+        migrations.RunPython(backfill_departures, migrations.RunPython.noop),
+    ]
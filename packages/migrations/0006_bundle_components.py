@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0002_content_addressed_images'),
+        ('hotels', '0008_booking_room_type'),
+        ('packages', '0005_departure_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='travelpackage',
+            name='extras_per_person',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Meals, transfers and activities added on top of live flight and hotel prices', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='travelpackage',
+            name='hotels',
+            field=models.ManyToManyField(blank=True, related_name='packages', to='hotels.hotel'),
+        ),
+        migrations.CreateModel(
+            name='PackageFlightRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arrival_airport', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='flights.airport')),
+                ('departure_airport', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='flights.airport')),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flight_routes', to='packages.travelpackage')),
+            ],
+            options={
+                'unique_together': {('package', 'departure_airport', 'arrival_airport')},
+            },
+        ),
+    ]
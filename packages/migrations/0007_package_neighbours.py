@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0006_bundle_components'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='packages.travelpackage')),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='packages.travelpackage')),
+            ],
+            options={
+                'ordering': ['package', 'rank'],
+                'unique_together': {('package', 'rank')},
+            },
+        ),
+    ]
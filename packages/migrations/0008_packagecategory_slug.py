@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+from travel_api.slugs import unique_slug
+
+
+def backfill_category_slugs(apps, schema_editor):
+    PackageCategory = apps.get_model('packages', 'PackageCategory')
+
+    taken = set()
+    categories = list(PackageCategory.objects.order_by('id').only('id', 'name'))
+    for category in categories:
+        category.slug = unique_slug(category.name, taken, max_length=100)
+    PackageCategory.objects.bulk_update(categories, ['slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0007_package_neighbours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='packagecategory',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(backfill_category_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='packagecategory',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=100, unique=True),
+        ),
+    ]
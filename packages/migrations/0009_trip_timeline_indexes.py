@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0008_packagecategory_slug'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='packagebooking',
+            index=models.Index(fields=['user', 'travel_date', 'id'], name='package_booking_trips_idx'),
+        ),
+    ]
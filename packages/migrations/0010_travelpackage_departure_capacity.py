@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0009_trip_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='travelpackage',
+            name='departure_capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Seats sold per departure date across all bookings; blank means max_participants. Changing it affects only dates nobody has booked yet', null=True),
+        ),
+    ]
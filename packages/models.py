@@ -1,13 +1,17 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from thumbnails.fields import ContentAddressedImageField
+from travel_api.slugs import slug_for
 from hotels.models import Hotel, Destination
-from flights.models import Flight
+from flights.models import Flight, Airport
 
 User = get_user_model()
 
 class PackageCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    # Filled from the name on first save
+    slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
@@ -19,6 +23,11 @@ class PackageCategory(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slug_for(self, self.name, max_length=100)
+        super().save(*args, **kwargs)
+
 class TravelPackage(models.Model):
     PACKAGE_TYPE = [
         ('flight_hotel', 'Flight + Hotel'),
@@ -35,14 +44,25 @@ class TravelPackage(models.Model):
     duration_days = models.PositiveIntegerField()
     duration_nights = models.PositiveIntegerField()
     price_per_person = models.DecimalField(max_digits=10, decimal_places=2)
-    max_participants = models.PositiveIntegerField()
+    max_participants = models.PositiveIntegerField()  # Per booking
+    departure_capacity = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Seats sold per departure date across all bookings; blank means max_participants. "
+                  "Changing it affects only dates nobody has booked yet"
+    )
     min_participants = models.PositiveIntegerField(default=1)
-    main_image = models.ImageField(upload_to='packages/', null=True, blank=True)
+    main_image = ContentAddressedImageField(upload_to='packages/', null=True, blank=True)
     includes_flight = models.BooleanField(default=False)
     includes_hotel = models.BooleanField(default=False)
     includes_meals = models.BooleanField(default=False)
     includes_transport = models.BooleanField(default=False)
     includes_activities = models.BooleanField(default=False)
+    # Live bundle pricing: flight and hotel components priced at their current rates
+    hotels = models.ManyToManyField(Hotel, blank=True, related_name='packages')
+    extras_per_person = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0,
+        help_text="Meals, transfers and activities added on top of live flight and hotel prices"
+    )
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -54,6 +74,10 @@ class TravelPackage(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def seats_per_departure(self):
+        return self.departure_capacity if self.departure_capacity is not None else self.max_participants
+
     @property
     def average_rating(self):
         reviews = self.reviews.all()
@@ -61,9 +85,21 @@ class TravelPackage(models.Model):
             return sum([review.rating for review in reviews]) / len(reviews)
         return 0
 
+class PackageFlightRoute(models.Model):
+    """Candidate route for a package's flights; the return leg flies the reverse route"""
+    package = models.ForeignKey(TravelPackage, on_delete=models.CASCADE, related_name='flight_routes')
+    departure_airport = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name='+')
+    arrival_airport = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = ['package', 'departure_airport', 'arrival_airport']
+
+    def __str__(self):
+        return f"{self.package.name}: {self.departure_airport.code} to {self.arrival_airport.code}"
+
 class PackageImage(models.Model):
     package = models.ForeignKey(TravelPackage, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='packages/gallery/')
+    image = ContentAddressedImageField(upload_to='packages/gallery/')
     caption = models.CharField(max_length=200, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -85,6 +121,19 @@ class PackageItinerary(models.Model):
     def __str__(self):
         return f"{self.package.name} - Day {self.day_number}"
 
+class PackageDeparture(models.Model):
+    """Seats left on one departure; dates without a row still have every seat free"""
+    package = models.ForeignKey(TravelPackage, on_delete=models.CASCADE, related_name='departures')
+    travel_date = models.DateField()
+    seats_remaining = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['package', 'travel_date']
+        ordering = ['package', 'travel_date']
+
+    def __str__(self):
+        return f"{self.package.name} on {self.travel_date}: {self.seats_remaining} seats left"
+
 class PackageBooking(models.Model):
     BOOKING_STATUS = [
         ('pending', 'Pending'),
@@ -104,6 +153,12 @@ class PackageBooking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # "My trips" timeline: a user's departures in date order
+            models.Index(fields=['user', 'travel_date', 'id'], name='package_booking_trips_idx'),
+        ]
+
     def __str__(self):
         return f"Booking {self.booking_reference} - {self.package.name}"
 
@@ -128,6 +183,26 @@ class PackageReview(models.Model):
 
     class Meta:
         unique_together = ['user', 'package']
+        indexes = [
+            # Review feed: newest first within a package, optionally for one rating
+            models.Index(fields=['package', '-created_at', '-id'], name='package_review_feed_idx'),
+            models.Index(fields=['package', 'rating', '-created_at', '-id'], name='package_review_rating_idx'),
+        ]
 
     def __str__(self):
         return f"{self.package.name} - {self.rating} stars by {self.user.email}"
+
+class PackageNeighbour(models.Model):
+    """Precomputed "you may also like" packages, rebuilt offline by build_package_recommendations"""
+    package = models.ForeignKey(TravelPackage, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(TravelPackage, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        # Also the index the detail view reads the neighbours through
+        unique_together = ['package', 'rank']
+        ordering = ['package', 'rank']
+
+    def __str__(self):
+        return f"{self.package.name} -> {self.neighbour.name} (#{self.rank})"
@@ -0,0 +1,50 @@
+from django.db import transaction
+
+from travel_api.similarity import one_hot, log_scale, top_k_neighbours
+from .models import TravelPackage, PackageNeighbour
+
+# Relative pull of each feature group on the cosine similarity
+DESTINATION_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.5
+PRICE_WEIGHT = 1.0
+DURATION_WEIGHT = 1.0
+INCLUSION_WEIGHT = 0.5
+
+INCLUSION_FLAGS = ['includes_flight', 'includes_hotel', 'includes_meals', 'includes_transport', 'includes_activities']
+
+def package_feature_vectors():
+    """(ids, vectors) for active packages: destination, category, price, duration and inclusions"""
+    rows = list(TravelPackage.objects.filter(is_active=True).values_list(
+        'id', 'destination_id', 'category_id', 'price_per_person', 'duration_days', *INCLUSION_FLAGS
+    ))
+
+    _, destination = one_hot([row[1] for row in rows], DESTINATION_WEIGHT)
+    _, category = one_hot([row[2] for row in rows], CATEGORY_WEIGHT)
+    price = log_scale([row[3] for row in rows])
+    duration = log_scale([row[4] for row in rows])
+
+    ids, vectors = [], []
+    for package_id, destination_id, category_id, price_per_person, duration_days, *flags in rows:
+        ids.append(package_id)
+        vectors.append(
+            destination(destination_id)
+            + category(category_id)
+            + [PRICE_WEIGHT * price(price_per_person), DURATION_WEIGHT * duration(duration_days)]
+            + [INCLUSION_WEIGHT if flag else 0.0 for flag in flags]
+        )
+    return ids, vectors
+
+def rebuild_package_neighbours(k=10):
+    """Replace the whole neighbour table; returns the number of rows written"""
+    ids, vectors = package_feature_vectors()
+    neighbours = top_k_neighbours(ids, vectors, k)
+
+    rows = [
+        PackageNeighbour(package_id=package_id, neighbour_id=neighbour_id, rank=rank, score=score)
+        for package_id, ranked in neighbours.items()
+        for rank, (neighbour_id, score) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        PackageNeighbour.objects.all().delete()
+        PackageNeighbour.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -4,8 +4,11 @@ from .models import (
     PackageBooking, PackageParticipant, PackageReview
 )
 from hotels.serializers import DestinationSerializer
+from thumbnails.serializers import ThumbnailField
+from .bundles import price_bundles
+from django.db import transaction
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 class PackageCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,9 +16,11 @@ class PackageCategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class PackageImageSerializer(serializers.ModelSerializer):
+    image_thumbnails = ThumbnailField(source='image')
+
     class Meta:
         model = PackageImage
-        fields = ['id', 'image', 'caption']
+        fields = ['id', 'image', 'image_thumbnails', 'caption']
 
 class PackageItinerarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -45,18 +50,21 @@ class TravelPackageListSerializer(serializers.ModelSerializer):
     category = PackageCategorySerializer(read_only=True)
     destination = DestinationSerializer(read_only=True)
     average_rating = serializers.ReadOnlyField()
+    main_image_thumbnails = ThumbnailField(source='main_image')
     
     class Meta:
         model = TravelPackage
         fields = ['id', 'name', 'category', 'destination', 'duration_days', 
                  'duration_nights', 'price_per_person', 'main_image', 
-                 'average_rating', 'is_featured', 'includes_flight', 
+                 'main_image_thumbnails', 'average_rating', 'is_featured', 'includes_flight', 
                  'includes_hotel', 'includes_meals', 'includes_transport', 
                  'includes_activities']
 
 class PackageSearchSerializer(serializers.Serializer):
-    destination = serializers.CharField(required=False)
-    category = serializers.CharField(required=False)
+    destination = serializers.CharField(required=False, help_text="Free text matched against destination and package names")
+    destination_slug = serializers.CharField(required=False, help_text="Destination slug or id")
+    category = serializers.CharField(required=False, help_text="Free text matched against category names")
+    category_slug = serializers.CharField(required=False, help_text="Category slug or id")
     travel_date = serializers.DateField()
     participants = serializers.IntegerField(min_value=1, max_value=20, default=1)
     min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
@@ -66,12 +74,47 @@ class PackageSearchSerializer(serializers.Serializer):
         choices=['flight_hotel', 'hotel_only', 'flight_only', 'full_package'],
         required=False
     )
+    facets = serializers.BooleanField(default=True, help_text="Include facet counts in the response")
 
     def validate_travel_date(self, value):
         if value < datetime.now().date():
             raise serializers.ValidationError("Travel date cannot be in the past")
         return value
 
+class PackageCalendarSerializer(serializers.Serializer):
+    MAX_NIGHTS = 62
+    MAX_PACKAGES = 50
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False, help_text="Exclusive; defaults to 30 days after start_date")
+    participants = serializers.IntegerField(min_value=1, max_value=20, default=1)
+    destination = serializers.CharField(required=False, help_text="Free text matched against destination and package names")
+    destination_slug = serializers.CharField(required=False, help_text="Destination slug or id")
+    category = serializers.CharField(required=False, help_text="Free text matched against category names")
+    category_slug = serializers.CharField(required=False, help_text="Category slug or id")
+    package_type = serializers.ChoiceField(
+        choices=['flight_hotel', 'hotel_only', 'flight_only', 'full_package'],
+        required=False
+    )
+
+    def validate(self, data):
+        today = datetime.now().date()
+        start = data.get('start_date') or today
+        end = data.get('end_date') or start + timedelta(days=30)
+        
+        if start < today:
+            raise serializers.ValidationError("Start date cannot be in the past")
+        
+        if end <= start:
+            raise serializers.ValidationError("End date must be after start date")
+        
+        if (end - start).days > self.MAX_NIGHTS:
+            raise serializers.ValidationError(f"Calendar window cannot exceed {self.MAX_NIGHTS} days")
+        
+        data['start_date'] = start
+        data['end_date'] = end
+        return data
+
 class PackageParticipantSerializer(serializers.ModelSerializer):
     class Meta:
         model = PackageParticipant
@@ -96,6 +139,12 @@ class PackageBookingSerializer(serializers.ModelSerializer):
         if len(data['participants_details']) != data['participants']:
             raise serializers.ValidationError("Number of participant details must match participant count")
         
+        # Fetched once here and shared with the view and create()
+        try:
+            data['package'] = TravelPackage.objects.get(id=data.pop('package_id'), is_active=True)
+        except TravelPackage.DoesNotExist:
+            raise serializers.ValidationError({'package_id': 'Package not found'})
+        
         return data
 
     def create(self, validated_data):
@@ -103,15 +152,22 @@ class PackageBookingSerializer(serializers.ModelSerializer):
         validated_data['user'] = self.context['request'].user
         validated_data['booking_reference'] = str(uuid.uuid4())[:10].upper()
         
-        # Calculate total price
-        package = TravelPackage.objects.get(id=validated_data['package_id'])
-        total_price = package.price_per_person * validated_data['participants']
+        # Calculate total price, using the live bundle price when the package has linked components
+        package = validated_data['package']
+        quotes = price_bundles([package], validated_data['travel_date'], validated_data['participants'])
+        if package.id in quotes and quotes[package.id] is None:
+            raise serializers.ValidationError("No flights or hotels available for this package on the travel date")
+        price_per_person = quotes[package.id].price_per_person if package.id in quotes else package.price_per_person
+        total_price = price_per_person * validated_data['participants']
         validated_data['total_price'] = total_price
         
-        booking = PackageBooking.objects.create(**validated_data)
-        
-        for participant_data in participants_data:
-            PackageParticipant.objects.create(booking=booking, **participant_data)
+        # The booking and all its participants are written together or not at all
+        with transaction.atomic():
+            booking = PackageBooking.objects.create(**validated_data)
+            PackageParticipant.objects.bulk_create([
+                PackageParticipant(booking=booking, **participant_data)
+                for participant_data in participants_data
+            ])
         
         return booking
 
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from travel_api.catalog_cache import bump_catalog_versions
+
+from .models import PackageBooking, PackageCategory, PackageReview, TravelPackage
+from .capacity import release_departure_seats
+
+@receiver([post_save, post_delete], sender=PackageCategory)
+@receiver([post_save, post_delete], sender=TravelPackage)
+def invalidate_package_catalog(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_catalog_versions([sender]))
+
+@receiver([post_save, post_delete], sender=PackageReview)
+def invalidate_package_ratings(sender, instance, **kwargs):
+    # Listed packages carry their average rating
+    transaction.on_commit(lambda: bump_catalog_versions([TravelPackage]))
+
+@receiver(pre_save, sender=PackageBooking)
+def claim_cancellation(sender, instance, **kwargs):
+    # Flipping the stored status conditionally lets only one of two racing cancellations release the seats
+    instance._releases_seats = instance.pk is not None and instance.status == 'cancelled' and bool(
+        PackageBooking.objects.filter(pk=instance.pk).exclude(status='cancelled').update(status='cancelled')
+    )
+
+@receiver(post_save, sender=PackageBooking)
+def release_cancelled_seats(sender, instance, **kwargs):
+    if instance._releases_seats:
+        release_departure_seats(instance.package_id, instance.travel_date, instance.participants)
+
+@receiver(post_delete, sender=PackageBooking)
+def release_deleted_seats(sender, instance, **kwargs):
+    if instance.status != 'cancelled':
+        release_departure_seats(instance.package_id, instance.travel_date, instance.participants)
@@ -7,8 +7,14 @@ from rest_framework.authtoken.models import Token
 from decimal import Decimal
 from datetime import date, timedelta
 from django.utils import timezone
-from .models import PackageCategory, TravelPackage
-from hotels.models import Destination
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .models import PackageCategory, TravelPackage, PackageDeparture, PackageBooking, PackageFlightRoute
+from .bundles import price_bundles
+from .recommendations import rebuild_package_neighbours
+from hotels.models import Destination, Hotel, RatePlan
+from flights.models import Airport, Airline, Flight
 
 User = get_user_model()
 
@@ -204,4 +210,418 @@ class PackageAPITest(APITestCase):
         
         self.assertEqual(active_packages.count(), 1)
         self.assertEqual(inactive_packages.count(), 1)
-        self.assertNotIn(inactive_package, active_packages)
\ No newline at end of file
+        self.assertNotIn(inactive_package, active_packages)
+
+    def test_package_search_by_slug(self):
+        self.assertEqual(self.category.slug, 'beach')
+        self.assertEqual(self.destination.slug, 'bali-indonesia')
+        url = reverse('packages:search_packages')
+        params = {
+            'travel_date': (timezone.now() + timedelta(days=30)).date().isoformat(),
+            'participants': 2
+        }
+
+        for category_slug in ('beach', str(self.category.id)):
+            response = self.client.get(url, dict(params, category_slug=category_slug))
+            self.assertEqual(len(response.data['packages']), 1, category_slug)
+        response = self.client.get(url, dict(params, category_slug='mountain'))
+        self.assertEqual(response.data['packages'], [])
+
+        response = self.client.get(url, dict(params, destination_slug='bali-indonesia'))
+        self.assertEqual(len(response.data['packages']), 1)
+        self.assertEqual(response.data['facets']['category'][0]['slug'], 'beach')
+
+        # A second category with a clashing name still gets its own slug
+        self.assertEqual(PackageCategory.objects.create(name='Beach!').slug, 'beach-2')
+
+    def test_text_search_matches_every_name_even_when_it_equals_a_slug(self):
+        TravelPackage.objects.create(
+            name='Beach Club Week', category=PackageCategory.objects.create(name='Beach Luxury'),
+            destination=self.destination, description='More sand', package_type='hotel_only',
+            duration_days=7, duration_nights=6, price_per_person=Decimal('999.00'),
+            max_participants=20, min_participants=1, is_active=True
+        )
+        url = reverse('packages:search_packages')
+        params = {
+            'travel_date': (timezone.now() + timedelta(days=30)).date().isoformat(),
+            'participants': 2
+        }
+        self.assertEqual(len(self.client.get(url, dict(params, category='beach')).data['packages']), 2)
+        self.assertEqual(len(self.client.get(url, dict(params, category_slug='beach')).data['packages']), 1)
+        self.assertEqual(len(self.client.get(url, dict(params, destination=str(self.destination.id))).data['packages']), 0)
+
+    def test_package_search_facets(self):
+        PackageCategory.objects.create(name='Adventure')
+        TravelPackage.objects.create(
+            name='Bali Adventure',
+            category=PackageCategory.objects.get(name='Adventure'),
+            destination=self.destination,
+            description='Volcano treks',
+            package_type='full_package',
+            duration_days=5,
+            duration_nights=4,
+            price_per_person=Decimal('699.00'),
+            max_participants=10
+        )
+        url = reverse('packages:search_packages')
+        params = {
+            'category': 'Beach',
+            'travel_date': (timezone.now() + timedelta(days=30)).date().isoformat(),
+            'participants': 2
+        }
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['packages']), 1)
+
+        facets = response.data['facets']
+        categories = {f['name']: f['count'] for f in facets['category']}
+        prices = {(f['min'], f['max']): f['count'] for f in facets['price']}
+        self.assertEqual(categories, {'Adventure': 1, 'Beach': 1})
+        self.assertEqual(prices[(1000, 2000)], 1)
+        self.assertEqual(prices[(500, 1000)], 0)
+
+        response = self.client.get(url, dict(params, facets='false'))
+        self.assertNotIn('facets', response.data)
+
+class PackageDepartureCapacityTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='traveller',
+            email='traveller@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        self.package = TravelPackage.objects.create(
+            name='Bali Beach Getaway',
+            category=PackageCategory.objects.create(name='Beach'),
+            destination=Destination.objects.create(name='Bali', country='Indonesia', description='Tropical paradise'),
+            description='7 days in paradise',
+            package_type='full_package',
+            duration_days=7,
+            duration_nights=6,
+            price_per_person=Decimal('1000.00'),
+            max_participants=6
+        )
+        self.travel_date = date.today() + timedelta(days=30)
+
+    def booking_payload(self, participants):
+        return {
+            'package_id': self.package.id,
+            'travel_date': self.travel_date.isoformat(),
+            'participants': participants,
+            'total_price': '0.00',
+            'participants_details': [
+                {'first_name': f'Guest{i}', 'last_name': 'Smith', 'date_of_birth': '1990-01-01'}
+                for i in range(participants)
+            ]
+        }
+
+    def test_bookings_draw_down_departure_seats(self):
+        url = reverse('packages:booking_create')
+        response = self.client.post(url, self.booking_payload(4), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        departure = PackageDeparture.objects.get(package=self.package, travel_date=self.travel_date)
+        self.assertEqual(departure.seats_remaining, 2)
+
+        # The package allows 3 per booking, but only 2 seats are left on this date
+        response = self.client.post(url, self.booking_payload(3), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(PackageBooking.objects.count(), 1)
+        departure.refresh_from_db()
+        self.assertEqual(departure.seats_remaining, 2)
+
+    def test_departure_capacity_is_separate_from_the_booking_limit(self):
+        self.package.departure_capacity = 10
+        self.package.save()
+        url = reverse('packages:booking_create')
+        for participants in (6, 4):
+            response = self.client.post(url, self.booking_payload(participants), format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        departure = PackageDeparture.objects.get(package=self.package, travel_date=self.travel_date)
+        self.assertEqual(departure.seats_remaining, 0)
+
+    def test_cancelling_a_booking_returns_its_seats(self):
+        self.client.post(reverse('packages:booking_create'), self.booking_payload(4), format='json')
+        booking = PackageBooking.objects.get()
+        departure = PackageDeparture.objects.get(package=self.package, travel_date=self.travel_date)
+
+        booking.status = 'cancelled'
+        booking.save()
+        departure.refresh_from_db()
+        self.assertEqual(departure.seats_remaining, 6)
+
+        # Saving or deleting it again does not hand the seats back twice
+        booking.save()
+        booking.delete()
+        departure.refresh_from_db()
+        self.assertEqual(departure.seats_remaining, 6)
+
+    def test_booking_queries_do_not_grow_with_participants(self):
+        url = reverse('packages:booking_create')
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.post(url, self.booking_payload(1), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(url, self.booking_payload(5), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(response.data['participants_details']), 5)
+
+    def test_booking_unknown_package(self):
+        payload = dict(self.booking_payload(1), package_id=self.package.id + 100)
+        response = self.client.post(reverse('packages:booking_create'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('package_id', response.data)
+
+    def test_search_filters_on_seats_remaining(self):
+        PackageDeparture.objects.create(package=self.package, travel_date=self.travel_date, seats_remaining=2)
+        url = reverse('packages:search_packages')
+
+        response = self.client.get(url, {'travel_date': self.travel_date.isoformat(), 'participants': 2})
+        self.assertEqual([p['seats_remaining'] for p in response.data['packages']], [2])
+
+        response = self.client.get(url, {'travel_date': self.travel_date.isoformat(), 'participants': 3})
+        self.assertEqual(response.data['packages'], [])
+
+        # Other dates have no ledger row yet, so the whole package is free
+        other_date = self.travel_date + timedelta(days=1)
+        response = self.client.get(url, {'travel_date': other_date.isoformat(), 'participants': 3})
+        self.assertEqual([p['seats_remaining'] for p in response.data['packages']], [6])
+
+class BundlePricingTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.travel_date = date.today() + timedelta(days=30)
+        self.destination = Destination.objects.create(name='Bali', country='Indonesia', description='Tropical paradise')
+
+        self.home = Airport.objects.create(code='SIN', name='Changi', city='Singapore', country='Singapore')
+        self.away = Airport.objects.create(code='DPS', name='Ngurah Rai', city='Denpasar', country='Indonesia')
+        self.airline = Airline.objects.create(code='SQ', name='Singapore Airlines')
+        self.outbound = self.flight('101', self.home, self.away, self.travel_date, Decimal('400.00'))
+        self.inbound = self.flight('102', self.away, self.home, self.travel_date + timedelta(days=3), Decimal('350.00'))
+
+        self.hotel = self.make_hotel('Beach Resort', Decimal('200.00'))
+        self.make_hotel('Cliff Villas', Decimal('320.00'))
+
+        self.package = TravelPackage.objects.create(
+            name='Bali Bundle',
+            category=PackageCategory.objects.create(name='Beach'),
+            destination=self.destination,
+            description='Flights and a beach stay',
+            package_type='flight_hotel',
+            duration_days=4,
+            duration_nights=3,
+            price_per_person=Decimal('999.00'),
+            extras_per_person=Decimal('50.00'),
+            max_participants=10,
+            includes_flight=True,
+            includes_hotel=True
+        )
+        self.package.hotels.set(Hotel.objects.all())
+        PackageFlightRoute.objects.create(package=self.package, departure_airport=self.home, arrival_airport=self.away)
+
+    def flight(self, number, origin, destination, day, price):
+        departure = timezone.make_aware(timezone.datetime.combine(day, timezone.datetime.min.time())) + timedelta(hours=9)
+        return Flight.objects.create(
+            flight_number=number, airline=self.airline,
+            departure_airport=origin, arrival_airport=destination,
+            departure_time=departure, arrival_time=departure + timedelta(hours=3),
+            duration=timedelta(hours=3), aircraft_type='A350',
+            economy_price=price, economy_seats=100, available_economy_seats=100
+        )
+
+    def make_hotel(self, name, price):
+        return Hotel.objects.create(
+            name=name, destination=self.destination, address='Beach Road', description='Resort',
+            star_rating=4, price_per_night=price, total_rooms=20, available_rooms=20
+        )
+
+    def test_cheapest_bundle_price(self):
+        quote = price_bundles([self.package], self.travel_date, 2)[self.package.id]
+        # 400 + 350 flights, one shared room at 3 x 200, plus 50 extras
+        self.assertEqual(quote.price_per_person, Decimal('1100.00'))
+        self.assertEqual((quote.outbound_flight_id, quote.return_flight_id, quote.hotel_id),
+                         (self.outbound.id, self.inbound.id, self.hotel.id))
+
+        # No return flight on a different date, so the bundle cannot be sold
+        other_date = self.travel_date + timedelta(days=1)
+        self.assertIsNone(price_bundles([self.package], other_date, 2)[self.package.id])
+
+    def test_component_prices_are_memoized_and_invalidated(self):
+        price_bundles([self.package], self.travel_date, 2)
+        with self.assertNumQueries(2):
+            quote = price_bundles([self.package], self.travel_date, 2)[self.package.id]
+        self.assertEqual(quote.price_per_person, Decimal('1100.00'))
+
+        self.outbound.economy_price = Decimal('300.00')
+        self.outbound.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            RatePlan.objects.create(
+                hotel=self.hotel, name='Peak', start_date=self.travel_date,
+                end_date=self.travel_date + timedelta(days=10), price_per_night=Decimal('240.00')
+            )
+        quote = price_bundles([self.package], self.travel_date, 2)[self.package.id]
+        self.assertEqual(quote.price_per_person, Decimal('1060.00'))
+
+    def test_search_shows_live_bundle_price(self):
+        response = self.client.get(reverse('packages:search_packages'), {
+            'travel_date': self.travel_date.isoformat(), 'participants': 2
+        })
+        package = response.data['packages'][0]
+        self.assertEqual(package['price_per_person'], '1100.00')
+        self.assertEqual(package['total_price_for_group'], 2200.0)
+        self.assertEqual(package['bundle']['hotel_id'], self.hotel.id)
+
+        response = self.client.get(reverse('packages:search_packages'), {
+            'travel_date': (self.travel_date + timedelta(days=1)).isoformat(), 'participants': 2
+        })
+        self.assertEqual(response.data['packages'], [])
+
+    def test_price_filter_and_facet_use_the_quoted_price(self):
+        url = reverse('packages:search_packages')
+        params = {'travel_date': self.travel_date.isoformat(), 'participants': 2, 'facets': 'true'}
+
+        # Stored at 999 but quoted at 1100
+        response = self.client.get(url, dict(params, max_price=1000))
+        self.assertEqual(response.data['packages'], [])
+        buckets = {(b['min'], b['max']): b['count'] for b in response.data['facets']['price']}
+        self.assertEqual((buckets[(500, 1000)], buckets[(1000, 2000)]), (0, 1))
+
+        self.package.price_per_person = Decimal('1299.00')
+        self.package.save()
+        response = self.client.get(url, dict(params, max_price=1150))
+        self.assertEqual([p['price_per_person'] for p in response.data['packages']], ['1100.00'])
+
+        # Bundles that cannot be sold on the date are not counted either
+        response = self.client.get(url, dict(params, travel_date=(self.travel_date + timedelta(days=1)).isoformat()))
+        self.assertEqual(sum(b['count'] for b in response.data['facets']['price']), 0)
+
+class SimilarPackageTest(APITestCase):
+    def setUp(self):
+        bali = Destination.objects.create(name='Bali', country='Indonesia', description='Tropical paradise')
+        alps = Destination.objects.create(name='Zermatt', country='Switzerland', description='Mountains')
+        beach = PackageCategory.objects.create(name='Beach')
+        ski = PackageCategory.objects.create(name='Ski')
+        self.getaway = self.create_package('Bali Getaway', bali, beach, '1200.00', 7)
+        self.escape = self.create_package('Bali Escape', bali, beach, '1100.00', 6)
+        self.ski_week = self.create_package('Ski Week', alps, ski, '2500.00', 7)
+        self.retired = self.create_package('Old Bali Deal', bali, beach, '1150.00', 7, is_active=False)
+
+    def create_package(self, name, destination, category, price, days, is_active=True):
+        return TravelPackage.objects.create(
+            name=name, category=category, destination=destination, description='Test package',
+            package_type='full_package', duration_days=days, duration_nights=days - 1,
+            price_per_person=Decimal(price), max_participants=10, includes_hotel=True,
+            is_active=is_active
+        )
+
+    def test_detail_view_includes_similar_packages(self):
+        self.assertEqual(rebuild_package_neighbours(k=2), 6)
+        response = self.client.get(reverse('packages:package_detail', kwargs={'pk': self.getaway.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['name'] for p in response.data['similar_packages']], ['Bali Escape', 'Ski Week'])
+
+class PackageCalendarTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.start = date.today() + timedelta(days=20)
+        destination = Destination.objects.create(name='Bali', country='Indonesia', description='Tropical paradise')
+        self.beach = PackageCategory.objects.create(name='Beach')
+        self.getaway = self.create_package('Bali Getaway', destination, self.beach, '1200.00', 4)
+        self.trek = self.create_package('Volcano Trek', destination, PackageCategory.objects.create(name='Adventure'), '700.00', 8)
+        PackageDeparture.objects.create(package=self.getaway, travel_date=self.start + timedelta(days=1), seats_remaining=1)
+        PackageDeparture.objects.create(package=self.trek, travel_date=self.start, seats_remaining=0)
+
+    def create_package(self, name, destination, category, price, max_participants):
+        return TravelPackage.objects.create(
+            name=name, category=category, destination=destination, description='Test package',
+            package_type='full_package', duration_days=5, duration_nights=4,
+            price_per_person=Decimal(price), max_participants=max_participants
+        )
+
+    def test_single_package_calendar(self):
+        url = reverse('packages:package_departure_calendar', kwargs={'pk': self.getaway.id})
+        params = {
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=3)).isoformat(),
+            'participants': 2
+        }
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        departures = response.data['packages'][0]['departures']
+        self.assertEqual([d['seats_remaining'] for d in departures], [4, 1, 4])
+        self.assertEqual([d['available'] for d in departures], [True, False, True])
+        self.assertEqual(departures[0]['price_per_person'], 1200.0)
+
+    def test_filtered_calendar_reads_ledger_once(self):
+        url = reverse('packages:package_calendar')
+        params = {
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=31)).isoformat()
+        }
+        # Package list, ledger range, and the two bundle link lookups
+        with self.assertNumQueries(4):
+            response = self.client.get(url, params)
+        self.assertEqual([p['name'] for p in response.data['packages']], ['Bali Getaway', 'Volcano Trek'])
+        self.assertEqual(response.data['packages'][1]['departures'][0]['seats_remaining'], 0)
+
+        response = self.client.get(url, dict(params, category='beach'))
+        self.assertEqual([p['name'] for p in response.data['packages']], ['Bali Getaway'])
+
+    def test_calendar_validation(self):
+        url = reverse('packages:package_calendar')
+        response = self.client.get(url, {
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=90)).isoformat()
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        url = reverse('packages:package_departure_calendar', kwargs={'pk': self.trek.id + 100})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+class PackageCatalogCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.destination = Destination.objects.create(name='Bali', country='Indonesia', description='Tropical paradise')
+        self.category = PackageCategory.objects.create(name='Beach', description='Beach vacation packages')
+        self.package = TravelPackage.objects.create(
+            name='Bali Beach Getaway',
+            category=self.category,
+            destination=self.destination,
+            description='7 days in paradise',
+            package_type='full_package',
+            duration_days=7,
+            duration_nights=6,
+            price_per_person=Decimal('1299.99'),
+            max_participants=20,
+            min_participants=2,
+            is_featured=True,
+            is_active=True
+        )
+
+    def test_featured_packages_are_cached_until_a_save(self):
+        url = reverse('packages:package_list')
+        self.client.get(url, {'featured': 'true'})
+        with self.assertNumQueries(0):
+            self.client.get(url, {'featured': 'true'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Island'
+            self.category.save()
+        response = self.client.get(url, {'featured': 'true'})
+        self.assertEqual(response.data['results'][0]['category']['name'], 'Island')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.package.is_featured = False
+            self.package.save()
+        self.assertEqual(self.client.get(url, {'featured': 'true'}).data['results'], [])
+
+    def test_category_list_is_cached(self):
+        url = reverse('packages:category_list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data[0]['name'], 'Beach')
@@ -7,5 +7,11 @@ urlpatterns = [
     path('', views.TravelPackageListView.as_view(), name='package_list'),
     path('categories/', views.PackageCategoryListView.as_view(), name='category_list'),
     path('search/', views.search_packages, name='search_packages'),
+    path('calendar/', views.package_calendar, name='package_calendar'),
+    path('bookings/', views.PackageBookingListView.as_view(), name='booking_list'),
+    path('bookings/create/', views.PackageBookingCreateView.as_view(), name='booking_create'),
+    path('bookings/<int:pk>/', views.PackageBookingDetailView.as_view(), name='booking_detail'),
+    path('<int:package_id>/reviews/', views.PackageReviewListCreateView.as_view(), name='review_list_create'),
+    path('<int:pk>/calendar/', views.package_calendar, name='package_departure_calendar'),
     path('<int:pk>/', views.TravelPackageDetailView.as_view(), name='package_detail'),
 ]
\ No newline at end of file
@@ -1,28 +1,47 @@
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Q
+from datetime import timedelta
+from management.idempotency import idempotent, retryable_error
+from travel_api.pagination import ReviewCursorPagination
+from travel_api.facets import combine, facet_counts, price_bucket_options, price_facet
+from travel_api.slugs import lookup_id
+from travel_api.catalog_cache import CachedCatalogMixin
+from travel_api.throttling import SEARCH_THROTTLES
+from hotels.models import Destination
 
-from .models import PackageCategory, TravelPackage, PackageBooking, PackageReview
+from .models import PackageCategory, TravelPackage, PackageBooking, PackageReview, PackageNeighbour
+from .capacity import seats_remaining_expression, reserve_departure_seats, seats_remaining, departure_seats
+from .bundles import price_bundles, price_bundle_dates, quoted_price_expression
 from .serializers import (
     PackageCategorySerializer,
     TravelPackageSerializer,
     TravelPackageListSerializer,
     PackageSearchSerializer,
+    PackageCalendarSerializer,
     PackageBookingSerializer,
     PackageBookingListSerializer,
     PackageReviewSerializer
 )
 
-class PackageCategoryListView(generics.ListAPIView):
+class PackageCategoryListView(CachedCatalogMixin, generics.ListAPIView):
     queryset = PackageCategory.objects.all().order_by('name')
     serializer_class = PackageCategorySerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
+    cache_models = [PackageCategory]
 
-class TravelPackageListView(generics.ListAPIView):
+class TravelPackageListView(CachedCatalogMixin, generics.ListAPIView):
     serializer_class = TravelPackageListSerializer
     permission_classes = [permissions.AllowAny]
+    # Review changes bump the TravelPackage version, for average_rating
+    cache_models = [TravelPackage, PackageCategory, Destination]
+
+    def should_cache(self, request):
+        return bool(request.query_params.get('featured'))
 
     def get_queryset(self):
         queryset = TravelPackage.objects.filter(is_active=True)
@@ -36,57 +55,214 @@ class TravelPackageDetailView(generics.RetrieveAPIView):
     serializer_class = TravelPackageSerializer
     permission_classes = [permissions.AllowAny]
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        
+        # Precomputed by build_package_recommendations; read through the (package, rank) index
+        neighbours = PackageNeighbour.objects.filter(
+            package_id=response.data['id'], neighbour__is_active=True
+        ).select_related('neighbour__category', 'neighbour__destination').prefetch_related('neighbour__reviews')
+        response.data['similar_packages'] = TravelPackageListSerializer(
+            [n.neighbour for n in neighbours], many=True, context=self.get_serializer_context()
+        ).data
+        return response
+
+def destination_filter(data):
+    """Destination filter for validated search data; an empty Q when none is given.
+
+    ``destination_slug`` (a slug or id) becomes an indexed equality on
+    destination_id, and ``destination`` stays the free-text match it always was.
+    """
+    query = Q()
+    if data.get('destination_slug'):
+        # An unknown slug matches nothing rather than falling back to text
+        query &= Q(destination_id=lookup_id(Destination.objects.all(), data['destination_slug']))
+    if data.get('destination'):
+        query &= (
+            Q(destination__name__icontains=data['destination']) |
+            Q(destination__country__icontains=data['destination']) |
+            Q(name__icontains=data['destination'])
+        )
+    return query
+
+def category_filter(data):
+    """Likewise ``category_slug`` and the free-text ``category``"""
+    query = Q()
+    if data.get('category_slug'):
+        query &= Q(category_id=lookup_id(PackageCategory.objects.all(), data['category_slug']))
+    if data.get('category'):
+        query &= Q(category__name__icontains=data['category'])
+    return query
+
+# Per-person price buckets for the price facet; None means open-ended
+PACKAGE_PRICE_BUCKETS = [(0, 500), (500, 1000), (1000, 2000), (2000, 5000), (5000, None)]
+
+def package_search_facets(base_queryset, filters):
+    """Category, destination and price counts in one grouped query"""
+    counts = facet_counts(
+        base_queryset,
+        filters,
+        option_facets={
+            'price': ('price', price_bucket_options('quoted_price', PACKAGE_PRICE_BUCKETS)),
+        },
+        group_facets={
+            'category': ('category', ['category_id', 'category__name', 'category__slug']),
+            'destination': ('destination', ['destination_id', 'destination__name', 'destination__country', 'destination__slug']),
+        }
+    )
+
+    return {
+        'category': [
+            {'id': category_id, 'name': name, 'slug': slug, 'count': count}
+            for (category_id, name, slug), count in sorted(counts['category'].items(), key=lambda i: i[0][1])
+        ],
+        'destination': [
+            {'id': dest_id, 'name': name, 'country': country, 'slug': slug, 'count': count}
+            for (dest_id, name, country, slug), count in sorted(counts['destination'].items(), key=lambda i: i[0][1])
+        ],
+        'price': price_facet(counts['price'], PACKAGE_PRICE_BUCKETS),
+    }
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes(SEARCH_THROTTLES)
 def search_packages(request):
     serializer = PackageSearchSerializer(data=request.query_params)
     if serializer.is_valid():
         data = serializer.validated_data
         
-        queryset = TravelPackage.objects.filter(is_active=True)
-        
-        # Filter by destination
-        if data.get('destination'):
-            queryset = queryset.filter(
-                Q(destination__name__icontains=data['destination']) |
-                Q(destination__country__icontains=data['destination']) |
-                Q(name__icontains=data['destination'])
-            )
-        
-        # Filter by category
-        if data.get('category'):
-            queryset = queryset.filter(category__name__icontains=data['category'])
+        # Filters that are not faceted narrow the base set every facet is counted over
+        base_queryset = TravelPackage.objects.filter(is_active=True)
         
         # Filter by package type
         if data.get('package_type'):
-            queryset = queryset.filter(package_type=data['package_type'])
-        
-        # Filter by price range
-        if data.get('min_price'):
-            queryset = queryset.filter(price_per_person__gte=data['min_price'])
-        if data.get('max_price'):
-            queryset = queryset.filter(price_per_person__lte=data['max_price'])
+            base_queryset = base_queryset.filter(package_type=data['package_type'])
         
         # Filter by duration
         if data.get('duration_days'):
-            queryset = queryset.filter(duration_days=data['duration_days'])
+            base_queryset = base_queryset.filter(duration_days=data['duration_days'])
         
-        # Check availability (simplified - in production, check actual bookings)
+        # Check availability against the seats left on this departure
         participants = data['participants']
-        queryset = queryset.filter(max_participants__gte=participants)
+        base_queryset = base_queryset.alias(
+            departure_seats=seats_remaining_expression(data['travel_date'])
+        ).filter(max_participants__gte=participants, departure_seats__gte=participants)
+        
+        # Packages with linked flights and hotels are priced live: drop those that cannot be sold on this
+        # date, and filter and bucket the rest on the quoted price rather than the stored one
+        quotes = price_bundles(
+            base_queryset.only('id', 'includes_flight', 'includes_hotel', 'duration_nights', 'extras_per_person'),
+            data['travel_date'], participants
+        )
+        base_queryset = base_queryset.exclude(
+            pk__in=[package_id for package_id, quote in quotes.items() if quote is None]
+        ).alias(quoted_price=quoted_price_expression(quotes))
+        
+        # Faceted filters are kept apart so each facet can ignore its own
+        filters = {}
+        
+        # Filter by destination and category
+        destination = destination_filter(data)
+        if destination:
+            filters['destination'] = destination
+        category = category_filter(data)
+        if category:
+            filters['category'] = category
+        
+        # Filter by price range
+        price_filter = Q()
+        if data.get('min_price'):
+            price_filter &= Q(quoted_price__gte=data['min_price'])
+        if data.get('max_price'):
+            price_filter &= Q(quoted_price__lte=data['max_price'])
+        if price_filter:
+            filters['price'] = price_filter
+        
+        queryset = base_queryset.filter(combine(filters)).annotate(
+            seats_remaining=seats_remaining_expression(data['travel_date'])
+        )
         
-        packages = TravelPackageListSerializer(queryset, many=True).data
+        package_objects = list(queryset)
+        packages = TravelPackageListSerializer(package_objects, many=True).data
         
         # Add calculated total price for the group
-        for package in packages:
+        for package, package_object in zip(packages, package_objects):
+            quote = quotes.get(package_object.id)
+            if quote:
+                package['price_per_person'] = str(quote.price_per_person)
+                package['bundle'] = {
+                    'outbound_flight_id': quote.outbound_flight_id,
+                    'return_flight_id': quote.return_flight_id,
+                    'hotel_id': quote.hotel_id,
+                }
             package['total_price_for_group'] = float(package['price_per_person']) * participants
+            package['seats_remaining'] = package_object.seats_remaining
         
-        return Response({
+        result = {
             'packages': packages,
             'search_params': {
                 'travel_date': data['travel_date'],
                 'participants': participants
             }
+        }
+        if data['facets']:
+            result['facets'] = package_search_facets(base_queryset, filters)
+        
+        return Response(result)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes(SEARCH_THROTTLES)
+def package_calendar(request, pk=None):
+    serializer = PackageCalendarSerializer(data=request.query_params)
+    if serializer.is_valid():
+        data = serializer.validated_data
+        start = data['start_date']
+        end = data['end_date']
+        participants = data['participants']
+        
+        # A single package, or the packages matching the search filters
+        queryset = TravelPackage.objects.filter(is_active=True)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        queryset = queryset.filter(destination_filter(data), category_filter(data))
+        if data.get('package_type'):
+            queryset = queryset.filter(package_type=data['package_type'])
+        
+        packages = list(queryset[:PackageCalendarSerializer.MAX_PACKAGES])
+        if pk is not None and not packages:
+            return Response({'error': 'Package not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        # One ledger range query for capacity and one memoized pass for live bundle prices
+        days = [start + timedelta(days=i) for i in range((end - start).days)]
+        seats = departure_seats(packages, start, end)
+        quotes = price_bundle_dates(packages, days, participants)
+        
+        results = []
+        for package in packages:
+            departures = []
+            for day in days:
+                # Linked bundles are priced live; None when their flights or hotels cannot be sold that day
+                price = package.price_per_person
+                if (package.id, day) in quotes:
+                    quote = quotes[(package.id, day)]
+                    price = quote.price_per_person if quote else None
+                seats_left = seats[(package.id, day)]
+                departures.append({
+                    'date': day,
+                    'seats_remaining': seats_left,
+                    'price_per_person': float(price) if price is not None else None,
+                    'available': price is not None and participants <= seats_left,
+                })
+            results.append({'id': package.id, 'name': package.name, 'departures': departures})
+        
+        return Response({
+            'start_date': start,
+            'end_date': end,
+            'participants': participants,
+            'packages': results
         })
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -95,12 +271,13 @@ class PackageBookingCreateView(generics.CreateAPIView):
     serializer_class = PackageBookingSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent('package_booking')
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         # Check package availability
-        package = TravelPackage.objects.get(id=serializer.validated_data['package_id'])
+        package = serializer.validated_data['package']
         participants = serializer.validated_data['participants']
         
         if participants > package.max_participants:
@@ -111,7 +288,13 @@ class PackageBookingCreateView(generics.CreateAPIView):
             return Response({'error': f'Minimum {package.min_participants} participants required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        booking = serializer.save()
+        with transaction.atomic():
+            # Take the seats with a conditional decrement so concurrent bookings cannot overbook the departure
+            travel_date = serializer.validated_data['travel_date']
+            if not reserve_departure_seats(package, travel_date, participants):
+                return retryable_error(f'Only {seats_remaining(package, travel_date)} seats left on this departure')
+            
+            booking = serializer.save()
         
         return Response(PackageBookingSerializer(booking).data, status=status.HTTP_201_CREATED)
 
@@ -133,9 +316,20 @@ class PackageReviewListCreateView(generics.ListCreateAPIView):
     serializer_class = PackageReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    pagination_class = ReviewCursorPagination
+
     def get_queryset(self):
         package_id = self.kwargs['package_id']
-        return PackageReview.objects.filter(package_id=package_id).order_by('-created_at')
+        queryset = PackageReview.objects.filter(package_id=package_id).select_related('user')
+        
+        # Optional rating filter, served by the (package, rating, created_at, id) index
+        rating = self.request.query_params.get('rating')
+        if rating:
+            if rating not in {'1', '2', '3', '4', '5'}:
+                raise ValidationError({'rating': 'Rating must be an integer from 1 to 5'})
+            queryset = queryset.filter(rating=int(rating))
+        
+        return queryset
 
     def perform_create(self, serializer):
         package_id = self.kwargs['package_id']
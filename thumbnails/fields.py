@@ -0,0 +1,30 @@
+from django.db.models.fields.files import ImageField, ImageFieldFile
+import hashlib
+import os
+
+class ContentAddressedImageFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        # Name the stored file after its content so derived URLs can be cached forever
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        extension = os.path.splitext(name)[1].lower()
+        name = f"{digest.hexdigest()[:32]}{extension}"
+
+        # Identical bytes were uploaded before: point at the existing file instead of copying it
+        stored_name = self.field.generate_filename(self.instance, name)
+        if self.storage.exists(stored_name):
+            self.name = stored_name
+            setattr(self.instance, self.field.attname, self.name)
+            self._committed = True
+            if save:
+                self.instance.save()
+            return
+
+        super().save(name, content, save)
+
+class ContentAddressedImageField(ImageField):
+    """ImageField whose uploads are stored under a SHA-256 digest of their bytes"""
+    attr_class = ContentAddressedImageFieldFile
@@ -0,0 +1,26 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from thumbnails.services import ThumbnailService
+from thumbnails.signals import THUMBNAIL_SOURCES
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails for existing uploads'
+
+    def handle(self, *args, **options):
+        written = 0
+        for label, field_name in THUMBNAIL_SOURCES:
+            model = apps.get_model(label)
+            names = (
+                model.objects.exclude(**{field_name: ''})
+                .exclude(**{f'{field_name}__isnull': True})
+                .values_list(field_name, flat=True)
+                .distinct()
+            )
+            for name in names.iterator():
+                try:
+                    written += len(ThumbnailService.generate(name))
+                except Exception as e:
+                    self.stderr.write(f"Skipping {name}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f'Generated {written} thumbnails'))
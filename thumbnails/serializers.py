@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from .services import ThumbnailService
+
+class ThumbnailField(serializers.Field):
+    """Read-only field emitting derivative URLs for an image field"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value or not value.name:
+            return None
+
+        urls = ThumbnailService.urls(value.name)
+        request = self.context.get('request')
+        if request is not None:
+            urls = {
+                size: {fmt: request.build_absolute_uri(url) for fmt, url in formats.items()}
+                for size, formats in urls.items()
+            }
+        return urls
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from io import BytesIO
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THUMBNAIL_SIZES = {
+    'small': (320, 240),
+    'medium': (640, 480),
+}
+
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpg': ('JPEG', 'image/jpeg'),
+}
+
+THUMBNAIL_PREFIX = 'thumbnails'
+
+class ThumbnailService:
+    """Service for building fixed-size image derivatives"""
+
+    @staticmethod
+    def get_sizes():
+        return getattr(settings, 'THUMBNAIL_SIZES', DEFAULT_THUMBNAIL_SIZES)
+
+    @staticmethod
+    def derivative_name(source_name, size, fmt):
+        """Storage path of a derivative, e.g. thumbnails/small/hotels/<digest>.jpg.webp"""
+        return f"{THUMBNAIL_PREFIX}/{size}/{source_name}.{fmt}"
+
+    @staticmethod
+    def parse_derivative_name(name):
+        """Split a derivative path into (source_name, size, fmt), or None if malformed"""
+        parts = name.split('/', 1)
+        if len(parts) != 2 or '.' not in parts[1]:
+            return None
+
+        size, rest = parts
+        source_name, fmt = rest.rsplit('.', 1)
+        if size not in ThumbnailService.get_sizes() or fmt not in THUMBNAIL_FORMATS:
+            return None
+        if not source_name or '..' in source_name.split('/'):
+            return None
+        return source_name, size, fmt
+
+    @staticmethod
+    def render(image, size, fmt):
+        """Crop and scale an opened image to a fixed box and encode it"""
+        thumbnail = ImageOps.fit(ImageOps.exif_transpose(image), size, Image.Resampling.LANCZOS)
+        pil_format, _ = THUMBNAIL_FORMATS[fmt]
+        if pil_format == 'JPEG' and thumbnail.mode != 'RGB':
+            thumbnail = thumbnail.convert('RGB')
+
+        buffer = BytesIO()
+        thumbnail.save(buffer, pil_format, quality=getattr(settings, 'THUMBNAIL_QUALITY', 82))
+        return buffer.getvalue()
+
+    @staticmethod
+    def generate(source_name, only=None):
+        """Create any missing derivatives for a stored image.
+
+        Passing ``only=(size, fmt)`` restricts the work to a single
+        derivative, which is what the on-demand view needs. Returns the
+        names of the derivatives written.
+        """
+        targets = [
+            (size, fmt)
+            for size in ThumbnailService.get_sizes()
+            for fmt in THUMBNAIL_FORMATS
+            if only is None or (size, fmt) == tuple(only)
+        ]
+        missing = [
+            (size, fmt) for size, fmt in targets
+            if not default_storage.exists(ThumbnailService.derivative_name(source_name, size, fmt))
+        ]
+        if not missing:
+            return []
+
+        written = []
+        with default_storage.open(source_name, 'rb') as source:
+            image = Image.open(source)
+            image.load()
+
+        sizes = ThumbnailService.get_sizes()
+        for size, fmt in missing:
+            name = ThumbnailService.derivative_name(source_name, size, fmt)
+            data = ThumbnailService.render(image, sizes[size], fmt)
+            # Content-addressed paths never change once written, so a concurrent writer is harmless
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(data))
+                written.append(name)
+
+        logger.debug("Generated %d thumbnails for %s", len(written), source_name)
+        return written
+
+    @staticmethod
+    def urls(source_name):
+        """Public URLs of every derivative of an image, keyed by size then format"""
+        return {
+            size: {
+                fmt: f"{settings.MEDIA_URL}{ThumbnailService.derivative_name(source_name, size, fmt)}"
+                for fmt in THUMBNAIL_FORMATS
+            }
+            for size in ThumbnailService.get_sizes()
+        }
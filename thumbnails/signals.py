@@ -0,0 +1,29 @@
+from django.apps import apps
+from django.db.models.signals import post_save
+
+from .worker import worker
+
+# (model, image field) pairs that get derivatives on upload
+THUMBNAIL_SOURCES = [
+    ('hotels.Destination', 'image'),
+    ('hotels.Hotel', 'main_image'),
+    ('hotels.HotelImage', 'image'),
+    ('packages.TravelPackage', 'main_image'),
+    ('packages.PackageImage', 'image'),
+    ('flights.Airline', 'logo'),
+]
+
+def queue_thumbnails(sender, instance, update_fields=None, **kwargs):
+    for field_name in sender._thumbnail_fields:
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        image = getattr(instance, field_name)
+        if image and image.name:
+            worker.enqueue(image.name)
+
+for label, field_name in THUMBNAIL_SOURCES:
+    model = apps.get_model(label)
+    if not hasattr(model, '_thumbnail_fields'):
+        model._thumbnail_fields = []
+        post_save.connect(queue_thumbnails, sender=model, dispatch_uid=f'thumbnails.{label}')
+    model._thumbnail_fields.append(field_name)
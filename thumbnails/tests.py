@@ -0,0 +1,86 @@
+from django.test import TestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from decimal import Decimal
+from io import BytesIO
+from PIL import Image
+import shutil
+import tempfile
+
+from hotels.models import Destination, Hotel
+from hotels.serializers import HotelListSerializer
+from .services import ThumbnailService
+from .worker import worker
+
+def make_png(color='red', size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name='photo.png')
+
+class ThumbnailPipelineTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.destination = Destination.objects.create(
+            name='Paris',
+            country='France',
+            description='City of Light'
+        )
+        self.hotel = Hotel.objects.create(
+            name='Grand Hotel Paris',
+            destination=self.destination,
+            address='123 Champs Elysees',
+            description='Luxury hotel in Paris',
+            star_rating=5,
+            price_per_night=Decimal('299.99'),
+            total_rooms=100,
+            available_rooms=95
+        )
+
+    def tearDown(self):
+        worker.join()
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_upload_is_content_addressed_and_queued(self):
+        self.hotel.main_image.save('photo.png', make_png())
+        worker.join()
+
+        name = self.hotel.main_image.name
+        self.assertRegex(name, r'^hotels/[0-9a-f]{32}\.png$')
+        for fmt in ('webp', 'jpg'):
+            derivative = ThumbnailService.derivative_name(name, 'small', fmt)
+            self.assertTrue(default_storage.exists(derivative))
+            with default_storage.open(derivative, 'rb') as f:
+                self.assertEqual(Image.open(f).size, (320, 240))
+
+    def test_same_content_gets_same_name(self):
+        self.hotel.main_image.save('a.png', make_png('blue'))
+        other = Hotel.objects.get(pk=self.hotel.pk)
+        other.main_image.save('b.png', make_png('blue'))
+        self.assertEqual(self.hotel.main_image.name, other.main_image.name)
+
+    @override_settings(THUMBNAILS_EAGER=True)
+    def test_list_serializer_emits_thumbnail_urls(self):
+        self.hotel.main_image.save('photo.png', make_png())
+        data = HotelListSerializer(self.hotel).data
+        self.assertTrue(data['main_image_thumbnails']['medium']['webp'].startswith('/media/thumbnails/medium/hotels/'))
+
+    def test_missing_thumbnail_generated_on_first_request(self):
+        name = default_storage.save('hotels/direct.png', make_png())
+        url = ThumbnailService.urls(name)['small']['jpg']
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        response.close()
+
+    def test_unknown_thumbnail_returns_404(self):
+        response = self.client.get('/media/thumbnails/huge/hotels/missing.png.webp')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/media/thumbnails/small/hotels/missing.png.webp')
+        self.assertEqual(response.status_code, 404)
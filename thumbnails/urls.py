@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'thumbnails'
+
+urlpatterns = [
+    path('<path:name>', views.serve_thumbnail, name='serve_thumbnail'),
+]
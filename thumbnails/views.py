@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from .services import ThumbnailService, THUMBNAIL_FORMATS
+
+# Derivative paths are content-addressed, so a response can be cached for a year
+THUMBNAIL_CACHE_SECONDS = 60 * 60 * 24 * 365
+
+@require_GET
+def serve_thumbnail(request, name):
+    parsed = ThumbnailService.parse_derivative_name(name)
+    if parsed is None:
+        raise Http404("Unknown thumbnail")
+
+    source_name, size, fmt = parsed
+    derivative = ThumbnailService.derivative_name(source_name, size, fmt)
+
+    # Generate on first request if the upload worker has not got to it yet
+    if not default_storage.exists(derivative):
+        if not default_storage.exists(source_name):
+            raise Http404("Image not found")
+        ThumbnailService.generate(source_name, only=(size, fmt))
+
+    _, content_type = THUMBNAIL_FORMATS[fmt]
+    response = FileResponse(default_storage.open(derivative, 'rb'), content_type=content_type)
+    patch_cache_control(
+        response,
+        public=True,
+        immutable=True,
+        max_age=getattr(settings, 'THUMBNAIL_CACHE_SECONDS', THUMBNAIL_CACHE_SECONDS)
+    )
+    return response
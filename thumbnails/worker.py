@@ -0,0 +1,56 @@
+from django.conf import settings
+import logging
+import queue
+import threading
+
+from .services import ThumbnailService
+
+logger = logging.getLogger(__name__)
+
+class ThumbnailWorker:
+    """Background thread that drains a local queue of thumbnail jobs.
+
+    Uploads only enqueue the stored file name, so the request never waits
+    on Pillow. Set ``THUMBNAILS_EAGER = True`` to generate inline instead.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, source_name):
+        if getattr(settings, 'THUMBNAILS_EAGER', False):
+            self._process(source_name)
+            return
+
+        self._ensure_started()
+        self.jobs.put(source_name)
+
+    def join(self):
+        """Block until every queued job has been processed"""
+        self.jobs.join()
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='thumbnail-worker', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            source_name = self.jobs.get()
+            try:
+                self._process(source_name)
+            finally:
+                self.jobs.task_done()
+
+    def _process(self, source_name):
+        try:
+            ThumbnailService.generate(source_name)
+        except Exception:
+            logger.exception("Thumbnail generation failed for %s", source_name)
+
+worker = ThumbnailWorker()
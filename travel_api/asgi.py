@@ -11,6 +11,7 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_api.settings')
+# Serve the async auth endpoints; see travel_api/asgi_urls.py
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_api.settings_asgi')
 
 application = get_asgi_application()
@@ -0,0 +1,15 @@
+"""
+URL configuration for the ASGI app.
+
+Same routes as ``travel_api.urls``, except that login and registration are
+served by async views that hash passwords off the event loop.
+"""
+from django.urls import path
+
+from accounts import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/auth/register/', async_views.register_view),
+    path('api/auth/login/', async_views.login_view),
+] + sync_urlpatterns
@@ -0,0 +1,36 @@
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+def cache_settings(prefix='CACHE', default_location=None):
+    """One CACHES entry built from ``<prefix>_*`` environment variables.
+
+    ``<prefix>_BACKEND`` picks ``locmem`` (the default), ``file`` or
+    ``redis``. Local memory is private to each process, so a deployment
+    with several workers should use ``file`` on a shared directory or
+    ``redis`` (any Redis-compatible server, needs the redis package);
+    otherwise version bumps, throttle counters and the JWT denylist only
+    reach the worker that made them.
+    """
+    backend = config(f'{prefix}_BACKEND', default='locmem')
+    if backend not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            f"{prefix}_BACKEND must be one of {', '.join(map(repr, CACHE_BACKENDS))}, not {backend!r}"
+        )
+
+    default_locations = {
+        'locmem': 'travel-api',
+        'file': str(default_location),
+        'redis': 'redis://127.0.0.1:6379/1',
+    }
+    return {
+        'BACKEND': CACHE_BACKENDS[backend],
+        'LOCATION': config(f'{prefix}_LOCATION', default=default_locations[backend]),
+        'TIMEOUT': config(f'{prefix}_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': config(f'{prefix}_KEY_PREFIX', default='travel_api'),
+    }
@@ -0,0 +1,30 @@
+from django.core.cache import cache
+import uuid
+
+def get_versions(keys):
+    """Current version token for each key, creating any that are missing.
+
+    Cached entries embed the token in their own key, so bumping it orphans
+    every entry built from the old data without having to find them. Tokens
+    are random rather than counters so a version evicted and recreated can
+    never collide with entries written under the old one.
+    """
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        tokens = {key: uuid.uuid4().hex for key in missing}
+        for key, token in tokens.items():
+            # add, not set: if another process created it first, theirs wins
+            cache.add(key, token, None)
+        versions.update(tokens)
+        versions.update(cache.get_many(missing))
+    return versions
+
+def get_version(key):
+    return get_versions([key])[key]
+
+def bump_version(key):
+    cache.set(key, uuid.uuid4().hex, None)
+
+def bump_versions(keys):
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
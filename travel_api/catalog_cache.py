@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+import hashlib
+
+from .cache_versions import get_versions, bump_versions
+from .routers import primary_reads
+
+def catalog_version_key(model):
+    return f'catalog_version:{model._meta.label_lower}'
+
+def catalog_bumped_key(model):
+    return f'catalog_bumped:{model._meta.label_lower}'
+
+def bump_catalog_versions(models):
+    """Orphan every cached catalog response built from any of ``models``.
+
+    Call once the change has committed. For REPLICA_PIN_SECONDS afterwards
+    the responses are rebuilt from the primary, so a lagging replica cannot
+    put the old catalog back under the new version.
+    """
+    bump_versions([catalog_version_key(model) for model in models])
+    cache.set_many({catalog_bumped_key(model): True for model in models}, settings.REPLICA_PIN_SECONDS)
+
+class CachedCatalogMixin:
+    """Caches a list view's response data under the versions of ``cache_models``.
+
+    The key holds each model's version token and a hash of the absolute
+    URL, so filters, pages and the host in pagination links all get their
+    own entry. Saving or deleting any of ``cache_models`` bumps its version
+    once the write commits (see the apps' signals), which every process
+    sharing the cache sees on its next request.
+    """
+    cache_models = ()
+
+    def should_cache(self, request):
+        return True
+
+    def catalog_cache_key(self, request):
+        versions = get_versions([catalog_version_key(model) for model in self.cache_models])
+        tokens = ':'.join(versions[catalog_version_key(model)] for model in self.cache_models)
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return f'catalog:{type(self).__name__}:{tokens}:{url}'
+
+    def list(self, request, *args, **kwargs):
+        if not self.should_cache(request):
+            return super().list(request, *args, **kwargs)
+
+        key = self.catalog_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        if cache.get_many([catalog_bumped_key(model) for model in self.cache_models]):
+            with primary_reads():
+                response = super().list(request, *args, **kwargs)
+        else:
+            response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.CATALOG_CACHE_SECONDS)
+        return response
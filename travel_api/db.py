@@ -0,0 +1,61 @@
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+
+def sqlite_pragmas(prefix='DB'):
+    """PRAGMAs run on every new SQLite connection, in order"""
+    return [
+        ('journal_mode', config(f'{prefix}_SQLITE_JOURNAL_MODE', default='WAL')),
+        ('synchronous', config(f'{prefix}_SQLITE_SYNCHRONOUS', default='NORMAL')),
+        ('busy_timeout', config(f'{prefix}_SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int)),
+    ]
+
+def database_settings(prefix='DB', default_name=None):
+    """One DATABASES entry built from ``<prefix>_*`` environment variables.
+
+    ``<prefix>_ENGINE`` picks ``sqlite`` (the default) or ``postgres``. Both
+    keep connections for ``<prefix>_CONN_MAX_AGE`` seconds with health
+    checks. Postgres can instead use Django's native pool with
+    ``<prefix>_POOL=True``, which needs psycopg's pool extra. SQLite
+    connections are switched to WAL with a busy timeout and start write
+    transactions with BEGIN IMMEDIATE, so concurrent bookings queue instead
+    of failing with "database is locked".
+    """
+    engine = config(f'{prefix}_ENGINE', default='sqlite')
+    common = {
+        'CONN_MAX_AGE': config(f'{prefix}_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config(f'{prefix}_CONN_HEALTH_CHECKS', default=True, cast=bool),
+    }
+
+    if engine == 'postgres':
+        options = {}
+        if config(f'{prefix}_POOL', default=False, cast=bool):
+            options['pool'] = {
+                'min_size': config(f'{prefix}_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config(f'{prefix}_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config(f'{prefix}_POOL_TIMEOUT', default=10, cast=int),
+            }
+            # The pool hands out connections itself; Django rejects it combined with persistent ones
+            common['CONN_MAX_AGE'] = 0
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config(f'{prefix}_NAME', default='travel_api'),
+            'USER': config(f'{prefix}_USER', default='postgres'),
+            'PASSWORD': config(f'{prefix}_PASSWORD', default=''),
+            'HOST': config(f'{prefix}_HOST', default='localhost'),
+            'PORT': config(f'{prefix}_PORT', default='5432'),
+            'OPTIONS': options,
+            **common,
+        }
+
+    if engine != 'sqlite':
+        raise ImproperlyConfigured(f"{prefix}_ENGINE must be 'sqlite' or 'postgres', not {engine!r}")
+
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': config(f'{prefix}_NAME', default=str(default_name)),
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in sqlite_pragmas(prefix)),
+            'transaction_mode': 'IMMEDIATE',
+        },
+        **common,
+    }
@@ -0,0 +1,82 @@
+from django.db.models import Count, Q
+
+def combine(filters, exclude=None):
+    """AND together every active filter except the one named ``exclude``"""
+    combined = Q()
+    for name, condition in filters.items():
+        if name != exclude:
+            combined &= condition
+    return combined
+
+def _count(condition):
+    return Count('pk', filter=condition) if condition else Count('pk')
+
+def price_bucket_options(field, buckets):
+    """Turn [(low, high), ...] into facet options; ``high=None`` is open-ended"""
+    options = {}
+    for low, high in buckets:
+        condition = Q(**{f'{field}__gte': low})
+        if high is not None:
+            condition &= Q(**{f'{field}__lt': high})
+        options[(low, high)] = condition
+    return options
+
+def facet_counts(base_queryset, filters, option_facets=None, group_facets=None):
+    """Count every facet in a single grouped query over ``base_queryset``.
+
+    ``filters`` maps a filter name to the Q applied for it. Each facet names
+    the filter it ignores, so its counts reflect what the user would get by
+    changing only that filter.
+
+    - ``option_facets``: {facet: (ignored_filter, {option_key: Q})} for facets
+      with a known set of options (star rating, price buckets, amenities).
+    - ``group_facets``: {facet: (ignored_filter, [fields])} for facets whose
+      values come from the data (destination, category). The query is grouped
+      by all of these fields and option counts are summed across groups.
+
+    Returns {facet: {key: count}} where the key is the option key or the
+    tuple of group field values.
+    """
+    option_facets = option_facets or {}
+    group_facets = group_facets or {}
+
+    aggregates = {}
+    for facet, (ignored, options) in option_facets.items():
+        others = combine(filters, ignored)
+        for index, condition in enumerate(options.values()):
+            aggregates[f'{facet}__{index}'] = _count(others & condition)
+    for facet, (ignored, fields) in group_facets.items():
+        aggregates[f'{facet}__count'] = _count(combine(filters, ignored))
+
+    group_fields = []
+    for _, fields in group_facets.values():
+        group_fields.extend(field for field in fields if field not in group_fields)
+
+    queryset = base_queryset.order_by()
+    if group_fields:
+        rows = list(queryset.values(*group_fields).annotate(**aggregates))
+    else:
+        rows = [queryset.aggregate(**aggregates)]
+
+    counts = {}
+    for facet, (_, options) in option_facets.items():
+        counts[facet] = {
+            key: sum(row[f'{facet}__{index}'] for row in rows)
+            for index, key in enumerate(options)
+        }
+    for facet, (_, fields) in group_facets.items():
+        grouped = {}
+        for row in rows:
+            value = row[f'{facet}__count']
+            if value:
+                key = tuple(row[field] for field in fields)
+                grouped[key] = grouped.get(key, 0) + value
+        counts[facet] = grouped
+
+    return counts
+
+def price_facet(counts, buckets):
+    return [
+        {'min': low, 'max': high, 'count': counts[(low, high)]}
+        for low, high in buckets
+    ]
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+class ReviewCursorPagination(CursorPagination):
+    """Newest-first cursor pages for review feeds.
+
+    Matches the (parent, created_at, id) indexes on the review tables, so each
+    page is an index range scan with no COUNT(*) and no OFFSET.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
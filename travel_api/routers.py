@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+import random
+
+# Apps whose reads may be served by a replica: the catalog, search and the booking lists
+REPLICA_APPS = {'flights', 'hotels', 'packages'}
+
+_request_state = ContextVar('replica_request_state', default=None)
+_read_primary = ContextVar('replica_read_primary', default=False)
+
+@contextmanager
+def primary_reads():
+    """Send every read in the block to the primary, for data the replicas may not have yet"""
+    token = _read_primary.set(True)
+    try:
+        yield
+    finally:
+        _read_primary.reset(token)
+
+class RequestState:
+    """What the router knows about the request being served"""
+
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+        self._pinned = None
+
+    def user_id(self):
+        # DRF copies the authenticated user onto the Django request
+        user = getattr(self.request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    def pinned(self):
+        if self.wrote:
+            return True
+        if self._pinned is None:
+            user_id = self.user_id()
+            if user_id is None:
+                return False
+            self._pinned = has_pin_cookie(self.request, user_id) or bool(cache.get(pin_key(user_id)))
+        return self._pinned
+
+PIN_COOKIE = 'replica_pin'
+
+def pin_key(user_id):
+    return f'replica_pin:{user_id}'
+
+def pin_user(user_id, response=None):
+    """Send the user's reads to the primary until replicas have caught up with their write.
+
+    The pin goes in a signed cookie on ``response``, which any worker can
+    check, and in the cache for clients that do not keep cookies; with the
+    default per-process cache that second copy only helps the same worker.
+    """
+    if response is not None:
+        response.set_signed_cookie(
+            PIN_COOKIE, str(user_id), salt=PIN_COOKIE, max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True, samesite='Lax'
+        )
+    cache.set(pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+def has_pin_cookie(request, user_id):
+    pinned = request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_COOKIE, max_age=settings.REPLICA_PIN_SECONDS
+    )
+    return pinned == str(user_id)
+
+class ReplicaRouter:
+    """Route catalog and search reads to DATABASE_REPLICAS, everything else to the primary.
+
+    Reads stay on the primary inside a transaction or ``primary_reads()``,
+    after the current request has written, and for REPLICA_PIN_SECONDS
+    after a signed-in user wrote, so a new booking shows up in that user's
+    booking list straight away even if replication lags.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas or model._meta.app_label not in REPLICA_APPS:
+            return DEFAULT_DB_ALIAS
+        if _read_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state = _request_state.get()
+        if state is not None and state.pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+class ReplicaPinningMiddleware:
+    """Tracks writes per request for ReplicaRouter and pins users who wrote"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestState(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state.wrote and state.user_id() is not None and getattr(settings, 'DATABASE_REPLICAS', []):
+            pin_user(state.user_id(), response)
+        return response
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 from decouple import config
+from .cache_config import cache_settings
+from .db import database_settings
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +50,7 @@ INSTALLED_APPS = [
     'hotels',
     'packages',
     'management',
+    'thumbnails',
 ]
 
 MIDDLEWARE = [
@@ -56,8 +60,10 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'travel_api.routers.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'travel_api.throttling.RateLimitHeadersMiddleware',
 ]
 
 ROOT_URLCONF = 'travel_api.urls'
@@ -83,12 +89,28 @@ WSGI_APPLICATION = 'travel_api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Configured from DB_* environment variables; see travel_api/db.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    'default': database_settings('DB', default_name=BASE_DIR / 'db.sqlite3'),
+}
+
+# Read replicas for catalog and search traffic, e.g. DB_REPLICAS=replica with DB_REPLICA_* settings
+DATABASE_REPLICAS = config('DB_REPLICAS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        **database_settings(f'DB_{alias.upper()}', default_name=BASE_DIR / f'{alias}.sqlite3'),
+        # Tests run against the primary only
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_ROUTERS = ['travel_api.routers.ReplicaRouter']
+# How long a user's reads stay on the primary after they write
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=15, cast=int)
+
+CACHES = {
+    'default': cache_settings('CACHE', default_location=BASE_DIR / '.cache'),
 }
+# Catalog list responses; edits invalidate them straight away through versioned keys
+CATALOG_CACHE_SECONDS = config('CATALOG_CACHE_SECONDS', default=3600, cast=int)
 
 
 # Password validation
@@ -110,6 +132,21 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing cost, tuned per environment (tests and development can go lower)
+PASSWORD_HASHERS = [
+    'accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=1000000, cast=int)
+
+# Async login/registration hash on a bounded pool; requests beyond the queue get a 503
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=4, cast=int)
+PASSWORD_HASH_QUEUE = config('PASSWORD_HASH_QUEUE', default=32, cast=int)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -136,6 +173,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -146,7 +184,29 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    # Proxies in front of the app that append to X-Forwarded-For. With 0, throttles key on
+    # REMOTE_ADDR; left unset, DRF would trust the whole client-supplied header
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+    # Used by travel_api.throttling on the search and auth endpoints
+    'DEFAULT_THROTTLE_RATES': {
+        'ip': config('THROTTLE_RATE_IP', default='300/min'),
+        'user': config('THROTTLE_RATE_USER', default='240/min'),
+        'search': config('THROTTLE_RATE_SEARCH', default='60/min'),
+        'auth': config('THROTTLE_RATE_AUTH', default='10/min'),
+    },
+}
+
+# Cache alias holding throttle counters; must be shared by all workers in production
+THROTTLE_CACHE = config('THROTTLE_CACHE', default='default')
+
+# Opt-in JWT authentication (login/register with token_type=jwt)
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('JWT_ACCESS_MINUTES', default=5, cast=int)),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=config('JWT_REFRESH_DAYS', default=7, cast=int)),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'UPDATE_LAST_LOGIN': False,
 }
+JWT_DENYLIST_CACHE_SECONDS = config('JWT_DENYLIST_CACHE_SECONDS', default=30, cast=int)
 
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = config(
@@ -163,12 +223,24 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# Stored Idempotency-Key responses for booking POSTs are replayed for this long
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+# A key whose request has not finished after this long is treated as abandoned (e.g. the worker died)
+IDEMPOTENCY_LEASE_SECONDS = config('IDEMPOTENCY_LEASE_SECONDS', default=300, cast=int)
+
+# Cached hotel calendar months are also invalidated on booking and rate changes
+HOTEL_CALENDAR_CACHE_SECONDS = config('HOTEL_CALENDAR_CACHE_SECONDS', default=3600, cast=int)
+
+# Memoized flight fares and hotel stay prices used by live package bundles
+BUNDLE_PRICE_CACHE_SECONDS = config('BUNDLE_PRICE_CACHE_SECONDS', default=900, cast=int)
+
 # CSRF Configuration
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost:9888',
@@ -182,6 +254,14 @@ AUTH_USER_MODEL = 'accounts.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Image thumbnails (fixed-size derivatives served from MEDIA_URL/thumbnails/)
+THUMBNAIL_SIZES = {
+    'small': (320, 240),
+    'medium': (640, 480),
+}
+THUMBNAIL_QUALITY = config('THUMBNAIL_QUALITY', default=82, cast=int)
+THUMBNAILS_EAGER = config('THUMBNAILS_EAGER', default=False, cast=bool)
+
 # Static files
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
@@ -191,6 +271,10 @@ STATICFILES_DIRS = [
 import sys
 if 'test' in sys.argv or 'pytest' in sys.modules:
     EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    # Tests clear the cache freely, so never point them at a shared one
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    # Throttle counters would carry over between tests; throttling tests set their own rates
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {scope: None for scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']}
     # Disable email debug output during tests
     LOGGING = {
         'version': 1,
@@ -206,6 +290,11 @@ if 'test' in sys.argv or 'pytest' in sys.modules:
                 'level': 'DEBUG',
                 'propagate': False,
             },
+            'accounts.outbox': {
+                'handlers': ['null'],
+                'level': 'DEBUG',
+                'propagate': False,
+            },
         },
     }
 else:
@@ -217,3 +306,8 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@torreytravels.com')
+
+# Email outbox worker (python manage.py send_queued_emails)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+EMAIL_OUTBOX_RETRY_SECONDS = config('EMAIL_OUTBOX_RETRY_SECONDS', default=60, cast=int)
@@ -0,0 +1,9 @@
+"""
+Settings for the ASGI app.
+
+Same as ``travel_api.settings``, except that the URLconf serves login and
+registration through the async views in ``travel_api.asgi_urls``.
+"""
+from .settings import *  # noqa: F401,F403
+
+ROOT_URLCONF = 'travel_api.asgi_urls'
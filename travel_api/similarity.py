@@ -0,0 +1,46 @@
+from heapq import nlargest
+from math import log, sqrt
+from operator import mul
+
+def unit(vector):
+    """Scale a vector to length 1 so dot products are cosine similarities"""
+    length = sqrt(sum(x * x for x in vector))
+    return tuple(x / length for x in vector) if length else tuple(vector)
+
+def one_hot(values, weight=1.0):
+    """Map each distinct value to a column and return (columns, encode)"""
+    columns = {value: index for index, value in enumerate(sorted(set(values)))}
+
+    def encode(value):
+        row = [0.0] * len(columns)
+        if value in columns:
+            row[columns[value]] = weight
+        return row
+
+    return columns, encode
+
+def log_scale(values):
+    """Return a function mapping a value onto [0, 1] on a log scale of ``values``"""
+    logs = [log(float(v) + 1) for v in values]
+    low, high = (min(logs), max(logs)) if logs else (0.0, 0.0)
+    span = high - low or 1.0
+    return lambda value: (log(float(value) + 1) - low) / span
+
+def top_k_neighbours(ids, vectors, k=10):
+    """Cosine top-k neighbours for every row, excluding the row itself.
+
+    ``vectors`` are dense feature rows in the same order as ``ids``. Rows are
+    normalised once up front; each row is then scored against the whole
+    matrix with C-level ``map``/``sum`` dot products and only its k best are
+    kept, so memory stays at one row of scores however many rows there are.
+    Returns {id: [(neighbour_id, score), ...]} best first.
+    """
+    rows = [unit(vector) for vector in vectors]
+    positions = range(len(rows))
+    neighbours = {}
+    for i, row in enumerate(rows):
+        scores = [sum(map(mul, row, other)) for other in rows]
+        scores[i] = float('-inf')
+        best = nlargest(k, positions, key=scores.__getitem__)
+        neighbours[ids[i]] = [(ids[j], scores[j]) for j in best if j != i]
+    return neighbours
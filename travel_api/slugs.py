@@ -0,0 +1,32 @@
+from django.utils.text import slugify
+
+def unique_slug(text, taken, max_length=50):
+    """Slugify ``text`` into the first of slug, slug-2, slug-3... not in ``taken`` and claim it"""
+    base = slugify(text)[:max_length].strip('-') or 'item'
+    slug, n = base, 2
+    while slug in taken:
+        suffix = f'-{n}'
+        slug = f'{base[:max_length - len(suffix)]}{suffix}'
+        n += 1
+    taken.add(slug)
+    return slug
+
+def slug_for(instance, text, max_length=50):
+    """Unique slug for a model instance, checked against the other rows of its table"""
+    base = slugify(text)[:max_length].strip('-') or 'item'
+    taken = set(
+        type(instance)._default_manager.filter(slug__startswith=base[:max_length - 4])
+        .exclude(pk=instance.pk).values_list('slug', flat=True)
+    )
+    return unique_slug(text, taken, max_length)
+
+def lookup_id(queryset, value):
+    """Primary key of the row whose id or slug equals ``value``, or None.
+
+    Both are unique indexed lookups, so a search filter can use an equality
+    on the foreign key column instead of a LIKE across a join.
+    """
+    value = value.strip()
+    if value.isdigit():
+        return queryset.filter(pk=int(value)).values_list('pk', flat=True).first()
+    return queryset.filter(slug=value.lower()).values_list('pk', flat=True).first()
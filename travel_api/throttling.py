@@ -0,0 +1,135 @@
+from math import ceil
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Sliding-window counter throttle.
+
+    Each client has one counter per fixed window; the rate is estimated as
+    the current window's count plus the previous window's count weighted by
+    how much of it still overlaps the sliding window. A request costs one
+    ``get_many`` and one ``add``/``incr``, however high the rate, instead of
+    DRF's per-request timestamp list. Counters live in the THROTTLE_CACHE
+    alias so every worker shares them.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+        super().__init__()
+
+    def get_rate(self):
+        # Read at request time so rate changes in settings apply without a restart
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def get_client_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        current_key = f'{self.key}:{window}'
+        previous_key = f'{self.key}:{window - 1}'
+        counts = self.cache.get_many([current_key, previous_key])
+
+        self.elapsed = (now % self.duration) / self.duration
+        self.current = counts.get(current_key, 0)
+        self.previous = counts.get(previous_key, 0)
+        estimate = self.previous * (1 - self.elapsed) + self.current
+
+        if estimate >= self.num_requests:
+            self.record(request, 0)
+            return False
+
+        # Counters outlive their window by one more, while they still weigh on the next
+        if not self.cache.add(current_key, 1, self.duration * 2):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.set(current_key, 1, self.duration * 2)
+        self.record(request, int(self.num_requests - estimate - 1))
+        return True
+
+    def wait(self):
+        """Seconds until the sliding estimate drops back under the limit"""
+        window_left = self.duration * (1 - self.elapsed)
+        if self.current >= self.num_requests:
+            # Not before this window ends and its count has decayed enough as the previous one
+            return window_left + self.duration * (1 - self.num_requests / self.current)
+        if not self.previous:
+            return window_left
+        return max(window_left - self.duration * (self.num_requests - self.current) / self.previous, 0)
+
+    def record(self, request, remaining):
+        """Keep the tightest limit on the request for RateLimitHeadersMiddleware"""
+        http_request = getattr(request, '_request', request)
+        reset = ceil(self.duration * (1 - self.elapsed))
+        current = getattr(http_request, 'rate_limit', None)
+        if current is None or remaining < current[1]:
+            http_request.rate_limit = (self.num_requests, max(remaining, 0), reset)
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Every throttled request from one address, signed in or not"""
+    scope = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+class UserRateThrottle(SlidingWindowThrottle):
+    """Every throttled request from one signed-in user, whatever their address"""
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
+
+class EndpointRateThrottle(SlidingWindowThrottle):
+    """Per-client budget for one group of endpoints, named by ``scope``"""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_client_ident(request)}
+
+class SearchRateThrottle(EndpointRateThrottle):
+    scope = 'search'
+
+class AuthRateThrottle(EndpointRateThrottle):
+    scope = 'auth'
+
+SEARCH_THROTTLES = [IPRateThrottle, UserRateThrottle, SearchRateThrottle]
+AUTH_THROTTLES = [IPRateThrottle, AuthRateThrottle]
+
+def throttle_wait(request, throttle_classes):
+    """Seconds to wait if any throttle refuses ``request``, else None; for views outside DRF"""
+    waits = []
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, None):
+            waits.append(throttle.wait())
+    return max(waits) if waits else None
+
+class RateLimitHeadersMiddleware:
+    """Adds X-RateLimit-* headers for the tightest throttle a request went through"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit is not None:
+            limit, remaining, reset = rate_limit
+            response['X-RateLimit-Limit'] = str(limit)
+            response['X-RateLimit-Remaining'] = str(remaining)
+            response['X-RateLimit-Reset'] = str(reset)
+        return response
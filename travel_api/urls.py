@@ -19,6 +19,7 @@ def api_root(request):
             'flights': '/api/flights/',
             'hotels': '/api/hotels/',
             'packages': '/api/packages/',
+            'trips': '/api/trips/',
             'docs': '/swagger/',
         }
     })
@@ -42,6 +43,8 @@ urlpatterns = [
     path('api/flights/', include('flights.urls')),
     path('api/hotels/', include('hotels.urls')),
     path('api/packages/', include('packages.urls')),
+    path('api/trips/', include('management.urls')),
+    path(f"{settings.MEDIA_URL.strip('/')}/thumbnails/", include('thumbnails.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path('swagger.json', schema_view.without_ui(cache_timeout=0), name='schema-json'),